@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""
+Compare the crew's sequential (static routing) and hierarchical (manager LLM)
+processes on the same inputs, fully offline.
+
+All agents, the manager included, answer from `MockLLM`; the manager's script
+delegates each task to the agent tasks.yaml assigns it, which is the best case
+for the hierarchical process. Reported per mode: model calls by role, tokens,
+wall time and simulated model time.
+
+    python benchmarks/bench_crew.py --runs 3 --latency 0.3
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from kids_writing_agent.crew import KidsWritingAgent                       # noqa: E402
+from kids_writing_agent.mock_llm import DEFAULT_SCRIPT, MockLog, install_mock  # noqa: E402
+
+from student import DRAFT                                                   # noqa: E402
+
+INPUTS = {"user_id": "demo_user", "topic": "My Favorite Animal", "draft_essay": DRAFT}
+
+
+def crew_script(tasks) -> dict:
+    """DEFAULT_SCRIPT plus a manager that delegates each task to its yaml agent."""
+    routes = [(" ".join(t.description.split()[:5]), t.agent.role) for t in tasks]
+
+    def manager(prompt: str, turn: int) -> str:
+        if "Observation:" in prompt:
+            return prompt.rsplit("Observation:", 1)[1].strip() or "Done."
+        coworker = next((role for key, role in routes if key in " ".join(prompt.split())),
+                        routes[0][1])
+        args = {"task": prompt.strip()[:400], "context": "", "coworker": coworker}
+        return ("Thought: This belongs to a coworker.\n"
+                "Action: Delegate work to coworker\n"
+                f"Action Input: {json.dumps(args)}")
+
+    return {**DEFAULT_SCRIPT, "Writing Coach Manager": manager}
+
+
+def run_mode(mode: str, runs: int, latency) -> dict:
+    calls = MockLog()
+    wall = 0.0
+    for _ in range(runs):
+        crew = KidsWritingAgent(process=mode).crew()
+        agents = list(crew.agents) + ([crew.manager_agent] if crew.manager_agent else [])
+        install_mock(agents, script=crew_script(crew.tasks), latency=latency, call_log=calls)
+        for agent in agents:
+            agent.verbose = False
+            agent.kickoff_cache = False         # every run pays for its model calls
+        for t in crew.tasks:
+            t.human_input = False               # no console prompt in a benchmark
+        crew.verbose = False
+
+        started = time.perf_counter()
+        crew.kickoff(inputs=INPUTS)
+        wall += time.perf_counter() - started
+
+    records = calls.since(0)
+    return {
+        "runs": runs,
+        "wall": wall,
+        "calls": len(records),
+        "prompt_tokens": sum(c.prompt_tokens for c in records),
+        "completion_tokens": sum(c.completion_tokens for c in records),
+        "model": sum(c.latency for c in records),
+        "by_role": calls.totals(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="simulated seconds per model call")
+    parser.add_argument("--per-token", type=float, default=0.0)
+    parser.add_argument("--json", type=Path, help="write the report here")
+    args = parser.parse_args(argv)
+
+    report = {mode: run_mode(mode, args.runs, (args.latency, args.per_token))
+              for mode in ("hierarchical", "sequential")}
+
+    print(f"\n📊 crew processes, {args.runs} run(s), latency {args.latency}s per call\n")
+    print(f"{'mode':<14}{'calls/run':>10}{'p.tok/run':>11}{'c.tok/run':>11}"
+          f"{'wall s/run':>12}{'model s/run':>13}")
+    for mode, r in report.items():
+        n = r["runs"]
+        print(f"{mode:<14}{r['calls'] / n:>10.1f}{r['prompt_tokens'] / n:>11.0f}"
+              f"{r['completion_tokens'] / n:>11.0f}{r['wall'] / n:>12.3f}{r['model'] / n:>13.3f}")
+    h, s = report["hierarchical"], report["sequential"]
+    if s["wall"]:
+        print(f"\nsequential: {h['calls'] - s['calls']} fewer calls, "
+              f"{h['wall'] / s['wall']:.2f}× faster")
+    for mode, r in report.items():
+        print(f"\n{mode} calls by role:")
+        for role, row in sorted(r["by_role"].items()):
+            print(f"  {role:<24}{row['calls']:>5}")
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"\n📝 report → {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+"""
+Per-phase latency benchmark for the essay-coach flow, fully offline.
+
+Every agent in playground/gui_v1 is switched to `MockLLM`, a scripted student
+walks intake → brainstorm → outline → draft → review → coach (→ review →
+praise once the flow loops), and each flow step is timed through crewAI's
+flow events. Per phase it reports wall time, model calls, prompt/completion
+tokens, simulated model time and the framework overhead left over. A flow
+step that raises fails the run (exit code 1), so CI catches a broken flow.
+
+    python benchmarks/bench_flow.py --sessions 5 --latency 0.2 --per-token 0.002
+    python benchmarks/bench_flow.py --flow async --json bench_flow.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+# No network: crewAI and litellm still want a key and would phone home otherwise
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Scripted essays must not land in the real progress, checkpoint and metrics stores
+if not os.getenv("WRITEPAL_DATA_DIR"):
+    os.environ["WRITEPAL_DATA_DIR"] = tempfile.mkdtemp(prefix="bench_flow_")
+DATA_DIR = Path(os.environ["WRITEPAL_DATA_DIR"])
+DATA_DIR.mkdir(parents=True, exist_ok=True)
+if not (DATA_DIR / "profiles.json").exists():
+    shutil.copy(ROOT / "data" / "profiles.json", DATA_DIR / "profiles.json")
+
+sys.path[:0] = [str(ROOT / "src"), str(ROOT / "playground" / "gui_v1")]
+
+from crewai.utilities.events import crewai_event_bus                       # noqa: E402
+from crewai.utilities.events.flow_events import (                          # noqa: E402
+    MethodExecutionFailedEvent, MethodExecutionFinishedEvent, MethodExecutionStartedEvent,
+)
+
+import essay_coach_poc_gui as gui                                          # noqa: E402
+from essay_coach_async import AsyncEssayCoachFlow                          # noqa: E402
+from helpers import FLOW_DONE, AsyncUXChannel, Chunk, UXChannel            # noqa: E402
+from kids_writing_agent.mock_llm import MockLog, install_mock              # noqa: E402
+from kids_writing_agent.outline_cache import default_outline_cache         # noqa: E402
+from kids_writing_agent.prefetch import prefetch_stats                      # noqa: E402
+
+from student import STUDENT                                                 # noqa: E402
+
+AGENTS = [gui.profile_manager, gui.conversation_guide, gui.outline_planner,
+          gui.reviewer, gui.improvement_coach, gui.progress_analyst]
+
+
+# ---------- phase timing ----------
+class PhaseClock:
+    """Records (method, start, end) spans and failed steps from crewAI flow events."""
+
+    def __init__(self):
+        self.spans = []
+        self.failures = []
+        self._open = {}
+        self._lock = threading.Lock()
+
+        @crewai_event_bus.on(MethodExecutionStartedEvent)
+        def _started(source, event):
+            with self._lock:
+                self._open[(id(source), event.method_name)] = time.perf_counter()
+
+        @crewai_event_bus.on(MethodExecutionFinishedEvent)
+        def _finished(source, event):
+            now = time.perf_counter()
+            with self._lock:
+                began = self._open.pop((id(source), event.method_name), None)
+                if began is not None:
+                    self.spans.append((event.method_name, began, now))
+
+        @crewai_event_bus.on(MethodExecutionFailedEvent)
+        def _failed(source, event):
+            with self._lock:
+                self._open.pop((id(source), event.method_name), None)
+                self.failures.append(f"{event.method_name}: {type(event.error).__name__}: {event.error}")
+
+
+def phase_report(spans, calls) -> dict:
+    phases = defaultdict(lambda: {"runs": 0, "wall": 0.0, "calls": 0, "prompt_tokens": 0,
+                                  "completion_tokens": 0, "model": 0.0})
+    for method, began, ended in spans:
+        row = phases[method]
+        row["runs"] += 1
+        row["wall"] += ended - began
+        for c in calls:
+            if began <= c.started <= ended:
+                row["calls"] += 1
+                row["prompt_tokens"] += c.prompt_tokens
+                row["completion_tokens"] += c.completion_tokens
+                row["model"] += c.latency
+    for row in phases.values():
+        row["overhead"] = row["wall"] - row["model"]
+    return dict(phases)
+
+
+# ---------- scripted student ----------
+def run_sync_session() -> int:
+    ux = UXChannel()
+    flow = gui.EssayCoachFlow(ux=ux)
+
+    def run():
+        try:
+            flow.kickoff()
+        finally:
+            ux.done()           # also ends the session if the flow stops early
+
+    runner = threading.Thread(target=run, daemon=True)
+    runner.start()
+    turns = 0
+    messages = [m for m in ux.iter_turn() if not isinstance(m, Chunk)]
+    while FLOW_DONE not in messages and turns < len(STUDENT):
+        ux.in_.put(STUDENT[turns])
+        turns += 1
+        messages = [m for m in ux.iter_turn() if not isinstance(m, Chunk)]
+    runner.join()
+    return turns
+
+
+async def run_async_session() -> int:
+    ux = AsyncUXChannel()
+    flow = AsyncEssayCoachFlow(ux=ux)
+
+    async def run():
+        try:
+            await flow.kickoff_async()
+        finally:
+            ux.done()
+
+    task = asyncio.create_task(run())
+    turns = 0
+    messages = [m async for m in ux.iter_turn() if not isinstance(m, Chunk)]
+    while FLOW_DONE not in messages and turns < len(STUDENT):
+        ux.in_.put_nowait(STUDENT[turns])
+        turns += 1
+        messages = [m async for m in ux.iter_turn() if not isinstance(m, Chunk)]
+    await task
+    return turns
+
+
+# ---------- main ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--flow", choices=["sync", "async"], default="sync")
+    parser.add_argument("--sessions", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="simulated seconds per model call")
+    parser.add_argument("--per-token", type=float, default=0.0,
+                        help="extra simulated seconds per completion token")
+    parser.add_argument("--cache", action="store_true",
+                        help="leave the kickoff cache on (off by default)")
+    parser.add_argument("--verbose", action="store_true", help="keep agent console output")
+    parser.add_argument("--json", type=Path, help="write the report here")
+    args = parser.parse_args(argv)
+
+    calls = MockLog()
+    install_mock(AGENTS, latency=(args.latency, args.per_token), call_log=calls)
+    for agent in AGENTS:
+        agent.verbose = args.verbose
+        if not args.cache and hasattr(agent, "kickoff_cache"):
+            agent.kickoff_cache = False
+    clock = PhaseClock()
+
+    started = time.perf_counter()
+    turns = 0
+    for _ in range(args.sessions):
+        if args.flow == "async":
+            turns += asyncio.run(run_async_session())
+        else:
+            turns += run_sync_session()
+    wall = time.perf_counter() - started
+
+    phases = phase_report(clock.spans, calls.since(0))
+    totals = {
+        "sessions": args.sessions,
+        "student_turns": turns,
+        "wall": wall,
+        "calls": len(calls),
+        "prompt_tokens": sum(c.prompt_tokens for c in calls.since(0)),
+        "completion_tokens": sum(c.completion_tokens for c in calls.since(0)),
+        "model": sum(c.latency for c in calls.since(0)),
+    }
+    totals["overhead"] = totals["wall"] - totals["model"]
+
+    print(f"\n📊 {args.flow} flow, {args.sessions} session(s), "
+          f"latency {args.latency}s + {args.per_token}s/token\n")
+    print(f"{'phase':<14}{'runs':>5}{'wall s':>9}{'calls':>7}{'p.tok':>8}"
+          f"{'c.tok':>7}{'model s':>9}{'ovh ms/run':>12}")
+    for name, row in phases.items():
+        print(f"{name:<14}{row['runs']:>5}{row['wall']:>9.3f}{row['calls']:>7}"
+              f"{row['prompt_tokens']:>8}{row['completion_tokens']:>7}{row['model']:>9.3f}"
+              f"{1000 * row['overhead'] / row['runs']:>12.1f}")
+    print(f"{'total':<14}{'':>5}{wall:>9.3f}{totals['calls']:>7}{totals['prompt_tokens']:>8}"
+          f"{totals['completion_tokens']:>7}{totals['model']:>9.3f}"
+          f"{1000 * totals['overhead'] / max(args.sessions, 1):>12.1f}")
+    speculation = prefetch_stats()
+    print(f"\n🔮 outline prefetch: {speculation['hit']}/{speculation['started']} used "
+          f"(hit rate {speculation['hit_rate']:.0%}), "
+          f"{speculation['saved_seconds']:.3f}s of outline time hidden")
+    outlines = default_outline_cache().stats()
+    print(f"📚 outline cache: {outlines['hits']} hit(s), {outlines['misses']} planner call(s) "
+          f"(hit rate {outlines['hit_rate']:.0%})")
+
+    if args.json:
+        report = {"config": {k: str(v) if isinstance(v, Path) else v
+                             for k, v in vars(args).items()},
+                  "phases": phases, "totals": totals, "by_role": calls.totals(),
+                  "prefetch": speculation, "outline_cache": outlines, "failures": clock.failures}
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"\n📝 report → {args.json}")
+    print(f"🗂  stores → {DATA_DIR}")
+
+    if clock.failures:
+        print(f"\n❌ {len(clock.failures)} flow step(s) failed:", file=sys.stderr)
+        for failure in clock.failures[:5]:
+            print(f"   {failure}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""
+Per-call HTTP overhead of model requests through litellm, with and without
+the shared pool.
+
+Starts the stub OpenAI-compatible server locally and sends the same
+chat completion through `litellm.completion` from `--threads` concurrent
+callers, the way crewAI's `LLM.call` does. Each mode runs in its own process
+so litellm's client cache starts cold:
+  litellm  – litellm's own cached OpenAI client (what runs without the pool)
+  pooled   – after `http_pool.install_pool()`, as ui.py / run_crew / grade_batch do
+It reports p50/p95 call latency, overhead above the stub's own latency,
+connections the stub saw, and the pool's counters. The pooled run fails if
+its requests did not go through the installed pool.
+
+    python benchmarks/bench_http_pool.py --calls 400 --threads 16 --handshake-ms 30
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from stub_openai import serve                                               # noqa: E402
+
+MODES = ("litellm", "pooled")
+MESSAGES = [
+    {"role": "system", "content": "You are a friendly K-12 writing coach."},
+    {"role": "user", "content": "Give one short tip for my essay about my dog Max."}]
+
+
+# ---------- one mode (child process) ----------
+def measure(args) -> None:
+    os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")     # no fetch at import
+    import litellm
+    from kids_writing_agent.http_pool import install_pool, pool_stats
+
+    if args.worker == "pooled":
+        install_pool()
+    latencies, lock = [], threading.Lock()
+    per_thread = [args.calls // args.threads + (i < args.calls % args.threads)
+                  for i in range(args.threads)]
+
+    def caller(n):
+        mine = []
+        for _ in range(n):
+            started = time.perf_counter()
+            litellm.completion(model="openai/stub", messages=MESSAGES,
+                               api_base=args.url, api_key="stub")
+            mine.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(mine)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=caller, args=(n,)) for n in per_thread]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    wall = time.perf_counter() - started
+    print(json.dumps({"latencies": latencies, "wall": wall, "pool": pool_stats()}))
+
+
+def run_mode(mode: str, url: str, args) -> dict:
+    cmd = [sys.executable, str(Path(__file__).resolve()), "--worker", mode, "--url", url,
+           "--calls", str(args.calls), "--threads", str(args.threads)]
+    env = dict(os.environ, WRITEPAL_HTTP_PER_HOST=str(args.per_host))
+    done = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    if done.returncode:
+        raise SystemExit(f"{mode} run failed:\n{done.stderr[-2000:]}")
+    return json.loads(done.stdout.strip().splitlines()[-1])
+
+
+def summary(latencies, server_s: float) -> dict:
+    ordered = sorted(latencies)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000  # noqa: E731
+    mean = sum(ordered) / len(ordered) * 1000
+    return {"p50_ms": pick(0.5), "p95_ms": pick(0.95), "mean_ms": mean,
+            "overhead_ms": mean - server_s * 1000}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--handshake-ms", type=float, default=30.0,
+                        help="stub delay per new connection (TCP + TLS over a real network)")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="stub time per request")
+    parser.add_argument("--per-host", type=int, default=20)
+    parser.add_argument("--json", type=Path, help="write the report here")
+    parser.add_argument("--worker", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.worker:
+        return measure(args)
+
+    server, counters = serve(0, args.handshake_ms, args.latency_ms)
+    url = f"http://127.0.0.1:{server.server_port}/v1"
+    report = {"config": {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()
+                         if k not in ("worker", "url")}}
+    try:
+        for mode in MODES:
+            before = dict(counters)
+            result = run_mode(mode, url, args)
+            row = summary(result["latencies"], args.latency_ms / 1000)
+            row.update(calls_per_s=args.calls / result["wall"],
+                       connections=counters["connections"] - before["connections"],
+                       pool=result["pool"])
+            report[mode] = row
+    finally:
+        server.shutdown()
+
+    print(f"\n📊 {args.calls} litellm calls, {args.threads} threads, stub handshake "
+          f"{args.handshake_ms:.0f} ms, stub latency {args.latency_ms:.0f} ms\n")
+    print(f"{'mode':<9}{'p50 ms':>9}{'p95 ms':>9}{'ovh ms':>9}{'calls/s':>9}{'conns':>7}")
+    for mode in MODES:
+        r = report[mode]
+        print(f"{mode:<9}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['overhead_ms']:>9.1f}"
+              f"{r['calls_per_s']:>9.0f}{r['connections']:>7}")
+    print(f"\npool: {report['pooled']['pool']}")
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"\n📝 report → {args.json}")
+
+    if report["pooled"]["pool"].get("requests", 0) < args.calls:
+        print("\n❌ install_pool() did not take effect: litellm bypassed the shared client",
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+"""
+Load generator for the Gradio chat server (playground/gui_v1/ui.py).
+
+Starts ui.py in a child process with every agent switched to `MockLLM`, then
+ramps up concurrent scripted students (topic → brainstorm → draft → revision),
+each in its own browser session through `gradio_client`. For every step of the
+ramp it reports throughput, p50/p95/p99 turn latency, errors and the server's
+peak thread count and RSS, and writes everything to a JSON report tagged with
+the git revision so builds can be compared. A student only counts as finished
+after every scripted turn and the closing praise; a session that ends early is
+an error, and any traceback in the server log fails the run (exit code 1).
+
+    python benchmarks/bench_load.py --ramp 1,5,10,25 --latency 0.3 --json load.json
+    python benchmarks/bench_load.py --flow sync --server-concurrency 40
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+GUI = ROOT / "playground" / "gui_v1"
+sys.path.insert(0, str(ROOT / "src"))
+
+from kids_writing_agent.mock_llm import DEFAULT_SCRIPT                      # noqa: E402
+from student import STUDENT                                                 # noqa: E402
+
+DONE_TEXT = "Session complete"
+PRAISE_TEXT = DEFAULT_SCRIPT["Progress Analyst"].split("!")[0]   # "Wonderful work"
+
+
+# ---------- server side (child process) ----------
+def serve(args) -> None:
+    os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+    os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+    os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+    sys.path[:0] = [str(ROOT / "src"), str(GUI)]
+
+    import runpy
+    import essay_coach_poc_gui as gui
+    from kids_writing_agent.mock_llm import install_mock
+
+    agents = [gui.profile_manager, gui.conversation_guide, gui.outline_planner,
+              gui.reviewer, gui.improvement_coach, gui.progress_analyst]
+    install_mock(agents, latency=(args.latency, args.per_token))
+    for agent in agents:
+        agent.verbose = False
+    runpy.run_path(str(GUI / "ui.py"), run_name="__main__")      # blocks in demo.launch()
+
+
+def start_server(args, log) -> subprocess.Popen:
+    env = dict(os.environ, GRADIO_SERVER_PORT=str(args.port), WRITEPAL_FLOW=args.flow,
+               GRADIO_ANALYTICS_ENABLED="False")
+    if args.server_concurrency:
+        env["WRITEPAL_CONCURRENCY"] = str(args.server_concurrency)
+    cmd = [sys.executable, str(Path(__file__).resolve()), "--serve", "--latency", str(args.latency),
+           "--per-token", str(args.per_token)]
+    return subprocess.Popen(cmd, cwd=GUI, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def server_failures(log_path: Path) -> list:
+    """Exception lines that follow each traceback in the server's output."""
+    lines = log_path.read_text(errors="replace").splitlines()
+    failures = []
+    for i, line in enumerate(lines):
+        if line.startswith("Traceback (most recent call last)"):
+            tail = next((l for l in lines[i + 1:] if l and not l.startswith((" ", "\t"))), line)
+            failures.append(tail.strip())
+    return failures
+
+
+def wait_ready(url: str, server: subprocess.Popen, timeout: float = 120) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"server exited with code {server.returncode} (see --server-log)")
+        try:
+            with urllib.request.urlopen(url, timeout=2):
+                return
+        except OSError:
+            time.sleep(0.5)
+    raise SystemExit(f"server not ready after {timeout:.0f}s")
+
+
+# ---------- process probe ----------
+class Probe:
+    """Samples the server's RSS and thread count from /proc while a step runs."""
+
+    def __init__(self, pid: int, every: float = 0.2):
+        self.pid, self.every = pid, every
+        self.peak_rss = self.peak_threads = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def sample(self) -> dict:
+        status = {}
+        with open(f"/proc/{self.pid}/status") as fp:
+            for line in fp:
+                key, _, value = line.partition(":")
+                status[key] = value.split()[0] if value.split() else ""
+        return {"rss": int(status.get("VmRSS", 0)) * 1024, "threads": int(status.get("Threads", 0))}
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                now = self.sample()
+            except OSError:
+                return
+            self.peak_rss = max(self.peak_rss, now["rss"])
+            self.peak_threads = max(self.peak_threads, now["threads"])
+            self._stop.wait(self.every)
+
+
+# ---------- client side ----------
+def run_student(url: str, latencies: list, errors: list, finished: list) -> None:
+    from gradio_client import Client
+
+    try:
+        client = Client(url, verbose=False)
+        for turn, message in enumerate(STUDENT, 1):
+            started = time.perf_counter()
+            reply = str(client.predict(message, api_name="/chat"))
+            latencies.append(time.perf_counter() - started)
+            if DONE_TEXT in reply:
+                break
+        if turn < len(STUDENT) or DONE_TEXT not in reply:
+            errors.append(f"session ended after {turn} of {len(STUDENT)} turns")
+        elif PRAISE_TEXT not in reply:
+            errors.append("session ended without the closing praise")
+        else:
+            finished.append(1)
+    except Exception as exc:                 # a failed student is a data point, not a crash
+        errors.append(f"{type(exc).__name__}: {exc}")
+
+
+def pct(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def ramp_step(url: str, students: int, probe_pid: int) -> dict:
+    latencies, errors, finished = [], [], []
+    threads = [threading.Thread(target=run_student, args=(url, latencies, errors, finished))
+               for _ in range(students)]
+    with Probe(probe_pid) as probe:
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - started
+    return {
+        "students": students, "finished": len(finished), "errors": len(errors),
+        "turns": len(latencies), "wall_s": wall,
+        "turns_per_s": len(latencies) / wall if wall else 0.0,
+        "latency_ms": {"p50": pct(latencies, 0.5) * 1000, "p95": pct(latencies, 0.95) * 1000,
+                       "p99": pct(latencies, 0.99) * 1000,
+                       "mean": statistics.fmean(latencies) * 1000 if latencies else 0.0},
+        "peak_rss_mb": probe.peak_rss / 2**20, "peak_threads": probe.peak_threads,
+        "first_errors": errors[:3],
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ramp", default="1,5,10,25", help="concurrent students per step")
+    parser.add_argument("--flow", choices=["sync", "async"], default="async")
+    parser.add_argument("--latency", type=float, default=0.2,
+                        help="simulated seconds per model call")
+    parser.add_argument("--per-token", type=float, default=0.0,
+                        help="extra simulated seconds per completion token")
+    parser.add_argument("--port", type=int, default=7861)
+    parser.add_argument("--server-concurrency", type=int,
+                        help="Gradio concurrency limit for the chat event (default: max sessions)")
+    parser.add_argument("--server-log", type=Path,
+                        help="keep the server's output here (default: a temp file)")
+    parser.add_argument("--json", type=Path, help="write the report here")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.serve:
+        return serve(args)
+
+    url = f"http://127.0.0.1:{args.port}/"
+    log_path = args.server_log or Path(tempfile.mkstemp(prefix="bench_load_", suffix=".log")[1])
+    log = open(log_path, "w")
+    server = start_server(args, log)
+    steps = []
+    try:
+        started = time.perf_counter()
+        wait_ready(url, server)
+        boot = time.perf_counter() - started
+        idle = Probe(server.pid).sample()
+        for students in (int(n) for n in args.ramp.split(",")):
+            print(f"🚸 {students} student(s)…", flush=True)
+            steps.append(ramp_step(url, students, server.pid))
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        log.close()
+
+    print(f"\n📊 {args.flow} flow, model latency {args.latency}s + {args.per_token}s/token, "
+          f"boot {boot:.1f}s, idle RSS {idle['rss'] / 2**20:.0f} MB\n")
+    print(f"{'students':>8}{'done':>6}{'turns/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'errors':>8}{'threads':>9}{'RSS MB':>8}")
+    for s in steps:
+        lat = s["latency_ms"]
+        print(f"{s['students']:>8}{s['finished']:>6}{s['turns_per_s']:>9.2f}{lat['p50']:>9.0f}"
+              f"{lat['p95']:>9.0f}{lat['p99']:>9.0f}{s['errors']:>8}{s['peak_threads']:>9}"
+              f"{s['peak_rss_mb']:>8.0f}")
+    failures = server_failures(log_path)
+
+    if args.json:
+        report = {"revision": git_revision(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                  "config": {k: str(v) if isinstance(v, Path) else v
+                             for k, v in vars(args).items() if k != "serve"},
+                  "boot_s": boot, "idle": idle, "steps": steps, "server_failures": failures}
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"\n📝 report → {args.json}")
+
+    errors = sum(s["errors"] for s in steps)
+    if failures or errors:
+        print(f"\n❌ {errors} student error(s), {len(failures)} server traceback(s) "
+              f"(log: {log_path})", file=sys.stderr)
+        for failure in (failures + [e for s in steps for e in s["first_errors"]])[:5]:
+            print(f"   {failure}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""
+Outline latency at classroom scale with the similarity outline cache, offline.
+
+Simulates classes of students at one grade writing on a few assigned topics.
+Every student picks ideas from a shared pool and words some of them their own
+way (pet names, small rewrites, order). Each outline is either a cache hit
+(measured lookup time) or a planner call (`--latency` seconds, not slept) that
+is then stored. Reports hit rate, evictions and outline latency percentiles
+against a no-cache baseline.
+
+    python benchmarks/bench_outline_cache.py --classes 8 --students 25 --latency 4
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from kids_writing_agent.outline_cache import SIMILARITY, OutlineCache     # noqa: E402
+
+TOPICS = {
+    "My Favorite Animal": [
+        ["dogs are loyal", "dogs are loyal friends", "my dog is loyal"],
+        ["playing fetch", "we play fetch", "playing fetch in the park"],
+        ["he protects us", "dogs keep us safe", "he protects our house"],
+        ["he cheers me up", "dogs make me happy", "he cheers me up when I am sad"],
+    ],
+    "The Best Day Ever": [
+        ["going to the beach", "a day at the beach", "we went to the beach"],
+        ["building a sandcastle", "we built a sandcastle", "a huge sandcastle"],
+        ["eating ice cream", "ice cream after swimming", "we ate ice cream"],
+        ["watching the sunset", "the sunset was pretty", "a pink sunset"],
+    ],
+    "Why Recess Matters": [
+        ["kids need to move", "running around", "exercise at recess"],
+        ["making friends", "playing with friends", "we make new friends"],
+        ["resting our brains", "a break from class", "our brains need a rest"],
+        ["learning to share", "taking turns", "sharing the swings"],
+    ],
+}
+NAMES = ["Max", "Buddy", "Luna", "Coco", "Rex", "Bella"]
+OUTLINE = ("1. Introduction: tell the reader about {topic} (hint: start with a question)\n"
+           "{body}\n{last}. Conclusion: say your main idea again (hint: end with a feeling)")
+
+
+def student_ideas(rng: random.Random, pool, paras: int):
+    picks = rng.sample(pool, paras)
+    ideas = [rng.choice(variants) for variants in picks]
+    if rng.random() < 0.3:
+        ideas[0] = f"my pet {rng.choice(NAMES)} " + ideas[0]
+    if rng.random() < 0.3:
+        rng.shuffle(ideas)
+    return ideas
+
+
+def fake_outline(topic: str, ideas) -> str:
+    body = "\n".join(f"{i + 2}. Body: {idea} (hint: give one example)"
+                     for i, idea in enumerate(ideas))
+    return OUTLINE.format(topic=topic, body=body, last=len(ideas) + 2)
+
+
+def pct(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--classes", type=int, default=8)
+    parser.add_argument("--students", type=int, default=25, help="per class")
+    parser.add_argument("--grade", type=int, default=3)
+    parser.add_argument("--paras", type=int, default=3, help="ideas per student")
+    parser.add_argument("--latency", type=float, default=4.0, help="planner seconds per miss")
+    parser.add_argument("--threshold", type=float, default=SIMILARITY)
+    parser.add_argument("--max-entries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--json", type=Path, help="write the report here")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    cache = OutlineCache(threshold=args.threshold, max_entries=args.max_entries)
+    latencies, lookups = [], []
+    for _ in range(args.classes):
+        topic = rng.choice(list(TOPICS))
+        for _ in range(args.students):
+            ideas = student_ideas(rng, TOPICS[topic], args.paras)
+            started = time.perf_counter()
+            outline = cache.lookup(topic, args.grade, ideas)
+            took = time.perf_counter() - started
+            lookups.append(took)
+            if outline is None:
+                cache.store(topic, args.grade, ideas, fake_outline(topic, ideas))
+                took += args.latency
+            latencies.append(took)
+
+    stats = cache.stats()
+    n = len(latencies)
+    report = {
+        "students": n, "threshold": args.threshold, "cache": stats,
+        "outline_s": {"p50": pct(latencies, 0.5), "p95": pct(latencies, 0.95),
+                      "mean": sum(latencies) / n},
+        "baseline_mean_s": args.latency,
+        "lookup_ms": {"p50": pct(lookups, 0.5) * 1000, "p99": pct(lookups, 0.99) * 1000},
+    }
+
+    print(f"\n📊 {args.classes} class(es) × {args.students} students, grade {args.grade}, "
+          f"threshold {args.threshold}\n")
+    print(f"hit rate   {stats['hit_rate']:.0%}  ({stats['hits']} hits, {stats['misses']} planner "
+          f"calls, {stats['entries']} entries, {stats['evictions']} evictions, "
+          f"{stats['rejected']} too personal to share)")
+    print(f"outline    mean {report['outline_s']['mean']:.2f}s  p50 {report['outline_s']['p50']:.2f}s"
+          f"  p95 {report['outline_s']['p95']:.2f}s   (no cache: {args.latency:.2f}s each)")
+    print(f"lookup     p50 {report['lookup_ms']['p50']:.2f}ms  p99 {report['lookup_ms']['p99']:.2f}ms")
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"\n📝 report → {args.json}")
+
+
+if __name__ == "__main__":
+    main()
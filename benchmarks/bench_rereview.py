@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""
+Reviewer tokens across a revise loop: full re-review vs paragraph-level
+incremental re-review, fully offline (no agents, no model).
+
+A scripted student revises a five-paragraph essay one paragraph per round, the
+way beginners usually do. Each round builds the reviewer prompt both ways and
+reports estimated prompt + reply tokens; `--rate` turns them into an
+estimated reviewer latency.
+
+    python benchmarks/bench_rereview.py --rounds 6 --rate 0.02
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from kids_writing_agent.memory import estimate_tokens                       # noqa: E402
+from kids_writing_agent.rereview import plan_review                          # noqa: E402
+from kids_writing_agent.rubric import pre_score                              # noqa: E402
+
+GUIDE = {"paras": 4, "min_words": 150, "max_words": 300}
+ESSAY = [
+    "My favorite animal is my dog Max. He is a golden retriever with soft fur the color "
+    "of honey, and he is the most loyal friend I have ever had. Everyone in my family "
+    "says he is part of the family, and I agree with them completely.",
+    "Max waits for me at the door every day after school. He wags his tail so hard that "
+    "his whole body shakes, and he follows me to the kitchen for a snack. If I am late, "
+    "my mom says he sits by the window and watches the street until he sees me coming.",
+    "We play fetch in the park on Saturdays. He runs so fast that he slides on the grass, "
+    "and he always brings the ball back even when it lands in the pond. Afterwards he is "
+    "muddy and tired, so we give him a bath and he shakes water all over the bathroom.",
+    "When I am sad he sits next to me and puts his head on my knee. Last month I lost my "
+    "soccer game and cried in my room, and Max scratched at the door until I let him in. "
+    "I felt better right away because he never leaves until I smile again.",
+    "In conclusion, Max is the best animal because he is loyal, fun and kind. He makes "
+    "every day better for our whole family. I love him very much and I hope he lives for "
+    "a long, long time so we can have many more adventures together.",
+]
+HEADER = ("Evaluate the draft for a grade-5 writer Topic: My Favorite Animal\n"
+          "Expected length: 150-300 words.\n"
+          "Score for grammar, clarity, structure, and topic compliance."
+          "Score 0-100 and return JSON {'score':int,'passed':bool,'issues':[]}.\n\n")
+
+
+def prompt_for(draft: str, plan=None) -> str:
+    local = pre_score(draft, GUIDE, ["comma splices"], grade=5).as_prompt() + "\n\n"
+    if plan is None:
+        return HEADER + local + draft
+    return HEADER + local + (plan.render() if plan.full else plan.as_prompt())
+
+
+def reply_for(shown, open_paragraphs, round_no: int) -> dict:
+    """A plausible review: one issue per shown paragraph the student has not revised yet."""
+    issues = [f"P{i + 1}: Add one more specific detail to this paragraph."
+              for i in shown if i in open_paragraphs]
+    return {"score": 70 + 4 * round_no, "passed": not open_paragraphs, "issues": issues}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=6, help="drafts, first one included")
+    parser.add_argument("--rate", type=float, default=0.0,
+                        help="estimated seconds per token (prompt and reply alike)")
+    parser.add_argument("--json", type=Path, help="write the report here")
+    args = parser.parse_args(argv)
+
+    paragraphs = list(ESSAY)
+    open_paragraphs = set(range(len(paragraphs)))
+    memo = None
+    rows = []
+    for round_no in range(args.rounds):
+        if round_no:                    # the student fixes one paragraph per round
+            i = (round_no - 1) % len(paragraphs)
+            paragraphs[i] += " I added a detail here."
+            open_paragraphs.discard(i)
+        draft = "\n\n".join(paragraphs)
+        plan = plan_review(draft, memo)
+        full_reply = reply_for(range(len(paragraphs)), open_paragraphs, round_no)
+        reply = reply_for(plan.changed, open_paragraphs, round_no)
+        full = estimate_tokens(prompt_for(draft)) + estimate_tokens(json.dumps(full_reply))
+        incremental = 0 if plan.unchanged else (estimate_tokens(prompt_for(draft, plan))
+                                                + estimate_tokens(json.dumps(reply)))
+        _, memo = plan.merge(None if plan.unchanged else reply)
+        rows.append({"round": round_no + 1, "scored": len(plan.changed),
+                     "paragraphs": len(plan.paragraphs), "full": full,
+                     "incremental": incremental})
+
+    print(f"\n📊 reviewer tokens (prompt + reply) over {args.rounds} draft(s)\n")
+    print(f"{'draft':<7}{'scored':>8}{'full':>8}{'incr.':>8}{'saved':>8}")
+    for r in rows:
+        saved = 1 - r["incremental"] / r["full"] if r["full"] else 0
+        print(f"{r['round']:<7}{r['scored']:>5}/{r['paragraphs']:<2}{r['full']:>8}"
+              f"{r['incremental']:>8}{saved:>8.0%}")
+    later = rows[2:]
+    if later:
+        full = sum(r["full"] for r in later)
+        incr = sum(r["incremental"] for r in later)
+        print(f"\ndraft 3+: {full} → {incr} reviewer tokens ({1 - incr / full:.0%} fewer)")
+        if args.rate:
+            print(f"estimated reviewer time: {full * args.rate:.2f}s → {incr * args.rate:.2f}s")
+
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2))
+        print(f"\n📝 report → {args.json}")
+
+
+if __name__ == "__main__":
+    main()
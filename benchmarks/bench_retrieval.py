@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""
+Retrieval latency at classroom-library scale: build a hashed-vector index of
+synthetic essay chunks, reopen it from disk, and time top-k queries.
+
+Reports embedding/append throughput, reopen time, and p50/p95/p99 query
+latency with and without the grade filter the flows use.
+
+    python benchmarks/bench_retrieval.py --chunks 100000 --queries 300 --json bench_retrieval.json
+"""
+import argparse
+import json
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from kids_writing_agent.retrieval import DIM, VectorIndex                  # noqa: E402
+
+TOPICS = ["favorite animal", "best day", "school garden", "summer vacation", "my hero",
+          "technology and friends", "a rainy day", "the ocean", "my family", "space travel"]
+WORDS = ("dog cat otter garden beans science lake fish grandpa phone friend screen "
+         "rain puddle boots ocean wave shell rocket planet star moon family sister "
+         "brother kitchen cookie park soccer team coach book library teacher recess "
+         "playful smart loyal brave quiet loud shiny soft muddy tired proud happy").split()
+
+
+def synthetic_chunk(rng: random.Random) -> str:
+    topic = rng.choice(TOPICS)
+    sentences = [f"My essay is about {topic}."]
+    for _ in range(rng.randint(3, 6)):
+        sentences.append(" ".join(rng.choices(WORDS, k=rng.randint(6, 12))).capitalize() + ".")
+    return " ".join(sentences)
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]   # noqa: E731
+    return {"p50": pick(0.5) * 1000, "p95": pick(0.95) * 1000, "p99": pick(0.99) * 1000,
+            "mean": statistics.fmean(samples) * 1000}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--dim", type=int, default=DIM)
+    parser.add_argument("--batch", type=int, default=5000, help="chunks per add() call")
+    parser.add_argument("--dir", type=Path, help="index directory (default: a temp dir)")
+    parser.add_argument("--json", type=Path, help="write the report here")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(7)
+    path = args.dir or Path(tempfile.mkdtemp(prefix="writepal-retrieval-"))
+    try:
+        index = VectorIndex(path, dim=args.dim)
+        started = time.perf_counter()
+        for done in range(0, args.chunks, args.batch):
+            n = min(args.batch, args.chunks - done)
+            grade = 1 + (done // args.batch) % 6
+            index.add([synthetic_chunk(rng) for _ in range(n)], source=f"synthetic/{done}",
+                      kind="exemplar", grade=grade)
+        build = time.perf_counter() - started
+        index.close()
+
+        started = time.perf_counter()
+        index = VectorIndex(path, dim=args.dim)
+        reopen = time.perf_counter() - started
+
+        queries = [f"{rng.choice(TOPICS)} {' '.join(rng.choices(WORDS, k=4))}"
+                   for _ in range(args.queries)]
+        index.search(queries[0], k=args.k, grade=3)        # builds the grade mask once
+        plain, filtered = [], []
+        for q in queries:
+            t = time.perf_counter()
+            index.search(q, k=args.k)
+            plain.append(time.perf_counter() - t)
+            t = time.perf_counter()
+            index.search(q, k=args.k, kind="exemplar", grade=3)
+            filtered.append(time.perf_counter() - t)
+        size = sum(f.stat().st_size for f in path.iterdir())
+        index.close()
+    finally:
+        if args.dir is None:
+            shutil.rmtree(path, ignore_errors=True)
+
+    report = {"chunks": args.chunks, "dim": args.dim, "k": args.k,
+              "build_s": build, "chunks_per_s": args.chunks / build, "reopen_s": reopen,
+              "disk_mb": size / 2**20,
+              "query_ms": percentiles(plain), "filtered_query_ms": percentiles(filtered)}
+
+    print(f"\n📊 {args.chunks} chunks × {args.dim} dims, top-{args.k}, {args.queries} queries\n")
+    print(f"build   {build:8.2f}s  ({report['chunks_per_s']:.0f} chunks/s)")
+    print(f"reopen  {reopen * 1000:8.1f}ms   on disk {report['disk_mb']:.1f} MB")
+    print(f"\n{'query':<10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, row in (("plain", report["query_ms"]), ("grade", report["filtered_query_ms"])):
+        print(f"{name:<10}{row['p50']:>9.2f}{row['p95']:>9.2f}{row['p99']:>9.2f}")
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"\n📝 report → {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+"""
+Cold-start benchmark: how long a fresh interpreter takes to import the package
+entry points, and where that time goes.
+
+Each target is imported in a new `python -X importtime` process (so nothing is
+warm but the OS page cache); the import log is folded per top-level package to
+show which dependencies dominate. The last target also builds one agent, to
+price the first session step separately from the import.
+
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --json bench_startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+TARGETS = {
+    "package": "import kids_writing_agent",
+    "agents": "import kids_writing_agent.agents",
+    "crew": "import kids_writing_agent.crew",
+    "main": "import kids_writing_agent.main",
+    "first agent": ("import time; t = time.perf_counter();"
+                    " from kids_writing_agent import agents; agents.reviewer;"
+                    " print(f'built {time.perf_counter() - t:.6f}')"),
+}
+
+
+def parse_importtime(stderr: str):
+    """{module: self µs} and the same summed per top-level package."""
+    modules = {}
+    packages = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, _cumulative, name = line[len("import time:"):].split("|", 2)
+        module = name.strip()
+        modules[module] = int(self_us)
+        packages[module.split(".")[0]] += int(self_us)
+    return modules, dict(packages)
+
+
+def run_once(code: str) -> dict:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(
+        [str(ROOT / "src"), os.environ.get("PYTHONPATH", "")]).rstrip(os.pathsep)}
+    env.setdefault("OPENAI_API_KEY", "offline-benchmark")
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if proc.returncode:
+        tail = [l for l in proc.stderr.splitlines() if not l.startswith("import time:")]
+        raise RuntimeError(f"{code!r} failed:\n" + "\n".join(tail[-10:]))
+    modules, packages = parse_importtime(proc.stderr)
+    built = next((float(l.split()[1]) for l in proc.stdout.splitlines()
+                  if l.startswith("built ")), None)
+    return {"wall": wall, "modules": len(modules),
+            "import": sum(modules.values()) / 1e6,
+            "packages": packages, "built": built}
+
+
+def summarize(runs: list) -> dict:
+    packages = defaultdict(list)
+    for r in runs:
+        for name, self_us in r["packages"].items():
+            packages[name].append(self_us / 1e6)
+    out = {
+        "runs": len(runs),
+        "wall_median": statistics.median(r["wall"] for r in runs),
+        "wall_min": min(r["wall"] for r in runs),
+        "import_median": statistics.median(r["import"] for r in runs),
+        "modules": runs[-1]["modules"],
+        "packages": {name: statistics.median(v) for name, v in packages.items()},
+    }
+    if runs[0]["built"] is not None:
+        out["first_agent_median"] = statistics.median(r["built"] for r in runs)
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12, help="packages listed per target")
+    parser.add_argument("--only", choices=list(TARGETS), action="append",
+                        help="benchmark just these targets")
+    parser.add_argument("--json", type=Path, help="write the report here")
+    args = parser.parse_args(argv)
+
+    report = {}
+    for name in args.only or TARGETS:
+        report[name] = summarize([run_once(TARGETS[name]) for _ in range(args.runs)])
+
+    print(f"\n🚀 cold start, median of {args.runs} fresh interpreter(s)\n")
+    print(f"{'target':<14}{'wall s':>9}{'min s':>9}{'import s':>10}{'modules':>9}{'agent s':>9}")
+    for name, r in report.items():
+        agent = f"{r['first_agent_median']:>9.3f}" if "first_agent_median" in r else f"{'':>9}"
+        print(f"{name:<14}{r['wall_median']:>9.3f}{r['wall_min']:>9.3f}"
+              f"{r['import_median']:>10.3f}{r['modules']:>9}{agent}")
+
+    for name, r in report.items():
+        print(f"\n{name}: import time by top-level package")
+        ranked = sorted(r["packages"].items(), key=lambda kv: -kv[1])
+        for pkg, secs in ranked[:args.top]:
+            share = 100 * secs / r["import_median"] if r["import_median"] else 0
+            print(f"  {pkg:<28}{secs:>8.3f}s{share:>6.1f}%")
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"\n📝 report → {args.json}")
+
+
+if __name__ == "__main__":
+    main()
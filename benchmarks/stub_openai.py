@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+Minimal OpenAI-compatible chat-completions server for offline benchmarks.
+
+Answers POST /v1/chat/completions with a fixed reply and realistic `usage`,
+keeps HTTP/1.1 connections alive, and can add a one-off delay per new
+connection (`--handshake-ms`, standing in for TCP + TLS setup over a real
+network) and per request (`--latency-ms`). Point any client at it:
+
+    python benchmarks/stub_openai.py --port 8099 --handshake-ms 40
+    OPENAI_API_BASE=http://127.0.0.1:8099/v1 OPENAI_API_KEY=stub python playground/gui_v1/ui.py
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = "Great start! Add one more example to your second paragraph."
+
+
+def make_handler(handshake: float, latency: float, counters: dict):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"          # keep-alive
+
+        def setup(self):
+            super().setup()
+            counters["connections"] += 1
+            if handshake:
+                time.sleep(handshake)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)) or 0)
+            counters["requests"] += 1
+            if latency:
+                time.sleep(latency)
+            try:
+                messages = json.loads(body or b"{}").get("messages", [])
+            except ValueError:
+                messages = []
+            prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+            payload = json.dumps({
+                "id": "chatcmpl-stub", "object": "chat.completion", "created": int(time.time()),
+                "model": "stub",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": REPLY}}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(REPLY) // 4,
+                          "total_tokens": prompt_tokens + len(REPLY) // 4},
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(port: int = 0, handshake_ms: float = 0.0, latency_ms: float = 0.0):
+    """Start the stub in a daemon thread; returns (server, counters)."""
+    counters = {"connections": 0, "requests": 0}
+    server = ThreadingHTTPServer(("127.0.0.1", port),
+                                 make_handler(handshake_ms / 1000, latency_ms / 1000, counters))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counters
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--handshake-ms", type=float, default=0.0)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args(argv)
+    server, counters = serve(args.port, args.handshake_ms, args.latency_ms)
+    print(f"stub OpenAI server on http://127.0.0.1:{server.server_port}/v1  (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"  {counters['requests']} request(s) over {counters['connections']} connection(s)")
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
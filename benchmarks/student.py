@@ -0,0 +1,22 @@
+"""Scripted grade-3 student shared by the offline benchmarks."""
+
+DRAFT = (
+    "My favorite animal is my dog Max. He is a golden retriever and he is very "
+    "loyal. He waits for me at the door every day after school and wags his tail.\n\n"
+    "Max is also fun to play with. We play fetch in the park and he runs so fast "
+    "that he slides on the grass. When I am sad he sits next to me and I feel "
+    "better. He even barks when a stranger comes close to our house."
+)
+REVISION = DRAFT + (
+    "\n\nIn conclusion, Max is the best animal because he is loyal, fun and keeps "
+    "our family safe. I love him very much."
+)
+# one reply per time the flow waits for the student
+STUDENT = [
+    "ok",                                                   # topic
+    "dogs\nmy dog Max\nplaying fetch\nhe protects us",      # brainstorm seeds
+    "He is always happy to see me.",
+    "He cheered me up when I lost my soccer game.",
+    DRAFT,
+    REVISION,
+]
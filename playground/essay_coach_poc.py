@@ -5,24 +5,18 @@ Works with crewai >= 0.46.  Requires an OPENAI_API_KEY.
 """
 
 from __future__ import annotations
-import json, re, textwrap
+import json, textwrap
 from typing import Dict, List, Any
 
-from crewai.agent import Agent
 from crewai.flow.flow import Flow, start, listen, router
 from crewai.tools import BaseTool
 
-# ------------------------------------------------------------------
-# 0-bis.  Grade-to-writing expectations (tweak as needed)
-# ------------------------------------------------------------------
-GRADE_GUIDE = {
-    1: {"paras": 2, "min_words": 40,  "max_words": 700},
-    2: {"paras": 3, "min_words": 60,  "max_words": 1000},
-    3: {"paras": 3, "min_words": 80,  "max_words": 1500},   # Reading Rockets, Reddit teacher
-    4: {"paras": 4, "min_words": 120, "max_words": 2000},
-    5: {"paras": 4, "min_words": 150, "max_words": 3000},
-    6: {"paras": 5, "min_words": 200, "max_words": 4000},
-}
+from kids_writing_agent.cache import CachedAgent
+from kids_writing_agent.memory import ConversationMemory
+from kids_writing_agent.profile_store import resolve_profile
+from kids_writing_agent.state import GRADE_GUIDE, Review, StudentProfile
+from kids_writing_agent.structured import parse_structured, correct_with
+from kids_writing_agent.rubric import pre_score
 
 # ──────────────────────────────────────────────────────
 # 1.  Custom tool that actually talks to the child
@@ -41,7 +35,7 @@ class AskStudentTool(BaseTool):
 # ──────────────────────────────────────────────────────
 # 2.  All agents from your YAML (prompts kept verbatim)
 # ──────────────────────────────────────────────────────
-profile_manager = Agent(
+profile_manager = CachedAgent(
     role="Profile Manager",
     goal='Provide user profile data for downstream tasks. When the user asks for AGE and GRADE, reply with exact JSON: {"age":<int>,"grade":<int>} and nothing else.',
     backstory=textwrap.dedent("""
@@ -61,7 +55,7 @@ profile_manager = Agent(
 )
 
 
-conversation_guide = Agent(
+conversation_guide = CachedAgent(
     role="Conversation Guide",
     goal="Help the student craft an essay by guiding the conversation and gathering information",
     backstory="""
@@ -73,34 +67,47 @@ conversation_guide = Agent(
     verbose=False,
 )
 
-outline_planner = Agent(
+outline_planner = CachedAgent(
     role="Outline Planner",
     goal="Turn early ideas into a usable outline + hints",
     backstory="Veteran writing tutor who organises information clearly.",
     verbose=False,
+    kickoff_cache=True,
 )
 
-reviewer = Agent(
+reviewer = CachedAgent(
     role="Writing Reviewer",
     goal="Score the draft for grammar, structure, and requirement fulfilment",
     backstory="Exacting English teacher with a fair but firm rubric.",
     verbose=False,
+    kickoff_cache=True,
 )
 
-improvement_coach = Agent(
+improvement_coach = CachedAgent(
     role="Improvement Coach",
     goal="Give actionable, motivating feedback when the draft misses the mark",
     backstory="Encouraging but precise.",
     verbose=False,
+    kickoff_cache=True,
 )
 
-progress_analyst = Agent(
+progress_analyst = CachedAgent(
     role="Progress Analyst",
     goal="Spot and celebrate concrete improvements over time",
     backstory="Compares current work to the student's history to show growth.",
     verbose=False,
+    kickoff_cache=True,
 )
 
+def profile_from_agent(user_id: str) -> dict:
+    """LLM fallback, only used when the profile store has no entry."""
+    full_profile_output = profile_manager.kickoff(
+        f'Return the COMPLETE JSON profile for "{user_id}". '
+        'No markdown, no commentary.'
+    )
+    return parse_structured(full_profile_output.raw, StudentProfile,
+                            fix=correct_with(profile_manager, StudentProfile)).model_dump()
+
 # ──────────────────────────────────────────────────────
 # 3.  Flow implementation  (dict state keeps it simple)
 # ──────────────────────────────────────────────────────
@@ -112,29 +119,17 @@ class EssayCoachFlow(Flow[dict]):
         topic = input("📝 Topic?  ").strip()
         req   = input("📋 Special requirements? (press Enter for none)  ").strip()
 
-        # --- ask ONLY for age & grade ---
-        age_grade_output = profile_manager.kickoff(
-            'Give only the age and grade for "demo_user" '
-            'in JSON: {"age":<int>,"grade":<int>}'
-        )
-        age_grade = json.loads(age_grade_output.raw.strip())
-        print(f"\n👤 Profile: {age_grade}")
-        grade = int(age_grade["grade"])
-        guide = GRADE_GUIDE.get(grade, GRADE_GUIDE[3])
-
-        # --- if you still want the full profile, do it AFTER you know grade ---
-        full_profile_output = profile_manager.kickoff(
-            'Return the COMPLETE JSON profile for "demo_user". '
-            'No markdown, no commentary.'
-        )
-        full_profile = json.loads(full_profile_output.raw.strip())
+        # --- profile comes straight from the indexed store (no model call) ---
+        profile, guide = resolve_profile("demo_user", GRADE_GUIDE,
+                                         fallback=profile_from_agent)
+        print(f"\n👤 Profile: age {profile.age}, grade {profile.grade}")
 
         return {
             "topic": topic,
             "req": req,
-            "profile": full_profile,
-            "grade": grade,
-            "age": int(age_grade["age"]),
+            "profile": profile.model_dump(),
+            "grade": profile.grade,
+            "age": profile.age,
             "guide": guide,
         }
 
@@ -161,11 +156,9 @@ class EssayCoachFlow(Flow[dict]):
             if line:
                 raw_lines.append(line)
 
-        # Store the student-owned seeds
-        qa_history: list[dict[str, str]] = [{
-            "q": "Your free-brainstorm list",
-            "a": "\n".join(raw_lines)
-        }]
+        # Store the student-owned seeds; older Q-A is summarised to stay in budget
+        memory = ConversationMemory(seeds="\n".join(raw_lines))
+        profile = {k: data["profile"].get(k) for k in ("skill_level", "weak_areas")}
 
         # --------------- Stage 2 : guided probing loop -----------------
         while True:
@@ -177,9 +170,8 @@ class EssayCoachFlow(Flow[dict]):
                 "If you suggest a new angle, prefix with: "
                 "'Some people also ___. Do you feel that way?'\n"
                 "Never claim the student 'mentioned' something they didn't.\n\n"
-                f"Student profile:\n{json.dumps(data['profile'])}\n\n"
-                "Conversation so far:\n" +
-                "\n".join(f"Q: {p['q']}\nA: {p['a']}" for p in qa_history) +
+                f"Student profile:\n{json.dumps(profile)}\n\n"
+                "Conversation so far:\n" + memory.render() +
                 "\n\nAsk ONE open follow-up question that clarifies or deepens.\n"
                 f"When you have at least {data['guide']['paras']} RICH body ideas, "
                 "answer EXACTLY like:\n"
@@ -187,6 +179,8 @@ class EssayCoachFlow(Flow[dict]):
                 "Ideas must come from, or be confirmed by, the student's words."
             )
 
+            tokens = memory.record_prompt(guide_prompt)
+            print(f"🧮 brainstorm turn {len(memory.prompt_sizes)}: ~{tokens} prompt tokens")
             agent_reply = conversation_guide.kickoff(guide_prompt).raw.strip()
 
             # If the agent says it's done, parse bullet list and break.
@@ -197,19 +191,20 @@ class EssayCoachFlow(Flow[dict]):
                     if line.strip()
                 ]
                 data["ideas"] = bullets
+                data["brainstorm_prompt_tokens"] = memory.prompt_sizes
                 return data
 
             # Otherwise ask the student and store the answer.
             # Quick sanity check for false attributions:
             if ("you mentioned" in agent_reply.lower()
-                and not any("you mentioned" in qa["q"].lower() for qa in qa_history)
+                and not any("you mentioned" in qa["q"].lower() for qa in memory.turns)
                 and agent_reply.lower().split("you mentioned")[1].strip().split()[0]   # first word after phrase
-                    not in qa_history[-1]["a"].lower()):
+                    not in memory.last_answer.lower()):
                 agent_reply = ("I might be mistaken, but " + agent_reply)
 
             # Otherwise ask the student and store the answer.
             student_answer = ask_tool.run(question=agent_reply)
-            qa_history.append({"q": agent_reply, "a": student_answer})
+            memory.add(agent_reply, student_answer)
 
     # ---------- phase 3 : draft outline ----------
     @listen(brainstorm)
@@ -245,16 +240,24 @@ class EssayCoachFlow(Flow[dict]):
         topic = data["topic"]
         min_words  = data["guide"]["min_words"]
         max_words  = data["guide"]["max_words"]
+        # local rubric first: clear failures never reach the reviewer
+        findings = pre_score(data["draft"], data["guide"],
+                             data["profile"].get("weak_areas", []), data["grade"])
+        if findings.verdict is not None:
+            data["assessment"] = findings.verdict
+            return data
         review_prompt = (
             f"Evaluate the draft for a grade-{data['grade']} writer "
             f"Topic: {topic}\n"
             f"Expected length: {min_words}-{max_words} words.\n"
             f"Score for grammar, clarity, structure, and topic compliance."
             "Score 0-100 and return JSON {{'score':int,'passed':bool,'issues':[]}}.\n\n"
+            + findings.as_prompt() + "\n\n"
             + data["draft"]
         )
         review_json = reviewer.kickoff(review_prompt).raw
-        data["assessment"] = json.loads(re.search(r"\{.*\}", review_json, re.S).group())
+        data["assessment"] = parse_structured(
+            review_json, Review, fix=correct_with(reviewer, Review)).model_dump()
         return data
 
     # ---------- router ----------
@@ -282,7 +285,8 @@ class EssayCoachFlow(Flow[dict]):
     # ---------- phase 7 : celebrate ----------
     @listen("good")
     def praise(self, data):
-        last_score = data["profile"]["history"][-1]["score"]
+        history    = data["profile"]["history"]
+        last_score = history[-1]["score"] if history else 0
         new_score  = data["assessment"]["score"]
         delta      = new_score - last_score
         praise = progress_analyst.kickoff(
@@ -0,0 +1,232 @@
+"""
+essay_coach_async.py  –  asyncio-native variant of the GUI writing coach
+-----------------------------------------------------------------------
+Same phases and prompts as essay_coach_poc_gui.py, but every step is a
+coroutine: model calls go through `Agent.kickoff_async` and student answers
+through `AsyncUXChannel`, so a session waiting on a child's typing holds no
+OS thread.
+"""
+
+from __future__ import annotations
+import asyncio
+
+from crewai.flow.flow import Flow, start, listen, router, or_
+
+from kids_writing_agent.budget import BudgetedFlow, SessionBudget, limits_for
+from kids_writing_agent.checkpoint import FlowCheckpoint, checkpointed
+from kids_writing_agent.memory import ConversationMemory
+from kids_writing_agent.outline_cache import default_outline_cache
+from kids_writing_agent.prefetch import AsyncOutlinePrefetch
+from kids_writing_agent.profile_store import resolve_profile
+from kids_writing_agent.progress import default_progress
+from kids_writing_agent.rereview import plan_review
+from kids_writing_agent.state import GRADE_GUIDE, Review
+from kids_writing_agent.structured import aparse_structured, acorrect_with
+from kids_writing_agent.streaming import stream_to
+
+from helpers import AsyncUXChannel
+from essay_coach_poc_gui import (
+    profile_from_agent,
+    conversation_guide, outline_planner, reviewer,
+    improvement_coach, progress_analyst,
+    build_guide_prompt, build_shortlist_prompt, parse_done, hedge_false_attribution,
+    build_outline_prompt, pre_review, build_review_prompt,
+    build_coach_prompt, build_praise_prompt, record_progress,
+    WRAP_UP, ideas_without_guide, plain_outline, plain_feedback, plain_praise,
+)
+
+
+async def adraft_outline(data: dict) -> str:
+    """Async twin of `draft_outline`: cached outline first, planner call otherwise."""
+    cache = default_outline_cache()
+    outline = cache.lookup(data["topic"], data["grade"], data["ideas"])
+    if outline is None:
+        outline = (await outline_planner.kickoff_async(build_outline_prompt(data))).raw
+        cache.store(data["topic"], data["grade"], data["ideas"], outline)
+    return outline
+
+
+class AsyncEssayCoachFlow(BudgetedFlow, Flow[dict]):
+
+    def __init__(self, ux: AsyncUXChannel | None = None, user_id: str = "demo_user",
+                 checkpoint: FlowCheckpoint | None = None, **kwargs):
+        self.ux = ux or AsyncUXChannel()
+        self.user_id = user_id
+        self.checkpoint = checkpoint
+        self.budget = SessionBudget(on_change=self._expose_budget)
+        self.prefetch: AsyncOutlinePrefetch | None = None
+        super().__init__(**kwargs)
+
+    def _expose_budget(self, snapshot: dict) -> None:
+        self.state["budget"] = snapshot
+
+    def _speculate(self, data: dict, memory: ConversationMemory) -> None:
+        if self.budget.level != "ok":
+            return
+        if self.prefetch is None:
+            self.prefetch = AsyncOutlinePrefetch(min_ideas=data["guide"]["paras"])
+
+        prompt = build_shortlist_prompt(data, memory)
+
+        async def shortlist(ideas):
+            return parse_done((await conversation_guide.kickoff_async(prompt)).raw.strip())
+
+        self.prefetch.offer(ideas_without_guide(memory),
+                            lambda ideas: adraft_outline({**data, "ideas": ideas}),
+                            shortlist=shortlist)
+
+    # ---------- phase 1 : get topic & profile ----------
+    @start()
+    @checkpointed
+    async def intake(self) -> dict:
+        # The store lookup is local; only the LLM fallback would block.
+        profile, guide = await asyncio.to_thread(
+            resolve_profile, self.user_id, GRADE_GUIDE, fallback=profile_from_agent
+        )
+        print(f"\n👤 Profile: age {profile.age}, grade {profile.grade}")
+        self.budget.configure(limits_for(profile.grade))
+        progress = await asyncio.to_thread(
+            default_progress().summary, self.user_id, profile.model_dump()
+        )
+
+        self.ux.out.put_nowait("Hello! I'm WritePal, your K-12 essay coach. ")
+        topic = "Your Favorite Animal"
+        req   = ""
+        await self.ux.ask(f"Let's write for \n📝 Topic: {topic}\n")
+
+        return {
+            "topic": topic,
+            "req": req,
+            "profile": profile.model_dump(exclude={"history"}),
+            "progress": progress,
+            "grade": profile.grade,
+            "age": profile.age,
+            "guide": guide,
+        }
+
+    # ---------- phase 2 : collect ideas with Socratic chat ----------
+    @listen(intake)
+    @checkpointed
+    async def brainstorm(self, data):
+        raw_lines = await self.ux.ask("\n📝 Think for a minute about everything that comes to mind on the topic "
+            f'"{data["topic"]}".  Like: words, memories, reasons, feelings')
+
+        memory = ConversationMemory(seeds=raw_lines)
+        while True:
+            self._speculate(data, memory)
+            if not self.budget.allow("brainstorm"):
+                self.budget.note("brainstorm:done")
+                data["ideas"] = ideas_without_guide(memory)
+                data["brainstorm_prompt_tokens"] = memory.prompt_sizes
+                return data
+            memory.token_budget = self.budget.scaled(1200)
+            guide_prompt = build_guide_prompt(data, memory)
+            tokens = memory.record_prompt(guide_prompt)
+            print(f"🧮 brainstorm turn {len(memory.prompt_sizes)}: ~{tokens} prompt tokens")
+            self.budget.tick("brainstorm")
+            agent_reply = (await conversation_guide.kickoff_async(guide_prompt)).raw.strip()
+
+            bullets = parse_done(agent_reply)
+            if bullets is not None:
+                data["ideas"] = bullets
+                data["brainstorm_prompt_tokens"] = memory.prompt_sizes
+                return data
+
+            agent_reply = hedge_false_attribution(agent_reply, memory)
+            student_answer = (await self.ux.ask(f"\n👩‍🏫 {agent_reply}\n")).strip()
+            memory.add(agent_reply, student_answer)
+
+    # ---------- phase 3 : draft outline ----------
+    @listen(brainstorm)
+    @checkpointed
+    async def outline(self, data):
+        if not self.budget.allow(essential=True):
+            self.budget.note("outline:local")
+            if self.prefetch:
+                self.prefetch.cancel()
+            outline_text = plain_outline(data)
+        elif self.prefetch and (ready := await self.prefetch.take(data["ideas"])):
+            outline_text = ready
+        else:
+            with stream_to(self.ux.stream):
+                outline_text = await adraft_outline(data)
+        self.ux.out.put_nowait(f"\n📑 Outline\n {outline_text}")
+        data["outline"] = outline_text
+        return data
+
+    # ---------- phase 4 : student writes ----------
+    @listen(outline)
+    @checkpointed
+    async def collect_draft(self, data):
+        data["draft"] = await self.ux.ask("\nPlease write your essay now.")
+        return data
+
+    # ---------- phase 5 : review ----------
+    @listen(or_(collect_draft, "coach"))
+    @checkpointed
+    async def review(self, data):
+        findings = pre_review(data)
+        if findings.verdict is not None:
+            data["assessment"] = findings.verdict
+            return data
+        plan = plan_review(data["draft"], data.get("review_memo"))
+        if plan.unchanged:
+            data["assessment"], data["review_memo"] = plan.merge()
+            return data
+        if not self.budget.allow("review", essential=True):
+            self.budget.note("review:stopped")
+            data["assessment"] = {"score": None, "passed": False, "issues": findings.issues}
+            return data
+        self.budget.tick("review")
+        review_json = (await reviewer.kickoff_async(build_review_prompt(data, findings, plan))).raw
+        review = await aparse_structured(review_json, Review,
+                                         fix=acorrect_with(reviewer, Review))
+        data["assessment"], data["review_memo"] = plan.merge(review.model_dump())
+        return data
+
+    # ---------- router ----------
+    @router(review)
+    @checkpointed
+    async def branch(self, data):
+        if data["assessment"]["passed"]:
+            return "good"
+        return "revise" if self.budget.allow("review", essential=True) else "out_of_budget"
+
+    # ---------- phase 6 : improvements loop ----------
+    @listen("revise")
+    @checkpointed
+    async def coach(self, data):
+        if self.budget.allow():
+            with stream_to(self.ux.stream):
+                feedback = (await improvement_coach.kickoff_async(build_coach_prompt(data))).raw
+        else:
+            self.budget.note("coach:local")
+            feedback = plain_feedback(data)
+        self.ux.out.put_nowait(f"\n🔍 Feedback\n {feedback}")
+        data["revisions"] = data.get("revisions", 0) + 1
+        data["draft"] = await self.ux.ask("\nPlease revise your essay.")
+        return data
+
+    # ---------- phase 7 : celebrate ----------
+    @listen("good")
+    @checkpointed
+    async def praise(self, data):
+        data["progress"] = await asyncio.to_thread(record_progress, self.user_id, data)
+        if self.budget.allow():
+            praise = (await progress_analyst.kickoff_async(build_praise_prompt(data))).raw
+        else:
+            self.budget.note("praise:local")
+            praise = plain_praise(data)
+        self.ux.out.put_nowait(f"\n🎉  {praise}")
+        self.ux.done()
+        return "done"
+
+    # ---------- budget spent : end gracefully ----------
+    @listen("out_of_budget")
+    @checkpointed
+    async def wrap_up(self, data):
+        if data["assessment"]["issues"]:
+            self.ux.out.put_nowait(plain_feedback(data))
+        self.ux.out.put_nowait(WRAP_UP)
+        self.ux.done()
+        return "done"
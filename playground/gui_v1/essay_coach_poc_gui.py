@@ -5,33 +5,34 @@ Works with crewai >= 0.46.  Requires an OPENAI_API_KEY.
 """
 
 from __future__ import annotations
-import json, re, textwrap
+import hashlib, json, textwrap
 from typing import Dict, List, Any
 
-from crewai.agent import Agent
-from crewai.flow.flow import Flow, start, listen, router
+from crewai.flow.flow import Flow, start, listen, router, or_
 from crewai.tools import BaseTool
 
-from helpers import ux
+from kids_writing_agent.budget import BudgetedFlow, SessionBudget, limits_for
+from kids_writing_agent.cache import CachedAgent
+from kids_writing_agent.checkpoint import FlowCheckpoint, checkpointed
+from kids_writing_agent.memory import ConversationMemory
+from kids_writing_agent.outline_cache import default_outline_cache
+from kids_writing_agent.prefetch import OutlinePrefetch
+from kids_writing_agent.profile_store import resolve_profile
+from kids_writing_agent.progress import default_progress, progress_prompt
+from kids_writing_agent.state import GRADE_GUIDE, Review, StudentProfile
+from kids_writing_agent.structured import parse_structured, correct_with
+from kids_writing_agent.rereview import ReviewPlan, plan_review
+from kids_writing_agent.retrieval import default_retriever, grounding
+from kids_writing_agent.rubric import RubricFindings, pre_score
+from kids_writing_agent.streaming import streaming_llm, stream_to
 
-
-# ------------------------------------------------------------------
-# 0-bis.  Grade-to-writing expectations (tweak as needed)
-# ------------------------------------------------------------------
-GRADE_GUIDE = {
-    1: {"paras": 1, "min_words": 40,  "max_words": 70},
-    2: {"paras": 2, "min_words": 60,  "max_words": 100},
-    3: {"paras": 2, "min_words": 80,  "max_words": 150},  
-    4: {"paras": 3, "min_words": 120, "max_words": 200},
-    5: {"paras": 3, "min_words": 150, "max_words": 300},
-    6: {"paras": 4, "min_words": 200, "max_words": 400},
-}
+from helpers import UXChannel
 
 
 # ──────────────────────────────────────────────────────
 # 2.  All agents from your YAML (prompts kept verbatim)
 # ──────────────────────────────────────────────────────
-profile_manager = Agent(
+profile_manager = CachedAgent(
     role="Profile Manager",
     goal='Provide user profile data for downstream tasks. When the user asks for AGE and GRADE, reply with exact JSON: {"age":<int>,"grade":<int>} and nothing else.',
     backstory=textwrap.dedent("""
@@ -51,7 +52,7 @@ profile_manager = Agent(
 )
 
 
-conversation_guide = Agent(
+conversation_guide = CachedAgent(
     role="Conversation Guide",
     goal="Help the student craft an essay by guiding the conversation and gathering information",
     backstory="""
@@ -62,79 +63,266 @@ conversation_guide = Agent(
     verbose=True,
 )
 
-outline_planner = Agent(
+outline_planner = CachedAgent(
     role="Outline Planner",
     goal="Turn early ideas into a usable outline + hints",
     backstory="Veteran writing tutor who organises information clearly.",
     verbose=True,
+    llm=streaming_llm(),            # long replies are streamed to the chat
+    kickoff_cache=True,
 )
 
-reviewer = Agent(
+reviewer = CachedAgent(
     role="Writing Reviewer",
     goal="Score the draft for grammar, structure, and requirement fulfilment",
     backstory="Exacting English teacher with a fair but firm rubric.",
     verbose=True,
+    kickoff_cache=True,
 )
 
-improvement_coach = Agent(
+improvement_coach = CachedAgent(
     role="Improvement Coach",
     goal="Give actionable, motivating feedback when the draft misses the mark",
     backstory="Encouraging but precise.",
     verbose=True,
+    llm=streaming_llm(),            # long replies are streamed to the chat
+    kickoff_cache=True,
 )
 
-progress_analyst = Agent(
+progress_analyst = CachedAgent(
     role="Progress Analyst",
     goal="Spot and celebrate concrete improvements over time",
     backstory="Compares current work to the student's history to show growth.",
     verbose=True,
+    kickoff_cache=True,
 )
 
+def profile_from_agent(user_id: str) -> dict:
+    """LLM fallback, only used when the profile store has no entry."""
+    full_profile_output = profile_manager.kickoff(
+        f'Return the COMPLETE JSON profile for "{user_id}". '
+        'No markdown, no commentary.'
+    )
+    return parse_structured(full_profile_output.raw, StudentProfile,
+                            fix=correct_with(profile_manager, StudentProfile)).model_dump()
+
+# ──────────────────────────────────────────────────────
+# 2-bis.  Prompt builders shared by the sync and async flows
+# ──────────────────────────────────────────────────────
+def build_guide_prompt(data: dict, memory: ConversationMemory) -> str:
+    profile = {k: data["profile"].get(k) for k in ("skill_level", "weak_areas")}
+    return (
+        f"You are a friendly writing coach for a grade-{data['grade']} "
+        f"student (age {data['age']}). The topic is **{data['topic']}**.\n\n"
+        "Below is the student's OWN brainstorm list followed by any Q-A so far.\n"
+        "ONLY reference items that exist verbatim in that list or the Q-A.\n"
+        "If you suggest a new angle, prefix with: "
+        "'Some people also ___. Do you feel that way?'\n"
+        "Never claim the student 'mentioned' something they didn't.\n\n"
+        f"Student profile:\n{json.dumps(profile)}\n\n"
+        "Conversation so far:\n" + memory.render() +
+        "\n\nAsk ONE open follow-up question that clarifies or deepens or broadens. Do NOT show thinking or thought\n"
+        f"When you have at least {data['guide']['paras']} RICH body ideas, "
+        "answer EXACTLY like:\n"
+        "[DONE]\n• idea 1\n• idea 2\n• idea 3 …\n"
+        "Ideas must come from, or be confirmed by, the student's words."
+    )
+
+def parse_done(agent_reply: str) -> List[str] | None:
+    """Bullet ideas if the guide answered with [DONE], else None."""
+    if not agent_reply.startswith("[DONE]"):
+        return None
+    return [
+        line.lstrip("•").strip()
+        for line in agent_reply.splitlines()[1:]
+        if line.strip()
+    ]
+
+def build_shortlist_prompt(data: dict, memory: ConversationMemory) -> str:
+    """The guide prompt, asking for the [DONE] bullets now (for the outline prefetch)."""
+    return (build_guide_prompt(data, memory) +
+            "\n\nDo NOT ask a question this time: answer with [DONE] and the bullet list now.")
+
+def hedge_false_attribution(agent_reply: str, memory: ConversationMemory) -> str:
+    # Quick sanity check for false attributions:
+    if ("you mentioned" in agent_reply.lower()
+        and not any("you mentioned" in qa["q"].lower() for qa in memory.turns)
+        and agent_reply.lower().split("you mentioned")[1].strip().split()[0]   # first word after phrase
+            not in memory.last_answer.lower()):
+        return "I might be mistaken, but " + agent_reply
+    return agent_reply
+
+def reference_snippets(data: dict, query: str, k: int, kind: str | None = None,
+                       distinct: bool = False) -> str:
+    """The few indexed snippets closest to `query`, for this grade only."""
+    return grounding(default_retriever().search(query, k=k, kind=kind, grade=data["grade"],
+                                                distinct=distinct))
+
+def build_outline_prompt(data: dict) -> str:
+    numbered = "\n".join(f"{i+1}. {idea}" for i, idea in enumerate(data["ideas"]))
+    references = reference_snippets(data, " ".join([data["topic"], *data["ideas"]]), k=3)
+    return (
+        f"Create a numbered outline for a grade-{data['grade']} student. "
+        f"Limit the whole essay to about {data['guide']['max_words']} words. "
+        "Use an intro, one body paragraph per idea, and a conclusion. "
+        "Give each paragraph a kid-friendly hint (≤15 words).\n\n"
+        + references +
+        f"Ideas:\n{numbered}"
+    )
+
+def draft_outline(data: dict) -> str:
+    """A close classmate's outline re-worded for these ideas, else a fresh planner call."""
+    cache = default_outline_cache()
+    outline = cache.lookup(data["topic"], data["grade"], data["ideas"])
+    if outline is None:
+        outline = outline_planner.kickoff(build_outline_prompt(data)).raw
+        cache.store(data["topic"], data["grade"], data["ideas"], outline)
+    return outline
+
+def pre_review(data: dict) -> RubricFindings:
+    """Local rubric pass; `.verdict` is set when no reviewer call is needed."""
+    return pre_score(data["draft"], data["guide"],
+                     data["profile"].get("weak_areas", []), data["grade"])
+
+def build_review_prompt(data: dict, findings: RubricFindings | None = None,
+                        plan: ReviewPlan | None = None) -> str:
+    min_words  = data["guide"]["min_words"]
+    max_words  = data["guide"]["max_words"]
+    local      = f"{findings.as_prompt()}\n\n" if findings else ""
+    # a grade-level exemplar or two (from different essays) calibrates the score
+    exemplars  = reference_snippets(data, data["topic"], k=2, kind="exemplar", distinct=True)
+    if plan is None:
+        body = data["draft"]
+    else:               # revisions only show the reviewer what changed
+        body = plan.render() if plan.full else plan.as_prompt()
+    return (
+        f"Evaluate the draft for a grade-{data['grade']} writer "
+        f"Topic: {data['topic']}\n"
+        f"Expected length: {min_words}-{max_words} words.\n"
+        f"Score for grammar, clarity, structure, and topic compliance."
+        "Score 0-100 and return JSON {{'score':int,'passed':bool,'issues':[]}}.\n\n"
+        + exemplars + local + body
+    )
+
+def parse_review(review_json: str) -> dict:
+    """Validated review dict; the reviewer is asked to fix it only if local repair fails."""
+    return parse_structured(review_json, Review, fix=correct_with(reviewer, Review)).model_dump()
+
+def build_coach_prompt(data: dict) -> str:
+    issues = "\n".join(f"• {iss}" for iss in data["assessment"]["issues"])
+    return f"The draft has these issues:\n{issues}\nGive encouraging, concrete advice."
+
+def record_progress(user_id: str, data: dict) -> dict:
+    """Fold the accepted essay into the student's progress index (idempotent on replay)."""
+    return default_progress().record(
+        user_id, data["assessment"]["score"], data["topic"],
+        issues=data["assessment"]["issues"],
+        weak_areas=data["profile"].get("weak_areas", []),
+        revisions=data.get("revisions", 0),
+        key=hashlib.sha1(data["draft"].encode("utf-8")).hexdigest(),
+    )
+
+def build_praise_prompt(data: dict) -> str:
+    progress   = data["progress"]           # already includes this essay
+    old_best   = progress["previous_best"]
+    new_score  = data["assessment"]["score"]
+    delta      = new_score - old_best if old_best is not None else 0
+    ask = (f"Congratulate and highlight the +{delta} improvement." if delta > 0 else
+           "Congratulate and point to one trend or streak above that shows growth.")
+    return (
+        f"Student progress:\n{progress_prompt(progress)}\n\n"
+        f"Old best: {old_best}, new score: {new_score}. {ask}"
+    )
+
+# ──────────────────────────────────────────────────────
+# 2-ter.  Local fallbacks for when the session budget runs low
+# ──────────────────────────────────────────────────────
+WRAP_UP = ("\n⏸️  We did a lot of great writing today! Your draft is saved, "
+           "so let's finish it next time.")
+
+def ideas_without_guide(memory: ConversationMemory) -> List[str]:
+    """The [DONE] path with no model call: the student's own seeds and answers."""
+    seeds = [ln.strip("-•* ").strip() for ln in memory.seeds.splitlines() if ln.strip()]
+    return seeds + [t["a"].strip() for t in memory.turns if t["a"].strip()]
+
+def plain_outline(data: dict) -> str:
+    body = "\n".join(f"{i + 2}. {idea} (hint: give one example)"
+                     for i, idea in enumerate(data["ideas"]))
+    return (f"1. Introduction: tell the reader what your essay is about\n{body}\n"
+            f"{len(data['ideas']) + 2}. Conclusion: say your main idea again in new words")
+
+def plain_feedback(data: dict) -> str:
+    issues = "\n".join(f"• {iss}" for iss in data["assessment"]["issues"])
+    return f"Here is what to work on next:\n{issues}"
+
+def plain_praise(data: dict) -> str:
+    return f"Great job! Your essay scored {data['assessment']['score']}. Keep writing!"
+
 # ──────────────────────────────────────────────────────
 # 3.  Flow implementation  (dict state keeps it simple)
 # ──────────────────────────────────────────────────────
-class EssayCoachFlow(Flow[dict]):
+class EssayCoachFlow(BudgetedFlow, Flow[dict]):
+
+    def __init__(self, ux: UXChannel | None = None, user_id: str = "demo_user",
+                 checkpoint: FlowCheckpoint | None = None, **kwargs):
+        self.ux = ux or UXChannel()     # one channel per student session
+        self.user_id = user_id
+        self.checkpoint = checkpoint    # completed steps are replayed from here on restart
+        # limits are set per grade at intake; the remaining budget shows in state["budget"]
+        self.budget = SessionBudget(on_change=self._expose_budget)
+        self.prefetch: OutlinePrefetch | None = None     # speculative outline, not checkpointed
+        super().__init__(**kwargs)
+
+    def _expose_budget(self, snapshot: dict) -> None:
+        self.state["budget"] = snapshot
+
+    def _speculate(self, data: dict, memory: ConversationMemory) -> None:
+        """Draft the outline in the background once the student has enough ideas."""
+        if self.budget.level != "ok":               # never gamble a tight budget
+            return
+        if self.prefetch is None:
+            self.prefetch = OutlinePrefetch(min_ideas=data["guide"]["paras"])
+        # outline the bullets the guide would give now, so take() compares them with its [DONE]
+        prompt = build_shortlist_prompt(data, memory)
+        self.prefetch.offer(
+            ideas_without_guide(memory),
+            lambda ideas: draft_outline({**data, "ideas": ideas}),
+            shortlist=lambda ideas: parse_done(conversation_guide.kickoff(prompt).raw.strip()),
+        )
 
     # ---------- phase 1 : get topic & profile ----------
     @start()
+    @checkpointed
     def intake(self) -> dict:
 
 
-        # --- ask ONLY for age & grade ---
-        age_grade_output = profile_manager.kickoff(
-            'Give only the age and grade for "demo_user" '
-            'in JSON: {"age":<int>,"grade":<int>}'
-        )
-        age_grade = json.loads(age_grade_output.raw.strip())
-        print(f"\n👤 Profile: {age_grade}")
-        grade = int(age_grade["grade"])
-        guide = GRADE_GUIDE.get(grade, GRADE_GUIDE[3])
-
-        # --- if you still want the full profile, do it AFTER you know grade ---
-        full_profile_output = profile_manager.kickoff(
-            'Return the COMPLETE JSON profile for "demo_user". '
-            'No markdown, no commentary.'
-        )
-        full_profile = json.loads(full_profile_output.raw.strip())
+        # --- profile comes straight from the indexed store (no model call) ---
+        profile, guide = resolve_profile(self.user_id, GRADE_GUIDE,
+                                         fallback=profile_from_agent)
+        print(f"\n👤 Profile: age {profile.age}, grade {profile.grade}")
+        self.budget.configure(limits_for(profile.grade))
 
-        ux.out.put("Hello! I'm WritePal, your K-12 essay coach. ")
-        # topic = ux.ask("📝 Topic?  ").strip()
-        # req   = ux.ask("📋 Special requirements? (press Enter for none)  ").strip()
+        self.ux.out.put("Hello! I'm WritePal, your K-12 essay coach. ")
+        # topic = self.ux.ask("📝 Topic?  ").strip()
+        # req   = self.ux.ask("📋 Special requirements? (press Enter for none)  ").strip()
         topic = "Your Favorite Animal"
         req   = ""
-        ux.ask(f"Let's write for \n📝 Topic: {topic}\n")
+        self.ux.ask(f"Let's write for \n📝 Topic: {topic}\n")
 
         return {
             "topic": topic,
             "req": req,
-            "profile": full_profile,
-            "grade": grade,
-            "age": int(age_grade["age"]),
+            # history stays out of the flow state; prompts use the compact summary
+            "profile": profile.model_dump(exclude={"history"}),
+            "progress": default_progress().summary(self.user_id, profile.model_dump()),
+            "grade": profile.grade,
+            "age": profile.age,
             "guide": guide,
         }
 
     # ---------- phase 2 : collect ideas with Socratic chat ----------
     @listen(intake)
+    @checkpointed
     def brainstorm(self, data):
         """
         Stage 1 → student free-writes ideas (one per line, 'DONE' to finish)
@@ -142,153 +330,153 @@ class EssayCoachFlow(Flow[dict]):
         Stage 3 → agent returns [DONE] + bullet list once it has ≥ needed ideas
         """
 
-        # ux.out.put(
+        # self.ux.out.put(
         #     "\n📝 Think for a minute about everything that comes to mind on the topic "
         #     f'"{data["topic"]}".  Like: words, memories, reasons, '
         #     "feelings. After you finish, type DONE."
         # )
         # raw_lines: list[str] = []
         # while True:
-        #     line = ux.ask("💡 ").strip()
+        #     line = self.ux.ask("💡 ").strip()
         #     if line.upper() == "DONE":
         #         break
         #     if line:
         #         raw_lines.append(line)
 
-        raw_lines = ux.ask("\n📝 Think for a minute about everything that comes to mind on the topic "
+        raw_lines = self.ux.ask("\n📝 Think for a minute about everything that comes to mind on the topic "
             f'"{data["topic"]}".  Like: words, memories, reasons, feelings')
 
-        # Store the student-owned seeds
-        qa_history: list[dict[str, str]] = [{
-            "q": "Your free-brainstorm list",
-            "a": "\n".join(raw_lines)
-        }]
+        # Store the student-owned seeds; older Q-A is summarised to stay in budget
+        memory = ConversationMemory(seeds=raw_lines)
 
         # --------------- Stage 2 : guided probing loop -----------------
         while True:
-            guide_prompt = (
-                f"You are a friendly writing coach for a grade-{data['grade']} "
-                f"student (age {data['age']}). The topic is **{data['topic']}**.\n\n"
-                "Below is the student's OWN brainstorm list followed by any Q-A so far.\n"
-                "ONLY reference items that exist verbatim in that list or the Q-A.\n"
-                "If you suggest a new angle, prefix with: "
-                "'Some people also ___. Do you feel that way?'\n"
-                "Never claim the student 'mentioned' something they didn't.\n\n"
-                f"Student profile:\n{json.dumps(data['profile'])}\n\n"
-                "Conversation so far:\n" +
-                "\n".join(f"Q: {p['q']}\nA: {p['a']}" for p in qa_history) +
-                "\n\nAsk ONE open follow-up question that clarifies or deepens or broadens. Do NOT show thinking or thought\n"
-                f"When you have at least {data['guide']['paras']} RICH body ideas, "
-                "answer EXACTLY like:\n"
-                "[DONE]\n• idea 1\n• idea 2\n• idea 3 …\n"
-                "Ideas must come from, or be confirmed by, the student's words."
-            )
-
+            self._speculate(data, memory)
+            if not self.budget.allow("brainstorm"):     # out of turns or budget: wrap up
+                self.budget.note("brainstorm:done")
+                data["ideas"] = ideas_without_guide(memory)
+                data["brainstorm_prompt_tokens"] = memory.prompt_sizes
+                return data
+            memory.token_budget = self.budget.scaled(1200)     # shorter prompts when low
+            guide_prompt = build_guide_prompt(data, memory)
+            tokens = memory.record_prompt(guide_prompt)
+            print(f"🧮 brainstorm turn {len(memory.prompt_sizes)}: ~{tokens} prompt tokens")
+            self.budget.tick("brainstorm")
             agent_reply = conversation_guide.kickoff(guide_prompt).raw.strip()
 
-            # If the agent says it's done, parse bullet list and break.
-            if agent_reply.startswith("[DONE]"):
-                bullets = [
-                    line.lstrip("•").strip()
-                    for line in agent_reply.splitlines()[1:]
-                    if line.strip()
-                ]
+            # If the agent says it's done, keep its bullet list and stop.
+            bullets = parse_done(agent_reply)
+            if bullets is not None:
                 data["ideas"] = bullets
+                data["brainstorm_prompt_tokens"] = memory.prompt_sizes
                 return data
 
             # Otherwise ask the student and store the answer.
-            # Quick sanity check for false attributions:
-            if ("you mentioned" in agent_reply.lower()
-                and not any("you mentioned" in qa["q"].lower() for qa in qa_history)
-                and agent_reply.lower().split("you mentioned")[1].strip().split()[0]   # first word after phrase
-                    not in qa_history[-1]["a"].lower()):
-                agent_reply = ("I might be mistaken, but " + agent_reply)
-
-            # Otherwise ask the student and store the answer.
-            student_answer = ux.ask(f"\n👩‍🏫 {agent_reply}\n").strip()
-            qa_history.append({"q": agent_reply, "a": student_answer})
+            agent_reply = hedge_false_attribution(agent_reply, memory)
+            student_answer = self.ux.ask(f"\n👩‍🏫 {agent_reply}\n").strip()
+            memory.add(agent_reply, student_answer)
 
     # ---------- phase 3 : draft outline ----------
     @listen(brainstorm)
+    @checkpointed
     def outline(self, data):
-        numbered = "\n".join(f"{i+1}. {idea}" for i, idea in enumerate(data["ideas"]))
-        outline_prompt = (
-            f"Create a numbered outline for a grade-{data['grade']} student. "
-            f"Limit the whole essay to about {data['guide']['max_words']} words. "
-            "Use an intro, one body paragraph per idea, and a conclusion. "
-            "Give each paragraph a kid-friendly hint (≤15 words).\n\n"
-            f"Ideas:\n{numbered}"
-        )
-        outline_text = outline_planner.kickoff(outline_prompt).raw
-        ux.out.put(f"\n📑 Outline\n {outline_text}")
+        if not self.budget.allow(essential=True):
+            self.budget.note("outline:local")
+            if self.prefetch:
+                self.prefetch.cancel()
+            outline_text = plain_outline(data)
+        elif self.prefetch and (ready := self.prefetch.take(data["ideas"])):
+            outline_text = ready                    # drafted while the student was chatting
+        else:
+            with stream_to(self.ux.stream):
+                outline_text = draft_outline(data)
+        self.ux.out.put(f"\n📑 Outline\n {outline_text}")
         data["outline"] = outline_text
         return data
 
     # ---------- phase 4 : student writes ----------
     @listen(outline)
+    @checkpointed
     def collect_draft(self, data):
-        # ux.out.put("\nPlease write your essay now.")
+        # self.ux.out.put("\nPlease write your essay now.")
         # lines: List[str] = []
         # while True:
-        #     line = ux.ask()
+        #     line = self.ux.ask()
         #     if not line.strip(): break
         #     lines.append(line)
         # data["draft"] = "\n".join(lines)
-        data["draft"] = ux.ask("\nPlease write your essay now.")
+        data["draft"] = self.ux.ask("\nPlease write your essay now.")
         return data
 
     # ---------- phase 5 : review ----------
-    @listen(collect_draft)
+    @listen(or_(collect_draft, "coach"))          # every revision comes back here
+    @checkpointed
     def review(self, data):
-        topic = data["topic"]
-        min_words  = data["guide"]["min_words"]
-        max_words  = data["guide"]["max_words"]
-        review_prompt = (
-            f"Evaluate the draft for a grade-{data['grade']} writer "
-            f"Topic: {topic}\n"
-            f"Expected length: {min_words}-{max_words} words.\n"
-            f"Score for grammar, clarity, structure, and topic compliance."
-            "Score 0-100 and return JSON {{'score':int,'passed':bool,'issues':[]}}.\n\n"
-            + data["draft"]
-        )
-        review_json = reviewer.kickoff(review_prompt).raw
-        data["assessment"] = json.loads(re.search(r"\{.*\}", review_json, re.S).group())
+        findings = pre_review(data)
+        if findings.verdict is not None:        # clear fail: skip the reviewer
+            data["assessment"] = findings.verdict
+            return data
+        plan = plan_review(data["draft"], data.get("review_memo"))
+        print(f"🧮 review: {len(plan.changed)}/{len(plan.paragraphs)} paragraph(s) to score")
+        if plan.unchanged:                      # same draft again: reuse the last review
+            data["assessment"], data["review_memo"] = plan.merge()
+            return data
+        if not self.budget.allow("review", essential=True):
+            self.budget.note("review:stopped")
+            data["assessment"] = {"score": None, "passed": False, "issues": findings.issues}
+            return data
+        self.budget.tick("review")
+        review_json = reviewer.kickoff(build_review_prompt(data, findings, plan)).raw
+        data["assessment"], data["review_memo"] = plan.merge(parse_review(review_json))
         return data
 
     # ---------- router ----------
     @router(review)
+    @checkpointed
     def branch(self, data):
-        return "good" if data["assessment"]["passed"] else "revise"
+        if data["assessment"]["passed"]:
+            return "good"
+        # another round needs a reviewer call, so stop here if none is left
+        return "revise" if self.budget.allow("review", essential=True) else "out_of_budget"
 
     # ---------- phase 6 : improvements loop ----------
     @listen("revise")
+    @checkpointed
     def coach(self, data):
-        issues = "\n".join(f"• {iss}" for iss in data["assessment"]["issues"])
-        feedback = improvement_coach.kickoff(
-            f"The draft has these issues:\n{issues}\nGive encouraging, concrete advice."
-        ).raw
-        ux.out.put(f"\n🔍 Feedback\n {feedback}")
-        ux.out.put("\nPlease revise your essay (blank line to finish).")
-        new_lines: List[str] = []
-        while True:
-            ln = ux.ask()
-            if not ln.strip(): break
-            new_lines.append(ln)
-        data["draft"] = "\n".join(new_lines)
+        if self.budget.allow():
+            with stream_to(self.ux.stream):
+                feedback = improvement_coach.kickoff(build_coach_prompt(data)).raw
+        else:
+            self.budget.note("coach:local")
+            feedback = plain_feedback(data)
+        self.ux.out.put(f"\n🔍 Feedback\n {feedback}")
+        data["revisions"] = data.get("revisions", 0) + 1
+        # One chat message is one revision (the GUI can't send a blank line)
+        data["draft"] = self.ux.ask("\nPlease revise your essay.")
         return data  # cycles back to review step
 
     # ---------- phase 7 : celebrate ----------
     @listen("good")
+    @checkpointed
     def praise(self, data):
-        last_score = data["profile"]["history"][-1]["score"]
-        new_score  = data["assessment"]["score"]
-        delta      = new_score - last_score
-        praise = progress_analyst.kickoff(
-            f"Old best: {last_score}, new score: {new_score}. "
-            f"Congratulate and highlight the +{delta} improvement."
-        ).raw
-        ux.out.put(f"\n🎉  {praise}")
-        ux.done()
+        data["progress"] = record_progress(self.user_id, data)
+        if self.budget.allow():
+            praise = progress_analyst.kickoff(build_praise_prompt(data)).raw
+        else:
+            self.budget.note("praise:local")
+            praise = plain_praise(data)
+        self.ux.out.put(f"\n🎉  {praise}")
+        self.ux.done()
+        return "done"
+
+    # ---------- budget spent : end gracefully ----------
+    @listen("out_of_budget")
+    @checkpointed
+    def wrap_up(self, data):
+        if data["assessment"]["issues"]:
+            self.ux.out.put(plain_feedback(data))
+        self.ux.out.put(WRAP_UP)
+        self.ux.done()
         return "done"
 
 # ──────────────────────────────────────────────────────
@@ -1,18 +1,109 @@
 # helpers.py
-import queue, threading
+import asyncio, queue, threading
+
+FLOW_DONE = "<FLOW_DONE>"       # Flow → GUI : the flow has finished
+AWAITING_INPUT = "<AWAITING>"   # Flow → GUI : the flow is blocked in ask()
+SESSION_CLOSED = object()       # GUI  → Flow: the session was reaped
+
+
+class Chunk(str):
+    """Partial tokens of a tutor message that is still being generated.
+       The complete message follows as a plain str once it is finished."""
+
+
+class SessionClosed(Exception):
+    """Raised inside the flow thread when its session has been shut down."""
+
 
 class UXChannel:
     def __init__(self):
         self.out = queue.Queue()    # Flow → GUI
         self.in_ = queue.Queue()    # GUI  → Flow
 
-    def ask(self, prompt: str):
+    def ask(self, prompt: str = ""):
         """Called by Flow; returns student's reply."""
-        self.out.put(prompt)        # send question to GUI
-        return self.in_.get()       # block until GUI answers
+        if prompt:
+            self.out.put(prompt)    # send question to GUI
+        self.out.put(AWAITING_INPUT)  # turn boundary: GUI may reply now
+        reply = self.in_.get()      # block until GUI answers
+        if reply is SESSION_CLOSED:
+            raise SessionClosed()
+        return reply
+
+    def stream(self, text: str):
+        """Called by Flow (via the stream sink) for every generated token."""
+        self.out.put(Chunk(text))
 
     def done(self):
         """Mark the Flow as complete."""
-        self.out.put("<FLOW_DONE>") # special sentinel
+        self.out.put(FLOW_DONE)     # special sentinel
+
+    def iter_turn(self):
+        """Called by GUI; yield messages and chunks as the flow emits them,
+           until it waits for input or finishes (FLOW_DONE is yielded)."""
+        while True:
+            m = self.out.get()
+            if m == AWAITING_INPUT:
+                return
+            yield m
+            if m == FLOW_DONE:
+                return
+
+    def next_turn(self):
+        """Called by GUI; block until the flow waits for input or finishes.
+           Returns every complete message emitted in between, ending with
+           FLOW_DONE if the flow completed."""
+        return [m for m in self.iter_turn() if not isinstance(m, Chunk)]
+
+    def close(self):
+        """Unblock a flow waiting in ask() so its thread can exit."""
+        self.in_.put(SESSION_CLOSED)
+
+
+class AsyncUXChannel:
+    """asyncio twin of UXChannel: a waiting flow costs a coroutine, not a thread."""
+
+    def __init__(self):
+        self.out = asyncio.Queue()  # Flow → GUI
+        self.in_ = asyncio.Queue()  # GUI  → Flow
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+
+    async def ask(self, prompt: str = ""):
+        """Awaited by the async Flow; returns student's reply."""
+        if prompt:
+            self.out.put_nowait(prompt)
+        self.out.put_nowait(AWAITING_INPUT)
+        reply = await self.in_.get()
+        if reply is SESSION_CLOSED:
+            raise SessionClosed()
+        return reply
+
+    def stream(self, text: str):
+        """Thread-safe: model clients may emit chunks from a worker thread."""
+        loop = self._loop or asyncio.get_running_loop()
+        loop.call_soon_threadsafe(self.out.put_nowait, Chunk(text))
+
+    def done(self):
+        """Mark the Flow as complete."""
+        self.out.put_nowait(FLOW_DONE)
+
+    async def iter_turn(self):
+        """Async version of UXChannel.iter_turn."""
+        while True:
+            m = await self.out.get()
+            if m == AWAITING_INPUT:
+                return
+            yield m
+            if m == FLOW_DONE:
+                return
+
+    async def next_turn(self):
+        """Awaited by GUI; see UXChannel.next_turn."""
+        return [m async for m in self.iter_turn() if not isinstance(m, Chunk)]
 
-ux = UXChannel()
+    def close(self):
+        """Wake a flow waiting in ask() so its task can finish."""
+        self.in_.put_nowait(SESSION_CLOSED)
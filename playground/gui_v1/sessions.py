@@ -0,0 +1,217 @@
+# sessions.py
+"""
+One isolated EssayCoachFlow + UXChannel per Gradio browser session.
+
+The manager caps the number of live sessions, reaps sessions that have been
+idle for too long (unblocking their flow thread so it exits) and keeps a few
+counters that can be scraped or printed. With a checkpoint store, a session
+id seen again (after a reap or a server restart) resumes its flow at the
+last completed step.
+"""
+import asyncio, threading, time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+from kids_writing_agent.checkpoint import CheckpointStore
+from kids_writing_agent.metrics import session_scope
+
+from helpers import FLOW_DONE, UXChannel, AsyncUXChannel, Chunk, SessionClosed
+
+
+class CapacityError(Exception):
+    """Raised when a new session would exceed `max_sessions`."""
+
+
+@dataclass
+class Session:
+    id: str
+    ux: UXChannel
+    flow: object
+    runner: object              # threading.Thread or asyncio.Task
+    created: float = field(default_factory=time.time)
+    last_seen: float = field(default_factory=time.time)
+    over: bool = False
+    turns: int = 0
+
+    def touch(self):
+        self.last_seen = time.time()
+
+    def reply(self, user_msg: str) -> list:
+        """Answer the flow and return what it says before it next waits."""
+        return [m for m in self.stream_reply(user_msg) if not isinstance(m, Chunk)]
+
+    def stream_reply(self, user_msg: str):
+        """Like reply(), but yield messages and token chunks as they arrive."""
+        # A fresh flow greets the student before its first ask(); collect
+        # that opening so the student's message answers the right question.
+        if self.turns == 0:
+            for m in self.ux.iter_turn():
+                yield m
+                if m == FLOW_DONE:      # the flow ended before asking anything
+                    return
+        self.ux.in_.put(user_msg)
+        yield from self.ux.iter_turn()
+        self.turns += 1
+        self.touch()
+
+
+@dataclass
+class AsyncSession(Session):
+    async def reply(self, user_msg: str) -> list:
+        return [m async for m in self.stream_reply(user_msg) if not isinstance(m, Chunk)]
+
+    async def stream_reply(self, user_msg: str):
+        if self.turns == 0:
+            async for m in self.ux.iter_turn():
+                yield m
+                if m == FLOW_DONE:
+                    return
+        self.ux.in_.put_nowait(user_msg)
+        async for m in self.ux.iter_turn():
+            yield m
+        self.turns += 1
+        self.touch()
+
+
+class SessionManager:
+    def __init__(self, flow_factory: Callable[[UXChannel], object],
+                 max_sessions: int = 40, idle_timeout: float = 30 * 60,
+                 reap_interval: float = 60, checkpoints: Optional[CheckpointStore] = None):
+        self.flow_factory = flow_factory
+        self.checkpoints = checkpoints
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.reap_interval = reap_interval
+        self._sessions: Dict[str, Session] = {}
+        self._lock = threading.Lock()
+        self._counters = {"created": 0, "completed": 0, "reaped": 0, "rejected": 0}
+        self._reaper = None
+
+    # ---------- lifecycle ----------
+    def get_or_create(self, session_id: str) -> Session:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                if len(self._sessions) >= self.max_sessions:
+                    self._counters["rejected"] += 1
+                    raise CapacityError(f"{self.max_sessions} sessions already active")
+                session = self._start(session_id)
+                self._sessions[session_id] = session
+                self._counters["created"] += 1
+            session.touch()
+            return session
+
+    def end(self, session_id: str, reason: str = "completed"):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                return
+            self._counters[reason] += 1
+        session.over = True
+        session.ux.close()
+
+    def reap(self) -> int:
+        """End every session idle for longer than `idle_timeout`."""
+        cutoff = time.time() - self.idle_timeout
+        with self._lock:
+            idle = [sid for sid, s in self._sessions.items() if s.last_seen < cutoff]
+        for sid in idle:
+            self.end(sid, reason="reaped")
+        return len(idle)
+
+    def start_reaper(self):
+        """Run `reap()` every `reap_interval` seconds in a daemon thread."""
+        if self._reaper is None:
+            self._reaper = threading.Thread(target=self._reap_forever, daemon=True)
+            self._reaper.start()
+
+    # ---------- metrics ----------
+    def metrics(self) -> dict:
+        with self._lock:
+            now = time.time()
+            ages = [now - s.last_seen for s in self._sessions.values()]
+            return {
+                "active": len(self._sessions),
+                "capacity": self.max_sessions,
+                "max_idle_seconds": round(max(ages), 1) if ages else 0.0,
+                **self._counters,
+            }
+
+    # ---------- internals ----------
+    def _attach_checkpoint(self, session_id: str, flow) -> None:
+        if self.checkpoints is not None:
+            flow.checkpoint = self.checkpoints.session(session_id,
+                                                       getattr(flow, "user_id", session_id))
+
+    def _finished(self, flow) -> None:
+        """The flow ran to the end: its checkpoint log is no longer needed."""
+        if getattr(flow, "checkpoint", None) is not None:
+            flow.checkpoint.finish()
+
+    def _start(self, session_id: str) -> Session:
+        ux = UXChannel()
+        flow = self.flow_factory(ux)
+        self._attach_checkpoint(session_id, flow)
+        thread = threading.Thread(target=self._run, args=(session_id, flow),
+                                  name=f"flow-{session_id}", daemon=True)
+        session = Session(id=session_id, ux=ux, flow=flow, runner=thread)
+        thread.start()
+        return session
+
+    def _run(self, session_id: str, flow):
+        try:
+            with session_scope(session_id):     # tags this session's metrics
+                flow.kickoff()
+            self._finished(flow)
+        except SessionClosed:
+            pass
+        except Exception as exc:
+            print(f"⚠️  session {session_id} crashed: {exc!r}")
+            flow.ux.done()
+
+    def _reap_forever(self):
+        while True:
+            time.sleep(self.reap_interval)
+            if self.reap():
+                print(f"🧹 sessions: {self.metrics()}")
+
+
+class AsyncSessionManager(SessionManager):
+    """SessionManager whose flows run as asyncio tasks on the server's loop.
+
+    Must be used from coroutines running on that loop (e.g. async Gradio
+    handlers); an idle session then costs a suspended coroutine, not a thread.
+    """
+
+    def get_or_create(self, session_id: str) -> AsyncSession:
+        if self._reaper is None:
+            self._reaper = asyncio.get_running_loop().create_task(self._areap_forever())
+        return super().get_or_create(session_id)
+
+    def start_reaper(self):
+        pass    # started lazily on the running loop by get_or_create
+
+    def _start(self, session_id: str) -> AsyncSession:
+        ux = AsyncUXChannel()
+        flow = self.flow_factory(ux)
+        self._attach_checkpoint(session_id, flow)
+        task = asyncio.get_running_loop().create_task(self._arun(session_id, flow),
+                                                      name=f"flow-{session_id}")
+        return AsyncSession(id=session_id, ux=ux, flow=flow, runner=task)
+
+    async def _arun(self, session_id: str, flow):
+        try:
+            with session_scope(session_id):
+                await flow.kickoff_async()
+            await asyncio.to_thread(self._finished, flow)
+        except SessionClosed:
+            pass
+        except Exception as exc:
+            print(f"⚠️  session {session_id} crashed: {exc!r}")
+            flow.ux.done()
+
+    async def _areap_forever(self):
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            if self.reap():
+                print(f"🧹 sessions: {self.metrics()}")
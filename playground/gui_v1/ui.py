@@ -1,92 +1,189 @@
 import gradio as gr
-import threading, queue, time
-from helpers import ux
+import os
+from helpers import FLOW_DONE, Chunk
 from essay_coach_poc_gui import EssayCoachFlow
-
-flow = EssayCoachFlow()
-
-# Run the flow in a background thread so the UI stays responsive
-threading.Thread(target=flow.kickoff, daemon=True).start()
-
-# Track whether the flow has finished
-session_over = False
-
-def drain_out(max_idle=10.15):
-    """Pop all pending tutor messages.
-       Stop when the queue stays empty for max_idle seconds."""
-    msgs = []
-    last_pop = time.time()
-    while True:
-        try:
-            m = ux.out.get_nowait()            # non-blocking
-            msgs.append(m)
-            last_pop = time.time()
-        except queue.Empty:
-            if time.time() - last_pop >= max_idle:
-                break                          # nothing new → flow is waiting
-            time.sleep(0.02)                   # brief yield
-    return msgs
-
-def chat_v1(user_msg, history):
-    global session_over
-    if session_over:
-        return gr.ChatMessage(role="assistant",
-                              content="🔒 The session is over. Refresh to start again.")
+from essay_coach_async import AsyncEssayCoachFlow
+from sessions import SessionManager, AsyncSessionManager, CapacityError
+from kids_writing_agent.checkpoint import default_checkpoints
+from kids_writing_agent.http_pool import install_pool, pool_stats
+from kids_writing_agent.metrics import default_recorder, session_scope
+from kids_writing_agent.outline_cache import default_outline_cache
+from kids_writing_agent.prefetch import prefetch_stats
+from kids_writing_agent.ratelimit import default_limiter
+from kids_writing_agent.retrieval import default_retriever
+
+# WRITEPAL_FLOW=async runs each session as a coroutine instead of a thread
+ASYNC_FLOW = os.getenv("WRITEPAL_FLOW", "async") == "async"
+
+# All agents and sessions share one keep-alive connection pool to the model API
+install_pool()
+
+# Sync and embed knowledge/ now: the async flow builds its prompts on the event
+# loop, where a first-use sync would stall every session
+default_retriever()
+
+# Every browser session gets its own flow + channel; finished steps are
+# checkpointed so a restarted server picks each session up where it stopped
+if ASYNC_FLOW:
+    sessions = AsyncSessionManager(lambda ux: AsyncEssayCoachFlow(ux=ux), max_sessions=2000,
+                                   checkpoints=default_checkpoints())
+else:
+    sessions = SessionManager(lambda ux: EssayCoachFlow(ux=ux), max_sessions=40,
+                              checkpoints=default_checkpoints())
+    sessions.start_reaper()
+
+# Per-agent / per-step metrics: data/metrics/calls.jsonl, plus /metrics if a port is set
+metrics = default_recorder()
+metrics.add_gauge("writepal_sessions", "Chat session manager state.", sessions.metrics)
+metrics.add_gauge("writepal_outline_prefetch", "Speculative outline outcomes.", prefetch_stats)
+metrics.add_gauge("writepal_outline_cache", "Similarity outline cache.",
+                  default_outline_cache().stats)
+metrics.add_gauge("writepal_rate_limiter", "Shared model rate limiter queue and waits.",
+                  default_limiter().stats)
+metrics.add_gauge("writepal_http_pool", "Model HTTP connection pool.", pool_stats)
+if os.getenv("WRITEPAL_METRICS_PORT"):
+    metrics.serve(int(os.environ["WRITEPAL_METRICS_PORT"]))
+
+FULL_MSG = "🚦 All seats are taken right now. Please try again in a minute."
+DONE_MSG = "✅ Session complete! Send a message to start a new essay."
+
+def chat_v1(user_msg, history, request: gr.Request):
+    try:
+        session = sessions.get_or_create(request.session_hash)
+    except CapacityError:
+        return gr.ChatMessage(role="assistant", content=FULL_MSG)
 
     # 1️⃣ Pass the student's answer to the flow
-    ux.in_.put(user_msg)
-
     # 2️⃣ Get the next prompt (or sentinel) from the flow
-    next_msg = ux.out.get()
+    msgs = session.reply(user_msg)
+    next_msg = msgs[-1] if msgs else "…"
 
     # 3️⃣ Detect completion
-    if next_msg == "<FLOW_DONE>":
-        session_over = True
-        return gr.ChatMessage(role="assistant", content="✅ Session complete!")
+    if next_msg == FLOW_DONE:
+        sessions.end(session.id)
+        return gr.ChatMessage(role="assistant", content=DONE_MSG)
 
     # 4️⃣ Normal turn: just return the assistant message
     return gr.ChatMessage(role="assistant", content=next_msg)
 
 
-def chat_v3(user_msg, history):
-    ux.in_.put(user_msg)              # answer the flow
-    msgs = drain_out()                # grab every new tutor line
+def chat_v3(user_msg, history, request: gr.Request):
+    try:
+        session = sessions.get_or_create(request.session_hash)
+    except CapacityError:
+        return gr.ChatMessage(role="assistant", content=FULL_MSG)
+
+    msgs = session.reply(user_msg)    # answer the flow, grab every new tutor line
 
     for m in msgs:
-        if m == "<FLOW_DONE>":
-            return gr.ChatMessage(role="assistant",
-                                  content="✅ Session complete!")
+        if m == FLOW_DONE:
+            sessions.end(session.id)
+            return gr.ChatMessage(role="assistant", content=DONE_MSG)
 
         history.append(gr.ChatMessage(role="assistant", content=m))
     return gr.ChatMessage(role="assistant", content=history[-1].content)  # return the last message
 
-def chat_v4(user_msg, history):
-    global session_over
-    if session_over:
-        return {"role": "assistant",
-                "content": "🔒 The session is over. Refresh to start again."}
+def chat_v4(user_msg, history, request: gr.Request):
+    try:
+        session = sessions.get_or_create(request.session_hash)
+    except CapacityError:
+        return {"role": "assistant", "content": FULL_MSG}
 
-    # ① Push the student's reply to the flow
-    ux.in_.put(user_msg)
-
-    # ② Drain everything the flow emitted (using the timeout-drain helper)
-    msgs = drain_out()
+    # ① Push the student's reply to this session's flow
+    # ② Collect everything the flow emits until it blocks for the next answer
+    with session_scope(session.id), metrics.track("turn", "chat"):      # turn latency
+        msgs = session.reply(user_msg)
 
     # ③ Handle completion sentinel
-    if "<FLOW_DONE>" in msgs:
-        session_over = True
-        return {"role": "assistant", "content": "✅ Session complete!"}
+    if FLOW_DONE in msgs:
+        sessions.end(session.id)
+        return {"role": "assistant", "content": DONE_MSG}
 
     # ④ Forward the flow’s messages to the UI
     #    ─ ChatInterface will append this single dict to history for us
     tutor_reply = "\n\n".join(m for m in msgs) or "…"      # join if many lines
     return {"role": "assistant", "content": tutor_reply}
 
+async def achat_v4(user_msg, history, request: gr.Request):
+    """chat_v4 for AsyncEssayCoachFlow: awaits the flow instead of blocking."""
+    try:
+        session = sessions.get_or_create(request.session_hash)
+    except CapacityError:
+        return {"role": "assistant", "content": FULL_MSG}
+
+    with session_scope(session.id), metrics.track("turn", "chat"):
+        msgs = await session.reply(user_msg)
+
+    if FLOW_DONE in msgs:
+        sessions.end(session.id)
+        return {"role": "assistant", "content": DONE_MSG}
+
+    tutor_reply = "\n\n".join(m for m in msgs) or "…"
+    return {"role": "assistant", "content": tutor_reply}
+
+
+class TurnView:
+    """Finished tutor messages of this turn plus the one still streaming."""
+    def __init__(self):
+        self.parts, self.pending = [], ""
+
+    def add(self, m):
+        if isinstance(m, Chunk):
+            self.pending += m
+        else:                      # the complete message replaces its chunks
+            self.parts.append(m)
+            self.pending = ""
+
+    def render(self):
+        return "\n\n".join(self.parts + [self.pending] if self.pending else self.parts) or "…"
+
+def chat_v5(user_msg, history, request: gr.Request):
+    """chat_v4 as a generator: tutor tokens show up while they are generated."""
+    try:
+        session = sessions.get_or_create(request.session_hash)
+    except CapacityError:
+        yield {"role": "assistant", "content": FULL_MSG}
+        return
+
+    view = TurnView()
+    for m in session.stream_reply(user_msg):
+        if m == FLOW_DONE:
+            sessions.end(session.id)
+            view.add(DONE_MSG)     # keep this turn's last words (the praise) above it
+            yield {"role": "assistant", "content": view.render()}
+            return
+        view.add(m)
+        yield {"role": "assistant", "content": view.render()}
+    if not view.parts:
+        yield {"role": "assistant", "content": view.render()}
+
+async def achat_v5(user_msg, history, request: gr.Request):
+    """Async chat_v5 for AsyncEssayCoachFlow."""
+    try:
+        session = sessions.get_or_create(request.session_hash)
+    except CapacityError:
+        yield {"role": "assistant", "content": FULL_MSG}
+        return
+
+    view = TurnView()
+    async for m in session.stream_reply(user_msg):
+        if m == FLOW_DONE:
+            sessions.end(session.id)
+            view.add(DONE_MSG)     # keep this turn's last words (the praise) above it
+            yield {"role": "assistant", "content": view.render()}
+            return
+        view.add(m)
+        yield {"role": "assistant", "content": view.render()}
+    if not view.parts:
+        yield {"role": "assistant", "content": view.render()}
+
 
 demo = gr.ChatInterface(
-    fn=chat_v4,
+    fn=achat_v5 if ASYNC_FLOW else chat_v5,
     title="WritePal, K-12 Essay Coach",
-    type="messages"        # future-proof: explicit modern format
+    type="messages",       # future-proof: explicit modern format
+    # students served at once: every live session (Gradio's "default" is one at a time)
+    concurrency_limit=int(os.getenv("WRITEPAL_CONCURRENCY", sessions.max_sessions)),
 )
 demo.launch(share=False,ssl_verify=False,
                         debug=False,
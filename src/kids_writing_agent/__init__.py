@@ -0,0 +1,6 @@
+import os
+
+# Telemetry off before anything imports crewAI: Flow builds its Telemetry at
+# import time, and crewAI skips all telemetry work when these are set.
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
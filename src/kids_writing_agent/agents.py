@@ -1,42 +1,95 @@
-from crewai import Agent
-from kids_writing_agent.tools.ask_student import AskStudentTool
-
-profile_manager = Agent(
-    role="Profile Manager",
-    goal="Provide user profile data for downstream tasks",
-    backstory="Pre-loads demo_user profile from DB",
-    verbose=True, allow_delegation=False,
-)
-
-conversation_guide = Agent(
-    role="Conversation Guide",
-    goal="Ask Socratic questions to gather essay specs",
-    backstory="Friendly K-12 coach", verbose=True,
-    tools=[AskStudentTool()], allow_delegation=False,
-)
-
-outline_planner = Agent(
-    role="Outline Planner",
-    goal="Turn ideas into a crystal-clear outline",
-    backstory="Veteran tutor", verbose=True,
-)
-
-reviewer = Agent(
-    role="Writing Reviewer",
-    goal="Score the draft with a strict rubric",
-    backstory="Exacting English teacher", verbose=True,
-)
-
-improvement_coach = Agent(
-    role="Improvement Coach",
-    goal="Give targeted feedback to reach 80+ score",
-    backstory="Encouraging mentor", verbose=True,
-    tools=[AskStudentTool()],
-)
-
-progress_analyst = Agent(
-    role="Progress Analyst",
-    goal="Spot and celebrate concrete improvements",
-    backstory="Tracks growth across submissions",
-    verbose=True,
-)
+"""
+The essay-coach agents, built on first use.
+
+Importing this module constructs nothing: `agents.reviewer` (or
+`from kids_writing_agent.agents import reviewer`) builds that one agent the
+first time it is asked for and reuses it afterwards, so a session only pays
+for the agents its steps actually reach.
+"""
+import threading
+
+from kids_writing_agent.cache import CachedAgent
+
+
+def _profile_manager():
+    return CachedAgent(
+        role="Profile Manager",
+        goal="Provide user profile data for downstream tasks",
+        backstory="Pre-loads demo_user profile from DB",
+        verbose=True, allow_delegation=False,
+    )
+
+
+def _conversation_guide():
+    from kids_writing_agent.tools.ask_student import AskStudentTool
+    return CachedAgent(
+        role="Conversation Guide",
+        goal="Ask Socratic questions to gather essay specs",
+        backstory="Friendly K-12 coach", verbose=True,
+        tools=[AskStudentTool()], allow_delegation=False,
+    )
+
+
+def _outline_planner():
+    return CachedAgent(
+        role="Outline Planner",
+        goal="Turn ideas into a crystal-clear outline",
+        backstory="Veteran tutor", verbose=True,
+        kickoff_cache=True,
+    )
+
+
+def _reviewer():
+    return CachedAgent(
+        role="Writing Reviewer",
+        goal="Score the draft with a strict rubric",
+        backstory="Exacting English teacher", verbose=True,
+        kickoff_cache=True,
+    )
+
+
+def _improvement_coach():
+    from kids_writing_agent.tools.ask_student import AskStudentTool
+    return CachedAgent(
+        role="Improvement Coach",
+        goal="Give targeted feedback to reach 80+ score",
+        backstory="Encouraging mentor", verbose=True,
+        tools=[AskStudentTool()],
+    )
+
+
+def _progress_analyst():
+    return CachedAgent(
+        role="Progress Analyst",
+        goal="Spot and celebrate concrete improvements",
+        backstory="Tracks growth across submissions",
+        verbose=True,
+        kickoff_cache=True,
+    )
+
+
+_BUILDERS = {
+    "profile_manager": _profile_manager,
+    "conversation_guide": _conversation_guide,
+    "outline_planner": _outline_planner,
+    "reviewer": _reviewer,
+    "improvement_coach": _improvement_coach,
+    "progress_analyst": _progress_analyst,
+}
+_lock = threading.Lock()
+
+__all__ = list(_BUILDERS)
+
+
+def __getattr__(name):
+    builder = _BUILDERS.get(name)
+    if builder is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _lock:
+        if name not in globals():
+            globals()[name] = builder()     # later lookups never reach __getattr__
+    return globals()[name]
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_BUILDERS))
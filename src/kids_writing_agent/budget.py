@@ -0,0 +1,290 @@
+"""
+Per-session token, call and cost budget.
+
+Each flow run owns a `SessionBudget`. While the flow runs inside
+`budget_scope(budget)`, every `CachedAgent` call is charged to it (tokens,
+calls and estimated cost, per agent), and the flow reads `budget.level` to
+degrade instead of running away:
+
+    ok        – normal operation
+    low       – agents switch to `cheap_model` (if configured), prompts shrink
+    critical  – optional calls are replaced by local fallbacks (coach, praise)
+                and open-ended loops take their final "[DONE]" path
+    exhausted – no more model calls; the flow wraps the session up
+
+Loops are also capped by count (`brainstorm_turns`, `review_rounds`), whatever
+the tokens say. Limits come from `limits_for(grade)`: code defaults, then a
+per-grade row, then the deployment's JSON file (`WRITEPAL_BUDGET_FILE`, default
+data/budgets.json) and finally `WRITEPAL_BUDGET_SCALE` /
+`WRITEPAL_BUDGET_CHEAP_MODEL`.
+
+    {"default": {"tokens": 60000, "cost": 0.5},
+     "grades": {"1": {"brainstorm_turns": 4}}}
+"""
+import json
+import os
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, fields, replace
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from kids_writing_agent.profile_store import DATA_DIR
+
+DEFAULT_BUDGET_FILE = DATA_DIR / "budgets.json"
+
+# USD per 1k (prompt, completion) tokens; unknown models are priced as "default"
+PRICES = {
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-4.1-mini": (0.0004, 0.0016),
+    "gpt-4.1-nano": (0.0001, 0.0004),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4.1": (0.002, 0.008),
+    "default": (0.00015, 0.0006),
+}
+
+LEVELS = ("ok", "low", "critical", "exhausted")
+
+
+class BudgetExceeded(RuntimeError):
+    """A model call was attempted after the session budget ran out."""
+
+
+@dataclass(frozen=True)
+class BudgetLimits:
+    tokens: int = 40_000            # prompt + completion, all agents
+    calls: int = 40
+    cost: float = 0.25              # USD
+    brainstorm_turns: int = 8       # guide questions before the [DONE] path
+    review_rounds: int = 5          # reviewer calls per session
+    low: float = 0.35               # share left below which the level is "low"
+    critical: float = 0.15
+    cheap_model: Optional[str] = None
+
+    def scaled(self, factor: float) -> "BudgetLimits":
+        return replace(self, tokens=int(self.tokens * factor), calls=int(self.calls * factor),
+                       cost=self.cost * factor)
+
+
+# Younger writers get shorter chats and fewer revision rounds
+GRADE_BUDGETS: Dict[int, dict] = {
+    1: {"tokens": 20_000, "calls": 24, "cost": 0.12, "brainstorm_turns": 4, "review_rounds": 3},
+    2: {"tokens": 25_000, "calls": 28, "cost": 0.15, "brainstorm_turns": 5, "review_rounds": 4},
+    3: {"tokens": 30_000, "calls": 32, "cost": 0.2, "brainstorm_turns": 6, "review_rounds": 4},
+    4: {"tokens": 40_000, "calls": 40, "cost": 0.25},
+    5: {"tokens": 50_000, "calls": 44, "cost": 0.3},
+    6: {"tokens": 60_000, "calls": 48, "cost": 0.35, "brainstorm_turns": 10, "review_rounds": 6},
+}
+
+
+def _known(row: dict) -> dict:
+    names = {f.name for f in fields(BudgetLimits)}
+    return {k: v for k, v in row.items() if k in names}
+
+
+def limits_for(grade: int, path=None) -> BudgetLimits:
+    """Code defaults ← grade row ← deployment file ← environment."""
+    limits = replace(BudgetLimits(), **_known(GRADE_BUDGETS.get(grade, {})))
+    path = Path(path or os.getenv("WRITEPAL_BUDGET_FILE", DEFAULT_BUDGET_FILE))
+    if path.exists():
+        with open(path, encoding="utf-8") as fp:
+            deployment = json.load(fp)
+        limits = replace(limits, **_known(deployment.get("default", {})))
+        limits = replace(limits, **_known(deployment.get("grades", {}).get(str(grade), {})))
+    if os.getenv("WRITEPAL_BUDGET_SCALE"):
+        limits = limits.scaled(float(os.environ["WRITEPAL_BUDGET_SCALE"]))
+    if os.getenv("WRITEPAL_BUDGET_CHEAP_MODEL"):
+        limits = replace(limits, cheap_model=os.environ["WRITEPAL_BUDGET_CHEAP_MODEL"])
+    return limits
+
+
+def price(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    name = model.split("/")[-1]
+    per_prompt, per_completion = next(
+        (p for key, p in PRICES.items() if name.startswith(key)), PRICES["default"])
+    return (prompt_tokens * per_prompt + completion_tokens * per_completion) / 1000
+
+
+class SessionBudget:
+    """Usage and limits for one flow run; thread-safe, snapshot is plain JSON."""
+
+    def __init__(self, limits: Optional[BudgetLimits] = None,
+                 on_change: Optional[Callable[[dict], None]] = None):
+        self.limits = limits or BudgetLimits()
+        self.on_change = on_change
+        self.tokens = 0
+        self.calls = 0
+        self.cost = 0.0
+        self.by_agent: Dict[str, Dict[str, float]] = {}
+        self.rounds: Counter = Counter()
+        self.degraded: list = []          # fallbacks taken, in order
+        self._lock = threading.Lock()
+
+    def configure(self, limits: BudgetLimits) -> None:
+        """Swap in the limits once the student's grade is known."""
+        self.limits = limits
+        self._changed()
+
+    # ---------- accounting ----------
+    def charge(self, role: str, prompt_tokens: int, completion_tokens: int,
+               model: str = "") -> None:
+        cost = price(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            row = self.by_agent.setdefault(role, {"calls": 0, "prompt_tokens": 0,
+                                                  "completion_tokens": 0, "cost": 0.0})
+            row["calls"] += 1
+            row["prompt_tokens"] += prompt_tokens
+            row["completion_tokens"] += completion_tokens
+            row["cost"] += cost
+            self.calls += 1
+            self.tokens += prompt_tokens + completion_tokens
+            self.cost += cost
+        self._changed()
+
+    def tick(self, loop: str) -> int:
+        """Count one more round of `loop` ("brainstorm", "review") and return the total."""
+        with self._lock:
+            self.rounds[loop] += 1
+            n = self.rounds[loop]
+        self._changed()
+        return n
+
+    def note(self, fallback: str) -> None:
+        """Record a degradation the flow chose, e.g. "coach:local"."""
+        with self._lock:
+            self.degraded.append(fallback)
+        self._changed()
+
+    # ---------- decisions ----------
+    @property
+    def left(self) -> float:
+        """Smallest remaining share across tokens, calls and cost (0..1)."""
+        lim = self.limits
+        shares = [1 - self.tokens / lim.tokens if lim.tokens else 1.0,
+                  1 - self.calls / lim.calls if lim.calls else 1.0,
+                  1 - self.cost / lim.cost if lim.cost else 1.0]
+        return max(0.0, min(shares))
+
+    @property
+    def level(self) -> str:
+        left = self.left
+        if left <= 0:
+            return "exhausted"
+        if left < self.limits.critical:
+            return "critical"
+        if left < self.limits.low:
+            return "low"
+        return "ok"
+
+    @property
+    def exhausted(self) -> bool:
+        return self.level == "exhausted"
+
+    def allow(self, loop: Optional[str] = None, essential: bool = False) -> bool:
+        """May the flow make this call? Optional calls stop at "critical", essential
+        ones at "exhausted"; a loop also stops once its round cap is reached."""
+        cap = {"brainstorm": self.limits.brainstorm_turns,
+               "review": self.limits.review_rounds}.get(loop)
+        if cap is not None and self.rounds[loop] >= cap:
+            return False
+        return LEVELS.index(self.level) < LEVELS.index("exhausted" if essential else "critical")
+
+    def scaled(self, tokens: int) -> int:
+        """A prompt-size allowance, halved once the budget runs low."""
+        return tokens if self.level == "ok" else tokens // 2
+
+    def model_for(self, current: str) -> Optional[str]:
+        """The model to switch to at this level, or None to keep `current`."""
+        cheap = self.limits.cheap_model
+        if cheap and self.level != "ok" and current.split("/")[-1] != cheap.split("/")[-1]:
+            return cheap
+        return None
+
+    def check(self, role: str) -> None:
+        if self.exhausted:
+            raise BudgetExceeded(f"session budget exhausted before a {role} call "
+                                 f"({self.tokens} tokens, {self.calls} calls, ${self.cost:.4f})")
+
+    def restore(self, snapshot: Optional[dict]) -> None:
+        """Continue from a `snapshot()` (e.g. the one saved in a checkpoint)."""
+        if not snapshot:
+            return
+        with self._lock:
+            self.limits = BudgetLimits(**_known(snapshot.get("limits", {})))
+            used = snapshot.get("used", {})
+            self.tokens = used.get("tokens", 0)
+            self.calls = used.get("calls", 0)
+            self.cost = used.get("cost", 0.0)
+            self.by_agent = {k: dict(v) for k, v in snapshot.get("by_agent", {}).items()}
+            self.rounds = Counter(snapshot.get("rounds", {}))
+            self.degraded = list(snapshot.get("degraded", []))
+
+    # ---------- exposure ----------
+    def remaining(self) -> dict:
+        lim = self.limits
+        return {"tokens": max(0, lim.tokens - self.tokens),
+                "calls": max(0, lim.calls - self.calls),
+                "cost": round(max(0.0, lim.cost - self.cost), 6)}
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "level": self.level,
+                "left": round(self.left, 3),
+                "remaining": self.remaining(),
+                "used": {"tokens": self.tokens, "calls": self.calls, "cost": round(self.cost, 6)},
+                "by_agent": {k: dict(v) for k, v in self.by_agent.items()},
+                "rounds": dict(self.rounds),
+                "degraded": list(self.degraded),
+                "limits": asdict(self.limits),
+            }
+
+    def _changed(self) -> None:
+        if self.on_change is not None:
+            self.on_change(self.snapshot())
+
+
+_current: ContextVar[Optional[SessionBudget]] = ContextVar("session_budget", default=None)
+
+
+@contextmanager
+def budget_scope(budget: Optional[SessionBudget]):
+    """Charge every agent call made inside this block to `budget`."""
+    token = _current.set(budget)
+    try:
+        yield budget
+    finally:
+        _current.reset(token)
+
+
+def current_budget() -> Optional[SessionBudget]:
+    return _current.get()
+
+
+class BudgetedFlow:
+    """Flow mixin: runs kickoff inside `self.budget`'s scope.
+
+    On a checkpoint resume the budget is restored from the last logged state,
+    so a restarted session cannot spend its allowance twice.
+
+        class EssayCoachFlow(BudgetedFlow, Flow[dict]): ...
+    """
+
+    budget: SessionBudget
+
+    def kickoff(self, *args, **kwargs):
+        self._resume_budget()
+        with budget_scope(self.budget):
+            return super().kickoff(*args, **kwargs)
+
+    async def kickoff_async(self, *args, **kwargs):
+        self._resume_budget()
+        with budget_scope(self.budget):
+            return await super().kickoff_async(*args, **kwargs)
+
+    def _resume_budget(self) -> None:
+        checkpoint = getattr(self, "checkpoint", None)
+        if checkpoint is not None and checkpoint.resumed:
+            self.budget.restore(checkpoint.last_state().get("budget"))
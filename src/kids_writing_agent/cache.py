@@ -0,0 +1,296 @@
+"""
+Content-addressed cache for agent kickoffs.
+
+Results are keyed on (agent role, model, normalized prompt) and stored in a
+small SQLite file so they survive restarts and are shared between worker
+processes. Entries expire after `ttl` seconds and the least recently used
+ones are evicted once the store grows past `max_entries` or `max_bytes`.
+
+Agents opt in individually through `CachedAgent(kickoff_cache=True)`; it works
+for `Agent.kickoff(...)` in the flows and for `execute_task` inside a Crew.
+Cached or not, every `CachedAgent` call is reported to the metrics recorder;
+model calls made inside a `budget_scope` are also charged to that session's
+budget, which can switch the agent to a cheaper model or refuse the call.
+Every model call first takes a permit from the process-wide rate limiter.
+"""
+import copy
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from crewai import LLM, Agent
+from crewai.lite_agent import LiteAgentOutput
+from crewai.utilities.llm_utils import create_llm
+from pydantic import Field, PrivateAttr
+
+from kids_writing_agent.budget import current_budget
+from kids_writing_agent.memory import estimate_tokens
+from kids_writing_agent.metrics import default_recorder
+from kids_writing_agent.profile_store import DATA_DIR
+from kids_writing_agent.ratelimit import COMPLETION_ESTIMATE, default_limiter
+
+DEFAULT_CACHE_PATH = DATA_DIR / "kickoff_cache.sqlite"
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so cosmetic differences hit the same entry."""
+    return re.sub(r"\s+", " ", prompt).strip()
+
+
+class KickoffCache:
+    """On-disk kickoff cache with TTL, size-based LRU eviction and counters."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl: float = 7 * 24 * 3600,
+                 max_entries: int = 10_000, max_bytes: int = 64 * 1024 * 1024):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.misses: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS kickoffs ("
+            " key TEXT PRIMARY KEY, role TEXT NOT NULL, value TEXT NOT NULL,"
+            " size INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS kickoffs_accessed ON kickoffs (accessed)")
+        self._db.commit()
+
+    @staticmethod
+    def make_key(role: str, model: str, prompt: str) -> str:
+        payload = "\0".join((role, model, normalize_prompt(prompt)))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, role: str = "") -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, created FROM kickoffs WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                self.misses[role] += 1
+                return None
+            with self._db:
+                self._db.execute("UPDATE kickoffs SET accessed = ? WHERE key = ?", (now, key))
+            self.hits[role] += 1
+            return row[0]
+
+    def put(self, key: str, role: str, value: str) -> None:
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO kickoffs (key, role, value, size, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, role, value, len(value.encode("utf-8")), now, now),
+            )
+            self._evict(now)
+
+    def clear(self) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM kickoffs")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM kickoffs"
+            ).fetchone()
+        roles = sorted(set(self.hits) | set(self.misses))
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": sum(self.hits.values()),
+            "misses": sum(self.misses.values()),
+            "by_role": {r: {"hits": self.hits[r], "misses": self.misses[r]} for r in roles},
+        }
+
+    def _evict(self, now: float) -> None:
+        self._db.execute("DELETE FROM kickoffs WHERE created < ?", (now - self.ttl,))
+        entries, size = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM kickoffs"
+        ).fetchone()
+        rows = self._db.execute("SELECT key, size FROM kickoffs ORDER BY accessed")
+        doomed = []
+        for key, row_size in rows:
+            if entries <= self.max_entries and size <= self.max_bytes:
+                break
+            doomed.append((key,))
+            entries -= 1
+            size -= row_size
+        self._db.executemany("DELETE FROM kickoffs WHERE key = ?", doomed)
+
+
+_default_cache: Optional[KickoffCache] = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> KickoffCache:
+    """Process-wide cache at data/kickoff_cache.sqlite, created on first use."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = KickoffCache()
+        return _default_cache
+
+
+class CachedAgent(Agent):
+    """Agent that serves repeated prompts from the kickoff cache when opted in
+    and records every call with the metrics recorder."""
+
+    kickoff_cache: bool = Field(
+        default=False, description="Serve identical prompts from the kickoff cache."
+    )
+    # cheaper-model copies by model name; they live and die with this agent
+    _twins: Dict[str, "CachedAgent"] = PrivateAttr(default_factory=dict)
+
+    def kickoff(self, messages, response_format=None):
+        agent = self._budgeted()
+        if agent is not self:
+            return agent.kickoff(messages, response_format=response_format)
+        with default_recorder().track("kickoff", self.role) as rec:
+            key = self._kickoff_key(messages, response_format)
+            cached = self._lookup(key)
+            if cached is not None:
+                rec.cache_hit = True
+                return cached
+            self._check_budget()
+            permit = default_limiter().acquire(self._estimate(messages))
+            rec.queued = permit.waited
+            try:
+                output = super().kickoff(messages, response_format=response_format)
+                rec.set_usage(messages, output)
+            finally:            # a failed call (429, timeout) gives back what it did not use
+                permit.settle(rec.prompt_tokens + rec.completion_tokens, requests=1 + rec.retries)
+            self._charge(rec)
+            self._store(key, output.raw)
+            return output
+
+    async def kickoff_async(self, messages, response_format=None):
+        agent = self._budgeted()
+        if agent is not self:
+            return await agent.kickoff_async(messages, response_format=response_format)
+        with default_recorder().track("kickoff", self.role) as rec:
+            key = self._kickoff_key(messages, response_format)
+            cached = self._lookup(key)
+            if cached is not None:
+                rec.cache_hit = True
+                return cached
+            self._check_budget()
+            permit = await default_limiter().acquire_async(self._estimate(messages))
+            rec.queued = permit.waited
+            try:
+                output = await super().kickoff_async(messages, response_format=response_format)
+                rec.set_usage(messages, output)
+            finally:            # a failed call (429, timeout) gives back what it did not use
+                permit.settle(rec.prompt_tokens + rec.completion_tokens, requests=1 + rec.retries)
+            self._charge(rec)
+            self._store(key, output.raw)
+            return output
+
+    def execute_task(self, task, context=None, tools=None):
+        with default_recorder().track("task", self.role) as rec:
+            prompt = f"{task.prompt()}\n{context or ''}"
+            cache = default_cache() if self.kickoff_cache and not task.human_input else None
+            key = cache.make_key(self.role, self._model_name(), prompt) if cache else None
+            raw = cache.get(key, self.role) if cache else None
+            if raw is not None:
+                rec.cache_hit = True
+                return raw
+            self._check_budget()
+            permit = default_limiter().acquire(self._estimate(prompt))
+            rec.queued = permit.waited
+            counter = self._token_process
+            requests_before, tokens_before = counter.successful_requests, counter.total_tokens
+            finished = False
+            try:
+                result = super().execute_task(task, context=context, tools=tools)
+                rec.set_usage(prompt, result)
+                finished = True
+            finally:
+                # a task result carries no usage; the agent's token counter does,
+                # except for a last request that failed
+                requests = counter.successful_requests - requests_before + (not finished)
+                rec.retries = max(0, requests - 1)
+                used = (rec.prompt_tokens + rec.completion_tokens if finished
+                        else counter.total_tokens - tokens_before)
+                permit.settle(used, requests=max(1, requests))
+            self._charge(rec)
+            if cache:
+                cache.put(key, self.role, str(result))
+            return result
+
+    # ---------- session budget ----------
+    def _budgeted(self) -> "CachedAgent":
+        """This agent, or its cheaper-model twin once the session budget runs low."""
+        budget = current_budget()
+        model = budget.model_for(self._model_name()) if budget else None
+        return self if model is None else _cheaper_twin(self, model)
+
+    def _check_budget(self) -> None:
+        budget = current_budget()
+        if budget is not None:
+            budget.check(self.role)
+
+    def _charge(self, rec) -> None:
+        budget = current_budget()
+        if budget is not None:
+            budget.charge(self.role, rec.prompt_tokens, rec.completion_tokens, self._model_name())
+
+    # ---------- shared rate limit ----------
+    @staticmethod
+    def _estimate(messages) -> int:
+        """Tokens to reserve before the call; settled with the real usage after."""
+        text = messages if isinstance(messages, str) else str(messages)
+        return estimate_tokens(text) + COMPLETION_ESTIMATE
+
+    def _kickoff_key(self, messages, response_format) -> Optional[str]:
+        if not self.kickoff_cache or response_format is not None or not isinstance(messages, str):
+            return None
+        return default_cache().make_key(self.role, self._model_name(), messages)
+
+    def _lookup(self, key: Optional[str]) -> Optional[LiteAgentOutput]:
+        if key is None:
+            return None
+        raw = default_cache().get(key, self.role)
+        return None if raw is None else LiteAgentOutput(raw=raw, agent_role=self.role)
+
+    def _store(self, key: Optional[str], raw: str) -> None:
+        if key is not None:
+            default_cache().put(key, self.role, raw)
+
+    def _model_name(self) -> str:
+        return str(getattr(self.llm, "model", self.llm))
+
+
+_twins_lock = threading.Lock()
+
+
+def _cheaper_twin(agent: CachedAgent, model: str) -> CachedAgent:
+    """A copy of `agent` on `model`, built once per model and kept on the agent."""
+    with _twins_lock:
+        twin = agent._twins.get(model)
+        if twin is None:
+            twin = agent.copy()
+            twin.llm = _llm_on(agent.llm, model)
+            agent._twins[model] = twin
+        return twin
+
+
+def _llm_on(llm, model: str):
+    """`llm` with only its model swapped: streaming, temperature, api_base... are kept."""
+    if not isinstance(llm, LLM):
+        return create_llm(model)
+    twin = copy.copy(llm)
+    twin.model = model
+    twin.is_anthropic = twin._is_anthropic_model(model)
+    twin.context_window_size = 0            # recomputed for the new model on first use
+    return twin
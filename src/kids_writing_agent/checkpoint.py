@@ -0,0 +1,253 @@
+"""
+Crash-safe checkpoints for essay-coach flows.
+
+Each completed flow step appends one delta row to a SQLite log keyed by
+session (and tagged with the student's `user_id`): only the top-level keys of
+the step result and flow state that changed since the previous step are
+written. When a flow restarts with the same session id, steps decorated with
+`@checkpointed` replay their logged results in order instead of running, so
+no agent that already succeeded is called again; the first step past the log
+runs live.
+
+    class EssayCoachFlow(Flow[dict]):
+        @listen(outline)
+        @checkpointed
+        def collect_draft(self, data): ...
+
+    flow = EssayCoachFlow(checkpoint=default_checkpoints().session(sid, "demo_user"))
+"""
+import asyncio
+import functools
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from kids_writing_agent.profile_store import DATA_DIR
+
+DEFAULT_CHECKPOINT_PATH = DATA_DIR / "checkpoints.sqlite"
+
+_MISSING = object()
+
+
+def _flatten(result: Any, state: Any) -> Dict[str, str]:
+    """Snapshot as {key: json}; dicts are split one level so deltas stay small."""
+    flat: Dict[str, str] = {}
+    for prefix, value in (("result", result), ("state", state)):
+        if isinstance(value, BaseModel):
+            value = value.model_dump()
+        if isinstance(value, dict):
+            for k, v in value.items():
+                flat[f"{prefix}.{k}"] = json.dumps(v, default=str)
+        else:
+            flat[prefix] = json.dumps(value, default=str)
+    return flat
+
+
+def _unflatten(flat: Dict[str, str], prefix: str) -> Any:
+    if prefix in flat:
+        return json.loads(flat[prefix])
+    cut = len(prefix) + 1
+    return {k[cut:]: json.loads(v) for k, v in flat.items() if k.startswith(prefix + ".")}
+
+
+class CheckpointStore:
+    """Append-only log of per-step state deltas, one SQLite file per deployment."""
+
+    def __init__(self, path=DEFAULT_CHECKPOINT_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS flow_sessions ("
+            " session_id TEXT PRIMARY KEY, user_id TEXT NOT NULL, status TEXT NOT NULL,"
+            " steps INTEGER NOT NULL, created REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS flow_deltas ("
+            " session_id TEXT NOT NULL, seq INTEGER NOT NULL, step TEXT NOT NULL,"
+            " delta TEXT NOT NULL, created REAL NOT NULL, PRIMARY KEY (session_id, seq))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS flow_sessions_user ON flow_sessions (user_id)")
+        self._db.commit()
+
+    def session(self, session_id: str, user_id: str) -> "FlowCheckpoint":
+        """Open (or resume) the checkpoint log for one flow run."""
+        return FlowCheckpoint(self, session_id, user_id)
+
+    def append(self, session_id: str, user_id: str, seq: int, step: str,
+               changed: Dict[str, str], removed: List[str]) -> None:
+        now = time.time()
+        delta = json.dumps({"set": changed, "del": removed})
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO flow_sessions (session_id, user_id, status, steps, created, updated)"
+                " VALUES (?, ?, 'open', ?, ?, ?)"
+                " ON CONFLICT(session_id) DO UPDATE SET status = 'open', steps = excluded.steps,"
+                " updated = excluded.updated, user_id = excluded.user_id",
+                (session_id, user_id, seq + 1, now, now),
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO flow_deltas (session_id, seq, step, delta, created)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (session_id, seq, step, delta, now),
+            )
+
+    def history(self, session_id: str) -> List[Tuple[str, Dict[str, str]]]:
+        """[(step, full snapshot after that step)] rebuilt from the deltas."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT step, delta FROM flow_deltas WHERE session_id = ? ORDER BY seq",
+                (session_id,),
+            ).fetchall()
+        snapshot: Dict[str, str] = {}
+        out = []
+        for step, raw in rows:
+            delta = json.loads(raw)
+            for key in delta["del"]:
+                snapshot.pop(key, None)
+            snapshot.update(delta["set"])
+            out.append((step, dict(snapshot)))
+        return out
+
+    def finish(self, session_id: str, status: str = "done") -> None:
+        """Close the session and drop its deltas; a new run with this id starts fresh."""
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE flow_sessions SET status = ?, updated = ? WHERE session_id = ?",
+                (status, time.time(), session_id),
+            )
+            self._db.execute("DELETE FROM flow_deltas WHERE session_id = ?", (session_id,))
+
+    def truncate(self, session_id: str, keep: int) -> None:
+        """Forget every delta after the first `keep` steps."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM flow_deltas WHERE session_id = ? AND seq >= ?",
+                             (session_id, keep))
+
+    def open_sessions(self, user_id: Optional[str] = None) -> List[dict]:
+        query = ("SELECT session_id, user_id, steps, updated FROM flow_sessions"
+                 " WHERE status = 'open'")
+        args: tuple = ()
+        if user_id is not None:
+            query += " AND user_id = ?"
+            args = (user_id,)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY updated DESC", args).fetchall()
+        return [dict(zip(("session_id", "user_id", "steps", "updated"), r)) for r in rows]
+
+
+class FlowCheckpoint:
+    """One flow run's view of the log: replays logged steps, then records new ones."""
+
+    def __init__(self, store: CheckpointStore, session_id: str, user_id: str):
+        self.store = store
+        self.session_id = session_id
+        self.user_id = user_id
+        history = store.history(session_id)
+        self._replay = deque(history)
+        self._last: Dict[str, str] = {}
+        self.resumed = bool(history)
+        self.replayed: List[str] = []
+        self._live = 0
+
+    def last_state(self) -> Dict[str, Any]:
+        """Flow state as of the last logged step ({} for a fresh session)."""
+        return _unflatten(self._replay[-1][1], "state") if self._replay else {}
+
+    def replay(self, flow, step: str) -> Tuple[bool, Any]:
+        """(True, result) if `step` is next in the log; restores the flow state too."""
+        if not self._replay:
+            return False, None
+        if self._replay[0][0] != step:
+            self._diverge()
+            return False, None
+        _, snapshot = self._replay.popleft()
+        self._last = snapshot
+        state = _unflatten(snapshot, "state")
+        if isinstance(flow.state, dict):
+            flow.state.update(state)
+        else:
+            for k, v in state.items():
+                if hasattr(flow.state, k):
+                    setattr(flow.state, k, v)
+        self.replayed.append(step)
+        return True, _unflatten(snapshot, "result")
+
+    def save(self, flow, step: str, result: Any) -> None:
+        if self._replay:
+            self._diverge()
+        snapshot = _flatten(result, flow.state)
+        if "result" in snapshot:
+            # routers return a label: keep the last dict result so the next step's delta is small
+            snapshot.update((k, v) for k, v in self._last.items() if k.startswith("result."))
+        changed = {k: v for k, v in snapshot.items() if self._last.get(k, _MISSING) != v}
+        removed = [k for k in self._last if k not in snapshot]
+        self.store.append(self.session_id, self.user_id, len(self.replayed) + self._live,
+                          step, changed, removed)
+        self._last = snapshot
+        self._live += 1
+
+    def finish(self) -> None:
+        self.store.finish(self.session_id)
+
+    def _diverge(self) -> None:
+        """The flow took another path: forget the unreplayed log and run live."""
+        self._replay.clear()
+        self.store.truncate(self.session_id, len(self.replayed))
+
+
+def checkpointed(method):
+    """Step decorator: replay from `self.checkpoint` if logged, else run and log.
+
+    Put it under `@start`/`@listen`/`@router` so the flow decorators see the wrapper.
+    """
+    step = method.__name__
+
+    if asyncio.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            cp: Optional[FlowCheckpoint] = getattr(self, "checkpoint", None)
+            if cp is None:
+                return await method(self, *args, **kwargs)
+            hit, result = cp.replay(self, step)
+            if hit:
+                return result
+            result = await method(self, *args, **kwargs)
+            await asyncio.to_thread(cp.save, self, step, result)
+            return result
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cp: Optional[FlowCheckpoint] = getattr(self, "checkpoint", None)
+        if cp is None:
+            return method(self, *args, **kwargs)
+        hit, result = cp.replay(self, step)
+        if hit:
+            return result
+        result = method(self, *args, **kwargs)
+        cp.save(self, step, result)
+        return result
+    return wrapper
+
+
+_default: Optional[CheckpointStore] = None
+_default_lock = threading.Lock()
+
+
+def default_checkpoints() -> CheckpointStore:
+    """Process-wide store at data/checkpoints.sqlite, created on first use."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = CheckpointStore()
+        return _default
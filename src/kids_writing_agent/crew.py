@@ -1,25 +1,31 @@
 # src/latest_ai_development/crew.py
 import os
 from crewai import Agent, Crew, Process, Task
-from crewai.project import CrewBase, agent, crew, task, before_kickoff, after_kickoff
-from crewai_tools import SerperDevTool
+from crewai.project import CrewBase, agent, crew, task, tool, before_kickoff, after_kickoff
 from crewai.agents.agent_builder.base_agent import BaseAgent
-from typing import List
-from src.kids_writing_agent.tools.profile_loader import ProfileLoader
-from crewai_tools import FileReadTool
-from crewai.telemetry import Telemetry
+from typing import List, Optional
+from kids_writing_agent.cache import CachedAgent, default_cache
+from kids_writing_agent.metrics import default_recorder
+from kids_writing_agent.tools.ask_student import AskStudentTool
 
+# Telemetry is switched off in kids_writing_agent/__init__.py, before crewAI loads.
 
-def noop(*args, **kwargs):
-    # with open("./logfile.txt", "a") as f:
-    #     f.write("Telemetry method called and noop'd\n")
-    pass
+# sequential: tasks run in tasks.yaml order and each one sees only the outputs
+#             listed in its `context` (no manager LLM in the loop)
+# hierarchical: the manager agent decides and delegates every task
+PROCESSES = {"sequential": Process.sequential, "hierarchical": Process.hierarchical}
 
 
-for attr in dir(Telemetry):
-    if callable(getattr(Telemetry, attr)) and not attr.startswith("__"):
-        setattr(Telemetry, attr, noop)
-os.environ["OTEL_SDK_DISABLED"] = "true"
+def check_task_order(tasks: List[Task]) -> None:
+  """Static routing needs every `context` task to run before its consumer."""
+  seen = set()
+  for t in tasks:
+    for dep in t.context or []:
+      if id(dep) not in seen:
+        raise ValueError(f"task {t.name or t.description[:40]!r} needs {dep.name!r}, "
+                         "which is listed after it in tasks.yaml")
+    seen.add(id(t))
+
 
 @CrewBase
 class KidsWritingAgent():
@@ -28,6 +34,11 @@ class KidsWritingAgent():
   agents: List[BaseAgent]
   tasks: List[Task]
 
+  def __init__(self, process: Optional[str] = None):
+    self.process = process or os.getenv("WRITEPAL_CREW_PROCESS", "sequential")
+    if self.process not in PROCESSES:
+      raise ValueError(f"process must be one of {sorted(PROCESSES)}, not {self.process!r}")
+
 
   @before_kickoff
   def before_kickoff_function(self, inputs):
@@ -37,14 +48,23 @@ class KidsWritingAgent():
   @after_kickoff
   def after_kickoff_function(self, result):
     print(f"After kickoff function with result: {result}")
+    print(f"Kickoff cache: {default_cache().stats()}")
+    print(f"Agent calls:\n{default_recorder().format_summary()}")
     return result # You can return the result or modify it as needed
   
+  ##################
+  # Tools
+  ##################
+  @tool
+  def ask_student(self):
+    return AskStudentTool()
+
   ##################
   # Agents
   ##################
   @agent
   def profile_manager(self) -> Agent:
-    return Agent(
+    return CachedAgent(
       config=self.agents_config['profile_manager'], # type: ignore[index]
       verbose=True,
       # tools=[FileReadTool(file_path='../../data/profiles.json')]
@@ -52,44 +72,48 @@ class KidsWritingAgent():
   
   @agent
   def conversation_guide(self) -> Agent:
-    return Agent(
+    return CachedAgent(
       config=self.agents_config['conversation_guide'], # type: ignore[index]
       verbose=True
     )
   
   @agent
   def outline_planner(self) -> Agent:
-    return Agent(
+    return CachedAgent(
       config=self.agents_config['outline_planner'], # type: ignore[index]
-      verbose=True
+      verbose=True,
+      kickoff_cache=True,
     )
   
   @agent
   def reviewer(self) -> Agent:
-    return Agent(
+    return CachedAgent(
       config=self.agents_config['reviewer'], # type: ignore[index]
-      verbose=True
+      verbose=True,
+      kickoff_cache=True,
     )
   
   @agent
   def manager(self) -> Agent:
-    return Agent(
+    return CachedAgent(
       config=self.agents_config['manager'], # type: ignore[index]
       verbose=True
     )
   
   @agent
   def improvement_coach(self) -> Agent:
-    return Agent(
+    return CachedAgent(
       config=self.agents_config['improvement_coach'], # type: ignore[index]
-      verbose=True
+      verbose=True,
+      kickoff_cache=True,
     )
   
   @agent
   def progress_analyst(self) -> Agent:
-    return Agent(
+    return CachedAgent(
       config=self.agents_config['progress_analyst'], # type: ignore[index]
-      verbose=True
+      verbose=True,
+      kickoff_cache=True,
     )
   
   ##################
@@ -103,9 +127,9 @@ class KidsWritingAgent():
     )
   
   @task
-  def collect_writing_specs(self) -> Task:
+  def collect_writing_ideas(self) -> Task:
     return Task(
-      config=self.tasks_config['collect_writing_specs'], # type: ignore[index]
+      config=self.tasks_config['collect_writing_ideas'], # type: ignore[index]
     )
   
   @task
@@ -141,6 +165,9 @@ class KidsWritingAgent():
   @crew
   def crew(self) -> Crew:
     """Creates the LatestAiDevelopment crew"""
+    hierarchical = self.process == "hierarchical"
+    if not hierarchical:
+      check_task_order(self.tasks)
     return Crew(
       agents=[self.profile_manager(), 
               self.conversation_guide(),
@@ -149,8 +176,7 @@ class KidsWritingAgent():
               self.improvement_coach(),
               self.progress_analyst()], # Automatically created by the @agent decorator
       tasks=self.tasks, # Automatically created by the @task decorator
-      manager_agent=self.manager(),
-      process=Process.hierarchical,
-      # process=Process.sequential,
+      manager_agent=self.manager() if hierarchical else None,
+      process=PROCESSES[self.process],
       verbose=True,
     )
\ No newline at end of file
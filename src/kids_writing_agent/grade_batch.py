@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+"""
+Bulk-grade a folder (or JSONL file) of essays with the reviewer rubric.
+
+    grade_batch essays/ -o grades.jsonl --topic "My Favorite Animal" --grade 3
+
+Each essay is first pre-scored locally; only drafts the rubric engine cannot
+settle go to the `reviewer` agent. Reviewer calls run concurrently, bounded
+by `--concurrency` and paced by the process's shared rate limiter
+(`WRITEPAL_RPM`, or `--max-rpm`); they run at "batch" priority, so in a
+process that also serves students they queue behind interactive turns.
+Results are appended to the output file as each essay finishes, and essays
+already graded there are skipped, so an interrupted job resumes where it
+stopped; essays that failed (a 429, a timeout) are graded again.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Iterator
+
+import yaml
+
+from kids_writing_agent.cache import CachedAgent
+from kids_writing_agent.http_pool import install_pool, pool_stats
+from kids_writing_agent.metrics import default_recorder, session_scope
+from kids_writing_agent.ratelimit import default_limiter, priority_scope
+from kids_writing_agent.rubric import pre_score
+from kids_writing_agent.state import GRADE_GUIDE, Review
+from kids_writing_agent.structured import aparse_structured, acorrect_with
+
+CONFIG_DIR = Path(__file__).resolve().parent / "config"
+ESSAY_SUFFIXES = {".txt", ".md"}
+
+
+def _load_yaml(name: str) -> dict:
+    with open(CONFIG_DIR / name, encoding="utf-8") as fp:
+        return yaml.safe_load(fp)
+
+
+def iter_essays(source: Path, topic: str, grade: int) -> Iterator[dict]:
+    """Yield `{"id", "essay", "topic", "grade"}` records without loading them all.
+
+    Files in a folder are keyed by their path relative to it, so `a.txt` and
+    `a.md` stay two essays. A JSONL line that cannot be read is yielded as
+    `{"id", "error"}` (keyed by line number) instead of stopping the job.
+    """
+    if source.is_dir():
+        for path in sorted(source.iterdir()):
+            if path.suffix.lower() in ESSAY_SUFFIXES:
+                yield {"id": path.relative_to(source).as_posix(),
+                       "essay": path.read_text(encoding="utf-8"),
+                       "topic": topic, "grade": grade}
+        return
+    with open(source, encoding="utf-8") as fp:
+        for n, line in enumerate(fp, 1):
+            if not line.strip():
+                continue
+            try:
+                rec = json.loads(line)
+                essay = {
+                    "id": str(rec.get("id", n)),
+                    "essay": rec.get("essay") or rec.get("draft") or rec.get("text", ""),
+                    "topic": rec.get("topic", topic),
+                    "grade": int(rec.get("grade", grade)),
+                }
+            except (ValueError, AttributeError, TypeError) as exc:
+                essay = {"id": str(n), "error": f"unreadable line {n}: {exc!r}"}
+            yield essay
+
+
+def done_ids(output: Path) -> set:
+    """Ids graded successfully in `output`; error rows are left to retry."""
+    if not output.exists():
+        return set()
+    ids = set()
+    with open(output, encoding="utf-8") as fp:
+        for line in fp:
+            try:
+                row = json.loads(line)
+                if "error" not in row:
+                    ids.add(row["id"])
+            except (ValueError, KeyError, TypeError):
+                continue          # a line cut short by a crash is re-graded
+    return ids
+
+
+class BatchGrader:
+    def __init__(self, output: Path, concurrency: int = 8):
+        agent_cfg = _load_yaml("agents.yaml")["reviewer"]
+        rubric = _load_yaml("tasks.yaml")["evaluate_draft"]["description"]
+        self.rubric = rubric.replace("{% raw %}", "").replace("{% endraw %}", "").strip()
+        self.reviewer = CachedAgent(config=agent_cfg, verbose=False, kickoff_cache=True)
+        self.output = output
+        self.concurrency = concurrency
+        self.counts = {"reviewer": 0, "rubric": 0, "errors": 0, "skipped": 0}
+
+    def review_prompt(self, rec: dict, guide: dict, findings) -> str:
+        return (
+            f"{self.rubric}\n\n"
+            f"Grade: {rec['grade']}. Topic: {rec['topic'] or 'free choice'}.\n"
+            f"Expected length: {guide['min_words']}-{guide['max_words']} words, "
+            f"at least {guide['paras']} paragraphs.\n\n"
+            f"{findings.as_prompt()}\n\nDraft:\n{rec['essay']}"
+        )
+
+    async def grade(self, rec: dict) -> dict:
+        started = time.perf_counter()
+        guide = GRADE_GUIDE.get(rec["grade"], GRADE_GUIDE[3])
+        findings = pre_score(rec["essay"], guide, grade=rec["grade"])
+        if findings.verdict is not None:
+            return {"id": rec["id"], **findings.verdict, "source": "rubric",
+                    "seconds": round(time.perf_counter() - started, 3)}
+
+        reply = (await self.reviewer.kickoff_async(
+            self.review_prompt(rec, guide, findings))).raw
+        review = await aparse_structured(reply, Review, fix=acorrect_with(self.reviewer, Review))
+        return {"id": rec["id"], **review.model_dump(), "source": "reviewer",
+                "seconds": round(time.perf_counter() - started, 3)}
+
+    async def run(self, essays: Iterator[dict]) -> dict:
+        finished = done_ids(self.output)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        with open(self.output, "a", encoding="utf-8") as out:
+            async def worker():
+                while True:
+                    rec = await queue.get()
+                    if rec is None:
+                        return
+                    try:
+                        with session_scope(f"batch:{rec['id']}"), priority_scope("batch"):
+                            result = await self.grade(rec)
+                        self.counts[result["source"]] += 1
+                    except Exception as exc:
+                        result = {"id": rec["id"], "error": repr(exc)}
+                        self.counts["errors"] += 1
+                    out.write(json.dumps(result) + "\n")
+                    out.flush()
+                    print(f"{rec['id']}: {result.get('score', result.get('error'))}")
+
+            workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+            for rec in essays:
+                if rec["id"] in finished:
+                    self.counts["skipped"] += 1
+                    continue
+                if "error" in rec:                  # a malformed input line
+                    self.counts["errors"] += 1
+                    out.write(json.dumps(rec) + "\n")
+                    print(f"{rec['id']}: {rec['error']}")
+                    continue
+                await queue.put(rec)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        return self.counts
+
+
+def run():
+    """Entry point for the `grade_batch` script."""
+    parser = argparse.ArgumentParser(description="Bulk-grade essays with the reviewer rubric.")
+    parser.add_argument("source", type=Path, help="directory of .txt/.md essays or a JSONL file")
+    parser.add_argument("-o", "--output", type=Path, default=Path("grades.jsonl"))
+    parser.add_argument("--topic", default="")
+    parser.add_argument("--grade", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-rpm", type=int, default=None,
+                        help="requests per minute for the shared rate limiter "
+                             "(default: WRITEPAL_RPM)")
+    args = parser.parse_args(sys.argv[1:])
+
+    install_pool()
+    if args.max_rpm:
+        limiter = default_limiter()
+        limiter.configure(rpm=args.max_rpm, tpm=limiter.tpm)
+    grader = BatchGrader(args.output, concurrency=args.concurrency)
+    started = time.perf_counter()
+    counts = asyncio.run(grader.run(iter_essays(args.source, args.topic, args.grade)))
+    print(f"Done in {time.perf_counter() - started:.1f}s: {counts} → {args.output}")
+    print(default_recorder().format_summary())
+    print(f"Rate limiter: {default_limiter().stats()}")
+    print(f"HTTP pool: {pool_stats()}")
+
+
+if __name__ == "__main__":
+    run()
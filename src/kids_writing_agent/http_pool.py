@@ -0,0 +1,145 @@
+"""
+Shared keep-alive HTTP pool for model requests.
+
+crewAI sends every model call through litellm's synchronous completion path,
+also for `kickoff_async`. `install_pool()` hands litellm one bounded
+`httpx.Client` (`litellm.client_session`), so every agent and session in the
+process reuses warm connections instead of paying TCP and TLS setup per call.
+The transport caps connections per host on top of httpx's global limits and
+counts requests, new connections, TLS handshakes and waits for a host slot.
+
+    from kids_writing_agent.http_pool import install_pool, pool_stats
+    install_pool()                      # once, at start-up, before the first call
+    metrics.add_gauge("writepal_http_pool", "Model HTTP pool.", pool_stats)
+
+Limits come from WRITEPAL_HTTP_MAX_CONNECTIONS (100), WRITEPAL_HTTP_PER_HOST
+(20) and WRITEPAL_HTTP_KEEPALIVE (seconds an idle connection is kept, 30).
+"""
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+import httpx
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """Response body that frees the host slot once it is closed."""
+
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+
+class PooledTransport(httpx.HTTPTransport):
+    """HTTPTransport with a per-host connection cap and connection counters."""
+
+    def __init__(self, per_host: int = 20, **kwargs):
+        super().__init__(**kwargs)
+        self.per_host = per_host
+        self.counts: Counter = Counter()
+        self.host_wait = 0.0
+        self.in_flight: Counter = Counter()
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        with self._lock:
+            slot = self._slots.setdefault(host, threading.BoundedSemaphore(self.per_host))
+        if not slot.acquire(blocking=False):
+            began = time.perf_counter()
+            slot.acquire()
+            with self._lock:
+                self.counts["host_waits"] += 1
+                self.host_wait += time.perf_counter() - began
+        with self._lock:
+            self.counts["requests"] += 1
+            self.in_flight[host] += 1
+        released = threading.Event()
+
+        def release():
+            if not released.is_set():
+                released.set()
+                with self._lock:
+                    self.in_flight[host] -= 1
+                slot.release()
+
+        request.extensions = {**request.extensions, "trace": self._tracer(request.extensions.get("trace"))}
+        try:
+            response = super().handle_request(request)
+        except BaseException:
+            release()
+            raise
+        response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+    def stats(self) -> dict:
+        pool = self._pool.connections          # httpcore's live connections
+        with self._lock:
+            return {
+                "requests": self.counts["requests"],
+                "connections_opened": self.counts["connect"],
+                "tls_handshakes": self.counts["tls"],
+                "reused": max(0, self.counts["requests"] - self.counts["connect"]),
+                "open_connections": len(pool),
+                "idle_connections": sum(c.is_idle() for c in pool),
+                "in_flight": sum(self.in_flight.values()),
+                "host_waits": self.counts["host_waits"],
+                "host_wait_s": round(self.host_wait, 3),
+            }
+
+    def _tracer(self, inner):
+        def trace(event: str, info: dict) -> None:
+            if event == "connection.connect_tcp.complete":
+                with self._lock:
+                    self.counts["connect"] += 1
+            elif event == "connection.start_tls.complete":
+                with self._lock:
+                    self.counts["tls"] += 1
+            if inner is not None:
+                inner(event, info)
+        return trace
+
+
+def pooled_client(max_connections: Optional[int] = None, per_host: Optional[int] = None,
+                  keepalive: Optional[float] = None, timeout: float = 600.0) -> httpx.Client:
+    """A keep-alive client with the pool limits from the environment (or arguments)."""
+    max_connections = max_connections or int(os.getenv("WRITEPAL_HTTP_MAX_CONNECTIONS", "100"))
+    per_host = per_host or int(os.getenv("WRITEPAL_HTTP_PER_HOST", "20"))
+    keepalive = keepalive if keepalive is not None else float(os.getenv("WRITEPAL_HTTP_KEEPALIVE", "30"))
+    limits = httpx.Limits(max_connections=max_connections,
+                          max_keepalive_connections=max_connections, keepalive_expiry=keepalive)
+    transport = PooledTransport(per_host=min(per_host, max_connections), limits=limits)
+    return httpx.Client(transport=transport, timeout=timeout)
+
+
+_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+
+
+def install_pool() -> httpx.Client:
+    """Create the shared client once and make litellm use it for every model call."""
+    global _client
+    import litellm
+
+    with _client_lock:
+        if _client is None:
+            _client = pooled_client()
+        litellm.client_session = _client
+        return _client
+
+
+def pool_stats() -> dict:
+    """Counters of the installed pool (empty before `install_pool()`)."""
+    return _client._transport.stats() if _client is not None else {}
@@ -1,13 +1,11 @@
 #!/usr/bin/env python
+import hashlib
 import sys
 import os
 import warnings
 
 from datetime import datetime
 
-from kids_writing_agent.crew import KidsWritingAgent
-
-os.environ["OTEL_SDK_DISABLED"] = "true"
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
 # This main file is intended to be a way for you to run your
@@ -16,15 +14,27 @@ warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 # interpolate any tasks and agents information
 
 from crewai.flow.flow import Flow, start, listen, router
-from kids_writing_agent.state import EssayState
-from kids_writing_agent.agents import (profile_manager, conversation_guide,
-                    outline_planner, reviewer,
-                    improvement_coach, progress_analyst)
+from kids_writing_agent.budget import BudgetedFlow, SessionBudget, limits_for
+from kids_writing_agent.checkpoint import checkpointed, default_checkpoints
+from kids_writing_agent.http_pool import install_pool
+from kids_writing_agent.state import EssayState, GRADE_GUIDE
+from kids_writing_agent.profile_store import resolve_profile
+from kids_writing_agent.progress import default_progress, progress_prompt
+from kids_writing_agent.retrieval import default_retriever, grounding
+from kids_writing_agent import agents     # each agent is built when a step first uses it
+
+class EssayCoachFlow(BudgetedFlow, Flow[EssayState]):
+
+    def __init__(self, **kwargs):
+        self.budget = SessionBudget(on_change=self._expose_budget)
+        super().__init__(**kwargs)
 
-class EssayCoachFlow(Flow[EssayState]):
+    def _expose_budget(self, snapshot):
+        self.state.budget = snapshot
 
     # STEP 1 – topic & requirements come from UI
     @start()
+    @checkpointed
     def intake(self):
         self.state.topic = input("📝 Topic?  ")
         self.state.requirements = input("📋 Any special requirements?  ")
@@ -32,35 +42,43 @@ class EssayCoachFlow(Flow[EssayState]):
 
     # STEP 2 – fetch profile
     @listen(intake)
+    @checkpointed
     def fetch_profile(self, topic):
-        # Hard-coded profile for PoC
-        self.state.profile = {
-            "age": 8, "grade": 3, "skill_level": "beginner",
-            "weak_areas": ["organization", "comma splices"],
-        }
+        profile, guide = resolve_profile(self.state.user_id, GRADE_GUIDE)
+        self.state.profile = profile.model_dump(exclude={"history"})
+        self.state.progress = default_progress().summary(self.state.user_id, profile.model_dump())
+        self.state.grade = profile.grade
+        self.budget.configure(limits_for(profile.grade))
+        self.state.guide = guide
         return self.state.profile
 
     # STEP 3 – chat to gather ideas
     @listen(fetch_profile)
+    @checkpointed
     def collect_ideas(self, _profile):
         q1 = f"We're writing about **{self.state.topic}**. What are your main ideas?"
-        ideas = conversation_guide.run(q1)
+        ideas = agents.conversation_guide.run(q1)
         self.state.ideas = [i.strip("-• ") for i in ideas.split("\n") if i.strip()]
         return self.state.ideas
 
     # STEP 4 – draft outline
     @listen(collect_ideas)
+    @checkpointed
     def create_outline(self, ideas):
+        hits = default_retriever().search(" ".join([self.state.topic, *ideas]), k=3,
+                                          grade=self.state.grade)
         outline_prompt = (
             "Create a numbered outline with a hint for each paragraph.\n"
+            + grounding(hits) +
             f"Ideas: {ideas}\nStudent profile: {self.state.profile}"
         )
-        outline_txt = outline_planner.run(outline_prompt)
+        outline_txt = agents.outline_planner.run(outline_prompt)
         self.state.outline = [l.strip() for l in outline_txt.split("\n") if l.strip()]
         return self.state.outline
 
     # STEP 5 – deliver outline & collect draft
     @listen(create_outline)
+    @checkpointed
     def collect_draft(self, outline):
         print("\nHere’s your outline:")
         for l in outline: print(l)
@@ -76,9 +94,12 @@ class EssayCoachFlow(Flow[EssayState]):
 
     # STEP 6 – review and route
     @router(collect_draft)
+    @checkpointed
     def review(self, draft):
-        review_json = reviewer.run(
-            f"Requirements: {self.state.requirements}\n\n{draft}"
+        exemplars = default_retriever().search(self.state.topic, k=2, kind="exemplar",
+                                               grade=self.state.grade, distinct=True)
+        review_json = agents.reviewer.run(
+            f"Requirements: {self.state.requirements}\n\n{grounding(exemplars)}{draft}"
         )
         self.state.review_json = review_json
         self.state.passes = review_json.get("passed", False)
@@ -86,18 +107,28 @@ class EssayCoachFlow(Flow[EssayState]):
 
     # ---- success path
     @listen("good")
+    @checkpointed
     def praise(self):
-        msg = progress_analyst.run(
-            f"Essay accepted. Compare to history and praise improvement."
+        review = self.state.review_json
+        self.state.progress = default_progress().record(
+            self.state.user_id, review.get("score", 0), self.state.topic,
+            issues=review.get("issues", []),
+            weak_areas=self.state.profile.get("weak_areas", []),
+            key=hashlib.sha1(self.state.draft.encode("utf-8")).hexdigest(),   # replay-safe
+        )
+        msg = agents.progress_analyst.run(
+            "Essay accepted. Praise the growth this progress summary shows:\n"
+            + progress_prompt(self.state.progress)
         )
         print("\n✅  Essay accepted!\n" + msg)
         return "done"
 
     # ---- revision path
     @listen("revise")
+    @checkpointed
     def feedback(self):
         issues = self.state.review_json["issues"]
-        fb = improvement_coach.run(
+        fb = agents.improvement_coach.run(
             f"These issues were found: {issues}. Give improvement advice."
         )
         print("\n🔍 Feedback:\n" + fb)
@@ -112,14 +143,18 @@ class EssayCoachFlow(Flow[EssayState]):
         self.state.draft = "\n".join(lines)
         return self.state.draft   # feeds back into router
 
-flow = EssayCoachFlow() 
-
-def run():                       
+def run():
     """
     Kick off the writing-coach Flow.
-    Called automatically by `crewai run`.
+    Called automatically by `crewai run`. Re-running with the same
+    WRITEPAL_SESSION after a crash resumes at the last completed step.
     """
+    install_pool()
+    flow = EssayCoachFlow()
+    flow.checkpoint = default_checkpoints().session(
+        os.getenv("WRITEPAL_SESSION", "cli"), flow.state.user_id)
     flow.kickoff()
+    flow.checkpoint.finish()
 
 if __name__ == "__main__":
-    EssayCoachFlow().kickoff()
+    run()
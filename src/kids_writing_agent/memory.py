@@ -0,0 +1,94 @@
+"""
+Token-budgeted conversation memory for the brainstorm loop.
+
+The student's seed list and the most recent Q/A turns are kept verbatim;
+older turns are folded into a running summary one at a time, so the rendered
+conversation stays within a fixed token budget however long the chat runs.
+"""
+import math
+from typing import Callable, Dict, List, Optional
+
+Summarizer = Callable[[str, str, str], str]
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap, model-agnostic token estimate (~4 characters per token)."""
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def _clip(text: str, max_words: int) -> str:
+    words = text.split()
+    if len(words) <= max_words:
+        return " ".join(words)
+    return " ".join(words[:max_words]) + " …"
+
+
+def fold_turn(summary: str, question: str, answer: str) -> str:
+    """Default summarizer: append one clipped line per folded Q/A turn."""
+    line = f"- Asked: {_clip(question, 12)} → Student: {_clip(answer, 25)}"
+    return f"{summary}\n{line}" if summary else line
+
+
+class ConversationMemory:
+    """Seeds + running summary + recent turns, kept under `token_budget`."""
+
+    def __init__(self, seeds: str, token_budget: int = 1200,
+                 keep_recent: int = 4, summary_budget: int = 300,
+                 summarizer: Optional[Summarizer] = None):
+        self.seeds = seeds
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.summary_budget = summary_budget
+        self.summarizer = summarizer or fold_turn
+        self.summary = ""
+        self.turns: List[Dict[str, str]] = []   # full log, never rendered whole
+        self.recent: List[Dict[str, str]] = []
+        self.prompt_sizes: List[int] = []
+
+    def add(self, question: str, answer: str) -> None:
+        turn = {"q": question, "a": answer}
+        self.turns.append(turn)
+        self.recent.append(turn)
+        self._compact()
+
+    def render(self) -> str:
+        """Conversation block to splice into the guide prompt."""
+        parts = [f"Student's brainstorm list:\n{self.seeds}"]
+        if self.summary:
+            parts.append(f"Earlier conversation (summary):\n{self.summary}")
+        if self.recent:
+            parts.append("Recent turns:\n" + "\n".join(
+                f"Q: {t['q']}\nA: {t['a']}" for t in self.recent))
+        return "\n\n".join(parts)
+
+    def record_prompt(self, prompt: str) -> int:
+        """Track the size of the prompt built for this turn and return it."""
+        tokens = estimate_tokens(prompt)
+        self.prompt_sizes.append(tokens)
+        return tokens
+
+    @property
+    def last_answer(self) -> str:
+        return self.turns[-1]["a"] if self.turns else self.seeds
+
+    # ---------- internals ----------
+    def _compact(self) -> None:
+        while self.recent and (
+            len(self.recent) > self.keep_recent
+            or (len(self.recent) > 1
+                and estimate_tokens(self.render()) > self.token_budget)
+        ):
+            oldest = self.recent.pop(0)
+            self.summary = self.summarizer(self.summary, oldest["q"], oldest["a"])
+            self._trim_summary()
+
+    def _trim_summary(self) -> None:
+        # Oldest summary lines go first once the summary outgrows its share
+        # or the whole block no longer fits the budget.
+        lines = self.summary.splitlines()
+        while len(lines) > 1 and (
+            estimate_tokens(self.summary) > self.summary_budget
+            or estimate_tokens(self.render()) > self.token_budget
+        ):
+            lines.pop(0)
+            self.summary = "\n".join(lines)
@@ -0,0 +1,279 @@
+"""
+Per-agent and per-step instrumentation.
+
+Every agent kickoff (through `CachedAgent`) and every flow step (through
+crewAI's flow events) becomes one record: duration, prompt/completion tokens,
+retries, cache hit, error and the session it ran for. Records are appended to
+a size-rotated JSONL file and folded into in-memory aggregates that can be
+scraped in Prometheus text format or printed as a summary.
+
+    from kids_writing_agent.metrics import default_recorder, session_scope
+    with session_scope(session_id):
+        flow.kickoff()
+    default_recorder().serve(9464)          # GET /metrics
+"""
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from crewai.utilities.events import crewai_event_bus
+from crewai.utilities.events.flow_events import (
+    MethodExecutionFailedEvent, MethodExecutionFinishedEvent, MethodExecutionStartedEvent,
+)
+
+from kids_writing_agent.memory import estimate_tokens
+from kids_writing_agent.profile_store import DATA_DIR
+from kids_writing_agent.structured import parse_stats
+
+DEFAULT_LOG_PATH = DATA_DIR / "metrics" / "calls.jsonl"
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_session: ContextVar[str] = ContextVar("metrics_session", default="-")
+
+
+@contextmanager
+def session_scope(session_id: str):
+    """Tag every record produced inside this block with `session_id`."""
+    token = _session.set(session_id)
+    try:
+        yield
+    finally:
+        _session.reset(token)
+
+
+@dataclass
+class CallRecord:
+    kind: str                       # "kickoff", "task", "step" or "turn"
+    name: str                       # agent role or flow method
+    session: str = "-"
+    started: float = field(default_factory=time.time)
+    duration: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    estimated_tokens: bool = False  # True when the provider reported no usage
+    retries: int = 0
+    cache_hit: bool = False
+    queued: float = 0.0             # seconds spent waiting for the shared rate limiter
+    error: Optional[str] = None
+
+    def set_usage(self, prompt: str, output) -> None:
+        """Take token counts from a LiteAgentOutput, else estimate them."""
+        usage = getattr(output, "usage_metrics", None) or {}
+        if usage.get("prompt_tokens") or usage.get("completion_tokens"):
+            self.prompt_tokens = usage.get("prompt_tokens", 0)
+            self.completion_tokens = usage.get("completion_tokens", 0)
+            self.retries = max(0, usage.get("successful_requests", 1) - 1)
+        else:
+            self.prompt_tokens = estimate_tokens(prompt if isinstance(prompt, str) else str(prompt))
+            self.completion_tokens = estimate_tokens(str(getattr(output, "raw", output)))
+            self.estimated_tokens = True
+
+
+class _Aggregate:
+    __slots__ = ("count", "errors", "cache_hits", "retries", "prompt_tokens",
+                 "completion_tokens", "duration", "buckets")
+
+    def __init__(self):
+        self.count = self.errors = self.cache_hits = self.retries = 0
+        self.prompt_tokens = self.completion_tokens = 0
+        self.duration = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+    def add(self, rec: CallRecord) -> None:
+        self.count += 1
+        self.errors += rec.error is not None
+        self.cache_hits += rec.cache_hit
+        self.retries += rec.retries
+        self.prompt_tokens += rec.prompt_tokens
+        self.completion_tokens += rec.completion_tokens
+        self.duration += rec.duration
+        for i, bound in enumerate(BUCKETS):
+            if rec.duration <= bound:
+                self.buckets[i] += 1
+                break
+
+
+class Recorder:
+    """Collects `CallRecord`s into a rotating JSONL log and live aggregates."""
+
+    def __init__(self, path=DEFAULT_LOG_PATH, max_bytes: int = 10 * 1024 * 1024,
+                 backups: int = 5):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._log = logging.getLogger(f"writepal.metrics.{self.path}")
+        self._log.setLevel(logging.INFO)
+        self._log.propagate = False
+        if not self._log.handlers:
+            handler = RotatingFileHandler(self.path, maxBytes=max_bytes,
+                                          backupCount=backups, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._log.addHandler(handler)
+        self._aggs: Dict[Tuple[str, str], _Aggregate] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], dict]]] = {}
+        self._steps: Dict[Tuple[int, str], float] = {}
+        self._lock = threading.Lock()
+
+    # ---------- recording ----------
+    def record(self, rec: CallRecord) -> None:
+        with self._lock:
+            self._aggs.setdefault((rec.kind, rec.name), _Aggregate()).add(rec)
+        self._log.info(json.dumps(asdict(rec)))
+
+    @contextmanager
+    def track(self, kind: str, name: str):
+        """Time the block and record it; the caller fills in tokens / cache_hit."""
+        rec = CallRecord(kind=kind, name=name, session=_session.get())
+        began = time.perf_counter()
+        try:
+            yield rec
+        except BaseException as exc:
+            rec.error = type(exc).__name__
+            raise
+        finally:
+            rec.duration = time.perf_counter() - began
+            self.record(rec)
+
+    def add_gauge(self, name: str, help_text: str, read: Callable[[], dict]) -> None:
+        """Export `read()`'s numeric values as `name{stat="..."}` on every scrape."""
+        self._gauges[name] = (help_text, read)
+
+    def install_flow_hooks(self) -> None:
+        """Record every flow method execution as a "step"."""
+
+        @crewai_event_bus.on(MethodExecutionStartedEvent)
+        def _started(source, event):
+            with self._lock:
+                self._steps[(id(source), event.method_name)] = time.perf_counter()
+
+        def _ended(source, event, error=None):
+            with self._lock:
+                began = self._steps.pop((id(source), event.method_name), None)
+            if began is not None:
+                duration = time.perf_counter() - began
+                self.record(CallRecord(kind="step", name=event.method_name,
+                                       session=_session.get(), started=time.time() - duration,
+                                       duration=duration, error=error))
+
+        @crewai_event_bus.on(MethodExecutionFinishedEvent)
+        def _finished(source, event):
+            _ended(source, event)
+
+        @crewai_event_bus.on(MethodExecutionFailedEvent)
+        def _failed(source, event):
+            _ended(source, event, error=type(event.error).__name__)
+
+    # ---------- export ----------
+    def snapshot(self) -> Dict[Tuple[str, str], dict]:
+        with self._lock:
+            return {key: {s: getattr(agg, s) for s in _Aggregate.__slots__}
+                    for key, agg in self._aggs.items()}
+
+    def prometheus_text(self) -> str:
+        snap = self.snapshot()
+        out = []
+
+        def family(metric, kind, help_text):
+            out.append(f"# HELP {metric} {help_text}")
+            out.append(f"# TYPE {metric} {kind}")
+
+        def labels(kind, name, **extra):
+            pairs = {"kind": kind, "name": name, **extra}
+            return ",".join(f'{k}="{_escape(v)}"' for k, v in pairs.items())
+
+        for metric, attr, help_text in (
+            ("writepal_calls_total", "count", "Agent kickoffs, crew tasks and flow steps."),
+            ("writepal_errors_total", "errors", "Calls that raised."),
+            ("writepal_cache_hits_total", "cache_hits", "Kickoffs served from the kickoff cache."),
+            ("writepal_retries_total", "retries", "Extra model requests within one call."),
+        ):
+            family(metric, "counter", help_text)
+            out += [f"{metric}{{{labels(k, n)}}} {a[attr]}" for (k, n), a in snap.items()]
+
+        family("writepal_tokens_total", "counter", "Prompt and completion tokens.")
+        for (k, n), a in snap.items():
+            out.append(f"writepal_tokens_total{{{labels(k, n, direction='prompt')}}} {a['prompt_tokens']}")
+            out.append(f"writepal_tokens_total{{{labels(k, n, direction='completion')}}} {a['completion_tokens']}")
+
+        family("writepal_duration_seconds", "histogram", "Wall time per call.")
+        for (k, n), a in snap.items():
+            running = 0
+            for bound, hits in zip(BUCKETS, a["buckets"]):
+                running += hits
+                out.append(f"writepal_duration_seconds_bucket{{{labels(k, n, le=bound)}}} {running}")
+            out.append(f"writepal_duration_seconds_bucket{{{labels(k, n, le='+Inf')}}} {a['count']}")
+            out.append(f"writepal_duration_seconds_sum{{{labels(k, n)}}} {a['duration']:.6f}")
+            out.append(f"writepal_duration_seconds_count{{{labels(k, n)}}} {a['count']}")
+
+        family("writepal_structured_parse_total", "counter", "Structured-output parse outcomes.")
+        for key, value in sorted(parse_stats().items()):
+            schema, event = key.split(".", 1)
+            out.append(f'writepal_structured_parse_total{{schema="{schema}",event="{event}"}} {value}')
+
+        for name, (help_text, read) in self._gauges.items():
+            family(name, "gauge", help_text)
+            for stat, value in read().items():
+                if isinstance(value, (int, float)):
+                    out.append(f'{name}{{stat="{_escape(stat)}"}} {value}')
+        return "\n".join(out) + "\n"
+
+    def format_summary(self) -> str:
+        snap = self.snapshot()
+        if not snap:
+            return "No agent calls recorded."
+        lines = [f"{'kind':<8}{'name':<22}{'calls':>6}{'avg s':>8}{'total s':>9}"
+                 f"{'p.tok':>8}{'c.tok':>8}{'cache':>6}{'retry':>6}{'err':>5}"]
+        for (kind, name), a in sorted(snap.items(), key=lambda kv: -kv[1]["duration"]):
+            lines.append(
+                f"{kind:<8}{name[:21]:<22}{a['count']:>6}{a['duration'] / a['count']:>8.2f}"
+                f"{a['duration']:>9.2f}{a['prompt_tokens']:>8}{a['completion_tokens']:>8}"
+                f"{a['cache_hits']:>6}{a['retries']:>6}{a['errors']:>5}")
+        return "\n".join(lines)
+
+    def serve(self, port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve `prometheus_text()` at http://host:port/metrics from a daemon thread."""
+        recorder = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = recorder.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_default: Optional[Recorder] = None
+_default_lock = threading.Lock()
+
+
+def default_recorder() -> Recorder:
+    """Process-wide recorder logging to data/metrics/calls.jsonl, created on first use."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Recorder()
+            _default.install_flow_hooks()
+        return _default
@@ -0,0 +1,237 @@
+"""
+Offline, deterministic stand-in for the model backend.
+
+`MockLLM` is a `crewai.LLM` that answers from a per-role script instead
+of calling a provider. A script entry is a fixed reply, a `string.Template`
+(`$prompt`, `$turn`), a list of replies used in turn order, or a callable
+`(prompt, turn) -> str`; replies starting with "Thought:"/"Action:" are sent
+verbatim so a script can drive tool calls such as delegation. Latency is simulated as `base + per_token *
+completion_tokens` seconds, streaming agents get their reply as stream chunks,
+and every call is logged so benchmarks can split model time from framework
+overhead.
+
+    from kids_writing_agent.mock_llm import install_mock
+    install_mock([outline_planner, reviewer], latency=(0.2, 0.005))
+"""
+import re
+import threading
+import time
+from dataclasses import dataclass, asdict
+from string import Template
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from crewai import LLM
+from crewai.utilities.events import crewai_event_bus
+from crewai.utilities.events.llm_events import LLMCallStartedEvent, LLMStreamChunkEvent
+from litellm.types.utils import Usage
+
+from kids_writing_agent.memory import estimate_tokens
+from kids_writing_agent.rubric import split_paragraphs
+
+Response = Union[str, Sequence[str], Callable[[str, int], str]]
+Latency = Union[float, Tuple[float, float]]
+
+
+@dataclass
+class MockCall:
+    role: str
+    started: float                  # time.perf_counter() when the call began
+    prompt_tokens: int
+    completion_tokens: int
+    latency: float                  # simulated seconds, included in the call
+
+
+class MockLog:
+    """Thread-safe record of every mock model call."""
+
+    def __init__(self):
+        self.calls: List[MockCall] = []
+        self._lock = threading.Lock()
+
+    def add(self, call: MockCall) -> None:
+        with self._lock:
+            self.calls.append(call)
+
+    def since(self, mark: int) -> List[MockCall]:
+        with self._lock:
+            return self.calls[mark:]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self.calls)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.calls.clear()
+
+    def totals(self) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        for c in self.since(0):
+            row = out.setdefault(c.role, {"calls": 0, "prompt_tokens": 0,
+                                          "completion_tokens": 0, "latency": 0.0})
+            row["calls"] += 1
+            row["prompt_tokens"] += c.prompt_tokens
+            row["completion_tokens"] += c.completion_tokens
+            row["latency"] += c.latency
+        return out
+
+    def dump(self) -> List[dict]:
+        return [asdict(c) for c in self.since(0)]
+
+
+log = MockLog()
+
+
+# ---------- default script: one grade-3 student, one revision ----------
+def _guide_reply(prompt: str, turn: int) -> str:
+    answered = prompt.count("\nA: ") + prompt.count("→ Student:")
+    if answered >= 2 or "[DONE] and the bullet list now" in prompt:
+        return ("[DONE]\n• Dogs are loyal friends\n"
+                "• Dogs are fun to play with\n• Dogs keep us safe")
+    return ["What is your favorite thing about this animal?",
+            "Can you tell me about a time it made you happy?"][answered]
+
+
+def _review_reply(prompt: str, turn: int) -> str:
+    # reviewer prompts carry the local rubric findings; trust their count
+    m = re.search(r"paragraphs: (\d+)", prompt)
+    paragraphs = int(m.group(1)) if m else len(split_paragraphs(prompt))
+    if paragraphs >= 3:
+        return '{"score": 88, "passed": true, "issues": []}'
+    return ('{"score": 72, "passed": false, "issues": '
+            '["P0: Add a conclusion paragraph.", "P2: Give one more example."]}')
+
+
+DEFAULT_SCRIPT: Dict[str, Response] = {
+    "Profile Manager": ('{"age": 8, "grade": 3, "skill_level": "beginner", '
+                        '"weak_areas": ["organization", "comma splices"], "history": []}'),
+    "Conversation Guide": _guide_reply,
+    "Outline Planner": ("1. Intro: say which animal you love (hint: start with a fun fact)\n"
+                        "2. Body: why it is loyal (hint: one true story)\n"
+                        "3. Body: how you play together (hint: use action words)\n"
+                        "4. Conclusion: why it is the best (hint: repeat your main idea)"),
+    "Writing Reviewer": _review_reply,
+    "Improvement Coach": ("Great start! Add a short conclusion that repeats your main idea, "
+                          "and give one more example of playing with your dog."),
+    "Progress Analyst": "Wonderful work! Your essay is better organized than last time.",
+}
+
+
+class MockLLM(LLM):
+    """Scripted, network-free LLM for one agent role.
+
+    Subclasses `crewai.LLM` (not just `BaseLLM`) because `Agent.kickoff`'s
+    LiteAgent only accepts real `LLM` instances; `call` never reaches litellm.
+    """
+
+    def __init__(self, role: str, script: Optional[Dict[str, Response]] = None,
+                 latency: Latency = 0.0, stream: bool = False,
+                 chunk_words: int = 4, call_log: Optional[MockLog] = None):
+        super().__init__(model=f"mock/{role.lower().replace(' ', '_')}", stream=stream)
+        self.role = role
+        self.script = DEFAULT_SCRIPT if script is None else script
+        self.latency = latency
+        self.chunk_words = chunk_words
+        self.log = log if call_log is None else call_log
+        self._turn = 0
+        self._lock = threading.Lock()
+
+    # ---------- LLM ----------
+    def call(self, messages, tools=None, callbacks=None, available_functions=None) -> str:
+        started = time.perf_counter()
+        crewai_event_bus.emit(self, event=LLMCallStartedEvent(
+            messages=messages, tools=tools, callbacks=callbacks,
+            available_functions=available_functions))
+        prompt = self._prompt(messages)
+        with self._lock:
+            turn = self._turn
+            self._turn += 1
+        text = self.respond(prompt, turn)
+        # crewAI's agent loop expects the ReAct shape; scripted tool calls pass through
+        if text.lstrip().startswith(("Thought:", "Action:")):
+            completion = text
+        else:
+            completion = f"Thought: I now can give a great answer\nFinal Answer: {text}"
+
+        p_tokens = estimate_tokens(self._flatten(messages))
+        c_tokens = estimate_tokens(completion)
+        delay = self._delay(c_tokens)
+        if self.stream:
+            self._emit_chunks(completion, delay)
+        else:
+            time.sleep(delay)
+        self.log.add(MockCall(self.role, started, p_tokens, c_tokens, delay))
+        # report usage like litellm does, so kickoff's usage_metrics stay meaningful
+        usage = Usage(prompt_tokens=p_tokens, completion_tokens=c_tokens,
+                      total_tokens=p_tokens + c_tokens)
+        for callback in callbacks or []:
+            if hasattr(callback, "log_success_event"):
+                callback.log_success_event({}, {"usage": usage}, started, time.perf_counter())
+        return completion
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def supports_stop_words(self) -> bool:
+        return False
+
+    def get_context_window_size(self) -> int:
+        return 128_000
+
+    # ---------- script ----------
+    def respond(self, prompt: str, turn: int) -> str:
+        entry = self.script.get(self.role, "OK")
+        if callable(entry):
+            return entry(prompt, turn)
+        if isinstance(entry, str):
+            return Template(entry).safe_substitute(prompt=prompt, turn=turn)
+        return entry[min(turn, len(entry) - 1)]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._turn = 0
+
+    # ---------- internals ----------
+    def _delay(self, completion_tokens: int) -> float:
+        if isinstance(self.latency, tuple):
+            base, per_token = self.latency
+            return base + per_token * completion_tokens
+        return float(self.latency)
+
+    def _emit_chunks(self, completion: str, delay: float) -> None:
+        words = completion.split(" ")
+        chunks = [" ".join(words[i:i + self.chunk_words]) + " "
+                  for i in range(0, len(words), self.chunk_words)]
+        pause = delay / len(chunks)
+        for chunk in chunks:
+            time.sleep(pause)
+            crewai_event_bus.emit(self, event=LLMStreamChunkEvent(chunk=chunk))
+
+    @staticmethod
+    def _prompt(messages) -> str:
+        """The newest message: the task, or the last tool Observation in a ReAct loop."""
+        if isinstance(messages, str):
+            return messages
+        return str(messages[-1].get("content", "")) if messages else ""
+
+    @staticmethod
+    def _flatten(messages) -> str:
+        if isinstance(messages, str):
+            return messages
+        return "\n".join(str(m.get("content", "")) for m in messages)
+
+
+def install_mock(agents: Iterable, script: Optional[Dict[str, Response]] = None,
+                 latency: Latency = 0.0, call_log: Optional[MockLog] = None) -> List[MockLLM]:
+    """Swap each agent's LLM for a `MockLLM` keyed on its role.
+
+    Agents whose current LLM streams keep streaming, so the chat path is
+    exercised the same way it is in production.
+    """
+    installed = []
+    for agent in agents:
+        streams = bool(getattr(agent.llm, "stream", False))
+        agent.llm = MockLLM(agent.role, script=script, latency=latency,
+                            stream=streams, call_log=call_log)
+        installed.append(agent.llm)
+    return installed
@@ -0,0 +1,210 @@
+"""
+Similarity-aware outline cache.
+
+Children at the same grade writing on an assigned topic ("My Favorite Animal")
+hand in near-identical idea lists, so most outlines only differ in wording.
+Each stored outline is keyed by a hashed vector of (topic, ideas) within its
+grade and idea count; a lookup whose cosine similarity clears `threshold`
+reuses the nearest outline, re-templated with the new student's topic and idea
+wording (idea text the planner quoted verbatim, on word boundaries, is swapped
+for the aligned new idea). Only outlines that reduce to a clean slot template
+are stored: if anything personal is left outside the `{topic}`/`{idea<n>}`
+slots (a pet's name, a place, any other proper noun) the outline stays with
+the child it was written for. Entries expire after `ttl` seconds and the least
+recently used one is evicted once `max_entries` slots are full.
+
+    cache = default_outline_cache()
+    outline = cache.lookup(topic, grade, ideas)
+    if outline is None:
+        outline = outline_planner.kickoff(prompt).raw
+        cache.store(topic, grade, ideas, outline)
+"""
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+from kids_writing_agent.retrieval import DIM, embed
+
+SIMILARITY = 0.8        # cosine of the (topic, ideas) vectors needed for reuse
+TOPIC_WEIGHT = 0.4      # share of the key vector that comes from the topic
+
+
+def clean_idea(idea: str) -> str:
+    return " ".join(idea.strip("-•*0123456789. \t").split())
+
+
+def key_vector(topic: str, ideas: List[str], dim: int = DIM) -> np.ndarray:
+    vec = TOPIC_WEIGHT * embed(topic, dim) + (1 - TOPIC_WEIGHT) * embed(
+        " \n".join(clean_idea(i) for i in ideas), dim)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+_SLOT = re.compile(r"\{(?:topic|idea\d+)\}")
+_WORD = re.compile(r"[A-Za-z][\w'’]*")
+_OPENERS = tuple(".!?:;(-•*\"'“")        # a capital after these starts a sentence or item
+
+
+def _template(outline: str, topic: str, ideas: List[str]) -> str:
+    """Replace verbatim topic / idea text with {topic} / {idea<n>} slots."""
+    text = outline.replace("{", "{{").replace("}", "}}")
+    slots = [("topic", topic)] + [(f"idea{i}", clean_idea(idea)) for i, idea in enumerate(ideas)]
+    for name, phrase in sorted(slots, key=lambda s: -len(s[1])):     # longest first
+        if len(phrase) >= 3:
+            text = re.sub(r"(?<!\w)" + re.escape(phrase) + r"(?!\w)", "{" + name + "}",
+                          text, flags=re.I)
+    return text
+
+
+def proper_nouns(text: str) -> Set[str]:
+    """Capitalised words that do not open a line, sentence or list item."""
+    found = set()
+    for m in _WORD.finditer(text):
+        word = m.group()
+        if not word[0].isupper() or word == "I":
+            continue
+        before = text[:m.start()].rstrip(" \t")
+        if before and not before.endswith("\n") and not before.endswith(_OPENERS):
+            found.add(word)
+    return found
+
+
+def reusable(template: str, topic: str, ideas: List[str]) -> bool:
+    """True if nothing student-specific is left outside the template's slots.
+
+    Rejects leftover proper nouns (other than the topic's) and any name the
+    student used in their ideas, wherever it appears.
+    """
+    rest = _SLOT.sub(" ", template)
+    allowed = {w.lower() for w in _WORD.findall(topic)}
+    names = set().union(*(proper_nouns(clean_idea(i)) for i in ideas)) if ideas else set()
+    if any(w.lower() not in allowed for w in proper_nouns(rest)):
+        return False
+    words = set(_WORD.findall(rest))
+    return not any(n in words and n.lower() not in allowed for n in names)
+
+
+def _align(old: List[str], new: List[str], dim: int = DIM) -> List[int]:
+    """For each old idea, the index of the most similar unused new idea."""
+    sims = np.stack([embed(i, dim) for i in old]) @ np.stack([embed(i, dim) for i in new]).T
+    order: List[int] = [-1] * len(old)
+    for _ in range(len(old)):
+        i, j = np.unravel_index(np.argmax(sims), sims.shape)
+        order[i] = int(j)
+        sims[i, :] = -2.0
+        sims[:, j] = -2.0
+    return order
+
+
+class OutlineCache:
+    """In-process outline store with vectorized nearest-neighbour lookup, TTL and LRU."""
+
+    def __init__(self, threshold: float = SIMILARITY, max_entries: int = 2000,
+                 ttl: float = 7 * 24 * 3600, dim: int = DIM):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.dim = dim
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self._grade = np.full(max_entries, -1, dtype=np.int16)      # -1: empty slot
+        self._count = np.zeros(max_entries, dtype=np.int16)
+        self._created = np.zeros(max_entries)
+        self._accessed = np.zeros(max_entries)
+        self._entries: List[Optional[dict]] = [None] * max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0                        # outlines too personal to share
+        self.similarity: List[float] = []        # best score of recent lookups
+        self._lock = threading.Lock()
+
+    def lookup(self, topic: str, grade: int, ideas: List[str]) -> Optional[str]:
+        """A re-templated outline for a close enough earlier idea set, or None."""
+        if not ideas:                    # a bare [DONE]: nothing to match or fill in
+            with self._lock:
+                self.misses += 1
+            return None
+        q = key_vector(topic, ideas, self.dim)
+        now = time.time()
+        with self._lock:
+            live = ((self._grade == grade) & (self._count == len(ideas))
+                    & (now - self._created <= self.ttl))
+            best, score = -1, 0.0
+            if live.any():
+                scores = np.where(live, self._vectors @ q, -1.0)
+                best = int(np.argmax(scores))
+                score = float(scores[best])
+            self.similarity = (self.similarity + [round(score, 3)])[-200:]
+            if best < 0 or score < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._accessed[best] = now
+            entry = self._entries[best]
+            entry["uses"] += 1
+        new = [clean_idea(i) for i in ideas]
+        order = _align(entry["ideas"], new, self.dim)
+        fill = {"topic": topic, **{f"idea{i}": new[j] for i, j in enumerate(order)}}
+        return entry["template"].format(**fill)
+
+    def store(self, topic: str, grade: int, ideas: List[str], outline: str) -> bool:
+        """Keep `outline` for reuse; False if it has no ideas or is too personal to share."""
+        if not ideas:
+            return False
+        ideas = [clean_idea(i) for i in ideas]
+        template = _template(outline, topic, ideas)
+        now = time.time()
+        with self._lock:
+            if not reusable(template, topic, ideas):
+                self.rejected += 1
+                return False
+            empty = np.flatnonzero(self._grade < 0)
+            if empty.size:
+                slot = int(empty[0])
+            else:
+                expired = np.flatnonzero(now - self._created > self.ttl)
+                slot = int(expired[0]) if expired.size else int(np.argmin(self._accessed))
+                self.evictions += 1
+            self._vectors[slot] = key_vector(topic, ideas, self.dim)
+            self._grade[slot] = grade
+            self._count[slot] = len(ideas)
+            self._created[slot] = self._accessed[slot] = now
+            self._entries[slot] = {"topic": topic, "ideas": ideas, "uses": 0,
+                                   "template": template}
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._grade[:] = -1
+            self._entries = [None] * self.max_entries
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": int((self._grade >= 0).sum()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "rejected": self.rejected,
+                "mean_similarity": (round(float(np.mean(self.similarity)), 3)
+                                    if self.similarity else 0.0),
+            }
+
+
+_default: Optional[OutlineCache] = None
+_default_lock = threading.Lock()
+
+
+def default_outline_cache() -> OutlineCache:
+    """Process-wide cache; WRITEPAL_OUTLINE_SIMILARITY overrides the threshold."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = OutlineCache(float(os.getenv("WRITEPAL_OUTLINE_SIMILARITY", SIMILARITY)))
+        return _default
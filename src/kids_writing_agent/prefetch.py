@@ -0,0 +1,224 @@
+"""
+Speculative outline prefetch.
+
+The brainstorm loop usually has enough ideas for an outline a few turns before
+the guide answers [DONE]. As soon as the student's material reaches the
+grade's paragraph count, `offer()` starts drafting the outline in the
+background (and restarts it if the material later drifts). When brainstorming
+ends, `take(final_ideas)` returns the speculative outline if it was drafted
+for a list matching the final one, or drops it and returns None so the caller
+drafts a fresh one.
+
+The final list is the guide's [DONE] bullets, which reword the student's
+answers, so the background job first asks for that list (`shortlist`) and
+drafts from what comes back; `take()` compares like with like.
+
+    prefetch = OutlinePrefetch(min_ideas=guide["paras"])
+    prefetch.offer(student_lines, draft_outline, shortlist=ask_guide_for_bullets)
+    outline = prefetch.take(final_ideas) or draft_outline(final_ideas)
+
+Idea lists are compared as bags of content words (Jaccard), so reordering and
+small rewording still hit. Outcomes are counted process-wide; `prefetch_stats()`
+feeds the metrics endpoint.
+"""
+import asyncio
+import contextvars
+import os
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Iterable, List, Optional, Set
+
+MATCH_THRESHOLD = 0.6
+
+_STOP = frozenset("a an and are as at be because but by for from he her his i in is it "
+                  "its me my of on or our she so that the their them they this to was "
+                  "us we with you your".split())
+
+_stats: Counter = Counter()
+_saved = [0.0]
+_stats_lock = threading.Lock()
+
+
+def _count(event: str, saved: float = 0.0) -> None:
+    with _stats_lock:
+        _stats[event] += 1
+        _saved[0] += saved
+
+
+def prefetch_stats() -> dict:
+    """Counters since start-up plus hit rate and model seconds hidden from students."""
+    with _stats_lock:
+        out = {k: _stats[k] for k in ("started", "hit", "miss", "queued", "replaced", "failed")}
+        decided = out["hit"] + out["miss"] + out["queued"] + out["failed"]
+        out["hit_rate"] = round(out["hit"] / decided, 3) if decided else 0.0
+        out["saved_seconds"] = round(_saved[0], 3)
+    return out
+
+
+def content_words(ideas: Iterable[str]) -> Set[str]:
+    words = set()
+    for idea in ideas:
+        for w in re.findall(r"[a-z0-9']+", idea.lower()):
+            if w not in _STOP:
+                words.add(w[:-1] if len(w) > 3 and w.endswith("s") else w)
+    return words
+
+
+def ideas_similarity(a: Iterable[str], b: Iterable[str]) -> float:
+    wa, wb = content_words(a), content_words(b)
+    return len(wa & wb) / len(wa | wb) if wa or wb else 1.0
+
+
+class _Prefetch:
+    def __init__(self, min_ideas: int, threshold: float = MATCH_THRESHOLD):
+        self.min_ideas = min_ideas
+        self.threshold = threshold
+        self.ideas: Optional[List[str]] = None     # the material the running job started from
+        self._keyed = True                          # job drafts for `ideas` itself (no shortlist)
+        self._job = None
+
+    def _should_start(self, ideas: List[str]) -> bool:
+        if len(ideas) < self.min_ideas:
+            return False
+        if self.ideas is not None and ideas_similarity(self.ideas, ideas) >= self.threshold:
+            return False            # the running draft still fits
+        if self._job is not None:
+            self._stop()
+            _count("replaced")
+        return True
+
+    def _settle(self, ideas: List[str]) -> bool:
+        """False (and the job is cancelled) if the pending job cannot match `ideas`."""
+        if self._job is None:
+            return False
+        if self._keyed and ideas_similarity(self.ideas, ideas) < self.threshold:
+            self._stop()
+            self._job = self.ideas = None
+            _count("miss")
+            return False
+        return True
+
+    def _judge(self, result, ideas: List[str], waited: float) -> Optional[str]:
+        """The outline if it was drafted for a list matching `ideas`."""
+        if result is None or ideas_similarity(result[0], ideas) < self.threshold:
+            _count("miss")
+            return None
+        _, outline, took = result
+        _count("hit", saved=max(0.0, took - (time.perf_counter() - waited)))
+        return outline
+
+
+class OutlinePrefetch(_Prefetch):
+    """Thread-based prefetch for the sync flow; the job runs in the caller's context."""
+
+    def offer(self, ideas: List[str], draft: Callable[[List[str]], str],
+              shortlist: Optional[Callable[[List[str]], Optional[List[str]]]] = None) -> bool:
+        """Start drafting in the background if it is worth it; True if started.
+
+        `shortlist` turns `ideas` into the list to draft for (None gives up);
+        without it the outline is drafted for `ideas` as they are.
+        """
+        ideas = list(ideas)
+        if not self._should_start(ideas):
+            return False
+
+        def timed():
+            began = time.perf_counter()
+            final = shortlist(ideas) if shortlist else ideas
+            if not final:
+                return None
+            return final, draft(final), time.perf_counter() - began
+
+        # copy_context: the speculative calls are charged to the same session budget
+        self._job = _executor().submit(contextvars.copy_context().run, timed)
+        self.ideas, self._keyed = ideas, shortlist is None
+        _count("started")
+        return True
+
+    def take(self, ideas: List[str], timeout: Optional[float] = None) -> Optional[str]:
+        """The speculative outline if it matches `ideas`, else None (and it is cancelled).
+
+        A job still queued behind other sessions' jobs is cancelled too: drafting
+        directly is faster than waiting for a free worker.
+        """
+        if not self._settle(ideas):
+            return None
+        job, self._job, self.ideas = self._job, None, None
+        if job.cancel():
+            _count("queued")
+            return None
+        waited = time.perf_counter()
+        try:
+            result = job.result(timeout)
+        except Exception:
+            _count("failed")
+            return None
+        return self._judge(result, ideas, waited)
+
+    def cancel(self) -> None:
+        if self._job is not None:
+            self._stop()
+            self._job = self.ideas = None
+
+    def _stop(self) -> None:
+        self._job.cancel()          # a job already running finishes and is dropped
+
+
+class AsyncOutlinePrefetch(_Prefetch):
+    """Task-based prefetch for the async flow; a cancelled task really stops."""
+
+    def offer(self, ideas: List[str], draft: Callable[[List[str]], Awaitable[str]],
+              shortlist: Optional[Callable[[List[str]], Awaitable[Optional[List[str]]]]] = None
+              ) -> bool:
+        ideas = list(ideas)
+        if not self._should_start(ideas):
+            return False
+
+        async def timed():
+            began = time.perf_counter()
+            final = await shortlist(ideas) if shortlist else ideas
+            if not final:
+                return None
+            return final, await draft(final), time.perf_counter() - began
+
+        self._job = asyncio.get_running_loop().create_task(timed(), name="outline-prefetch")
+        self.ideas, self._keyed = ideas, shortlist is None
+        _count("started")
+        return True
+
+    async def take(self, ideas: List[str]) -> Optional[str]:
+        if not self._settle(ideas):
+            return None
+        job, self._job, self.ideas = self._job, None, None
+        waited = time.perf_counter()
+        try:
+            result = await job
+        except Exception:
+            _count("failed")
+            return None
+        return self._judge(result, ideas, waited)
+
+    def cancel(self) -> None:
+        if self._job is not None:
+            self._stop()
+            self._job = self.ideas = None
+
+    def _stop(self) -> None:
+        self._job.cancel()
+
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=int(os.getenv("WRITEPAL_PREFETCH_WORKERS", "4")),
+                thread_name_prefix="outline-prefetch")
+        return _pool
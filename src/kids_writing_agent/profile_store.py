@@ -0,0 +1,207 @@
+"""
+Indexed profile store.
+
+`data/profiles.json` stays the human-editable source of truth, but lookups go
+through a SQLite index (one row per user) fronted by a small in-process LRU.
+The index is rebuilt only when the JSON file's mtime/size changes, so a single
+lookup costs one `os.stat` plus, on a cache miss, one primary-key query –
+independent of how many students are on the roster.
+"""
+import copy
+import json
+import os
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Tuple
+
+from pydantic import ValidationError
+
+from kids_writing_agent.state import StudentProfile
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+# WRITEPAL_DATA_DIR moves every store (profiles, progress, checkpoints, caches,
+# metrics) elsewhere, e.g. so a benchmark never touches the real roster.
+DATA_DIR = Path(os.getenv("WRITEPAL_DATA_DIR") or ROOT_DIR / "data")
+DEFAULT_SOURCE = DATA_DIR / "profiles.json"
+DEFAULT_INDEX = DATA_DIR / "profiles.sqlite"
+
+
+class ProfileStore:
+    """Per-user profile index backed by SQLite with an LRU in front of it."""
+
+    def __init__(self, index_path=DEFAULT_INDEX, source_path=DEFAULT_SOURCE,
+                 cache_size: int = 1024):
+        self.index_path = Path(index_path)
+        self.source_path = Path(source_path) if source_path else None
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.index_path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS profiles ("
+            " user_id TEXT PRIMARY KEY, body TEXT NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self._db.commit()
+        self._data_version = self._read_data_version()
+
+    # ---------- public API ----------
+    def get(self, user_id: str) -> dict:
+        """Return the profile for `user_id`, or an empty dict if unknown."""
+        with self._lock:
+            self._sync()
+            if user_id in self._cache:
+                self._cache.move_to_end(user_id)
+                self.hits += 1
+                return copy.deepcopy(self._cache[user_id])
+
+            self.misses += 1
+            row = self._db.execute(
+                "SELECT body FROM profiles WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            if row is None:
+                return {}
+            profile = json.loads(row[0])
+            self._remember(user_id, profile)
+            return copy.deepcopy(profile)
+
+    def put(self, user_id: str, profile: dict) -> None:
+        """Insert or replace a single profile in the index."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO profiles (user_id, body) VALUES (?, ?)",
+                (user_id, json.dumps(profile)),
+            )
+            self._db.commit()
+            self._data_version = self._read_data_version()
+            self._remember(user_id, copy.deepcopy(profile))
+
+    def bulk_import(self, profiles: Iterable[Tuple[str, dict]],
+                    replace: bool = False) -> int:
+        """Load many `(user_id, profile)` pairs in a single transaction."""
+        with self._lock:
+            count = 0
+            with self._db:
+                if replace:
+                    self._db.execute("DELETE FROM profiles")
+                for user_id, profile in profiles:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO profiles (user_id, body) VALUES (?, ?)",
+                        (user_id, json.dumps(profile)),
+                    )
+                    count += 1
+            self._cache.clear()
+            self._data_version = self._read_data_version()
+            return count
+
+    def import_json(self, json_path, replace: bool = True) -> int:
+        """Bulk-import the `{"user_id": {...}, ...}` format of profiles.json."""
+        json_path = Path(json_path)
+        with open(json_path, encoding="utf-8") as fp:
+            db = json.load(fp)
+        count = self.bulk_import(db.items(), replace=replace)
+        if self.source_path and json_path.resolve() == self.source_path.resolve():
+            self._set_meta("source_stamp", self._source_stamp())
+        return count
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+
+    def close(self) -> None:
+        self._db.close()
+
+    # ---------- invalidation ----------
+    def _sync(self) -> None:
+        """Re-index when the source file changed; drop the LRU on foreign writes."""
+        if self.source_path is not None:
+            stamp = self._source_stamp()
+            if stamp and stamp != self._get_meta("source_stamp"):
+                self.import_json(self.source_path)
+                return
+        version = self._read_data_version()
+        if version != self._data_version:
+            self._cache.clear()
+            self._data_version = version
+
+    def _source_stamp(self) -> str:
+        try:
+            st = os.stat(self.source_path)
+        except FileNotFoundError:
+            return ""
+        return f"{st.st_mtime_ns}:{st.st_size}"
+
+    def _read_data_version(self) -> int:
+        return self._db.execute("PRAGMA data_version").fetchone()[0]
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    def _remember(self, user_id: str, profile: dict) -> None:
+        self._cache[user_id] = profile
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+
+_default_store: Optional[ProfileStore] = None
+_default_lock = threading.Lock()
+
+
+def default_store() -> ProfileStore:
+    """Process-wide store over data/profiles.json, created on first use."""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = ProfileStore()
+        return _default_store
+
+
+def import_profiles():
+    """
+    Bulk-import a profiles.json file into the index.
+    Usage: import_profiles [profiles.json] [profiles.sqlite]
+    """
+    source = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SOURCE
+    index = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_INDEX
+    store = ProfileStore(index_path=index, source_path=source)
+    count = store.import_json(source)
+    print(f"Imported {count} profiles from {source} into {index}")
+
+
+def resolve_profile(user_id: str, grade_guide: dict,
+                    fallback: Optional[Callable[[str], dict]] = None,
+                    default_grade: int = 3,
+                    store: Optional[ProfileStore] = None):
+    """
+    Resolve a student's profile and grade guide without a model call.
+
+    The indexed store is consulted first; `fallback` (e.g. an LLM-backed
+    profile agent) is only called when the store has no usable entry.
+    Returns `(StudentProfile, guide)`.
+    """
+    raw = (store or default_store()).get(user_id)
+    try:
+        profile = StudentProfile.model_validate(raw)
+    except ValidationError:
+        if fallback is None:
+            raise
+        profile = StudentProfile.model_validate(fallback(user_id))
+    guide = grade_guide.get(profile.grade, grade_guide[default_grade])
+    return profile, guide
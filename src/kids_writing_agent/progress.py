@@ -0,0 +1,193 @@
+"""
+Per-student progress index.
+
+Instead of re-reading (and re-prompting) a student's whole essay history, every
+accepted essay is folded into a fixed-size running summary: essay count, best
+and last score, a rolling average over the last few scores, streaks, and for
+each weak area in the profile an exponentially weighted count of the review
+issues that mention it. An update touches one SQLite row, and the summary the
+progress analyst sees stays the same size however long the student has been
+writing with us.
+
+    progress = default_progress()
+    summary = progress.summary("demo_user", profile)    # seeded from history once
+    summary = progress.record("demo_user", score=86, topic="Owls",
+                              issues=review["issues"], weak_areas=profile["weak_areas"])
+    prompt = progress_prompt(summary)
+"""
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from kids_writing_agent.profile_store import DATA_DIR
+
+DEFAULT_PROGRESS_PATH = DATA_DIR / "progress.sqlite"
+WINDOW = 5          # scores in the rolling average
+ALPHA = 0.3         # weight of the newest essay in each weak-area average
+STEADY = 0.25       # |count - average| below this is "steady"
+
+
+def empty_summary() -> Dict[str, Any]:
+    return {
+        "essays": 0, "best": None, "best_topic": "", "previous_best": None,
+        "last": None, "last_topic": "", "last_date": "",
+        "recent": [], "rolling_avg": None, "total": 0, "mean": None,
+        "streaks": {"improving": 0, "best_improving": 0, "first_try": 0},
+        "areas": {}, "last_key": None,
+    }
+
+
+def _stems(area: str) -> List[str]:
+    words = [w for w in area.lower().replace("-", " ").split() if len(w) > 3]
+    return [w[:6] if len(w) > 6 else w.rstrip("s") for w in words]
+
+
+def area_hits(area: str, issues: Iterable[str]) -> int:
+    """How many review issues mention `area` ("comma splices" → "comma", "splice")."""
+    stems = _stems(area)
+    return sum(any(s in issue.lower() for s in stems) for issue in issues) if stems else 0
+
+
+def fold(summary: Dict[str, Any], score: int, topic: str = "", date: str = "",
+         issues: Optional[Iterable[str]] = None, weak_areas: Iterable[str] = (),
+         revisions: Optional[int] = None) -> Dict[str, Any]:
+    """Add one accepted essay to `summary` in place and return it.
+
+    `issues=None` (e.g. an imported history entry) leaves the area trends alone;
+    `revisions=None` leaves the first-try streak alone.
+    """
+    s = summary
+    n = s["essays"] + 1
+    streaks = s["streaks"]
+    if s["last"] is not None:
+        streaks["improving"] = streaks["improving"] + 1 if score >= s["last"] else 0
+        streaks["best_improving"] = max(streaks["best_improving"], streaks["improving"])
+    if revisions is not None:
+        streaks["first_try"] = streaks["first_try"] + 1 if revisions == 0 else 0
+
+    s["previous_best"] = s["best"]
+    if s["best"] is None or score > s["best"]:
+        s["best"], s["best_topic"] = score, topic
+    s["essays"] = n
+    s["last"], s["last_topic"], s["last_date"] = score, topic, date
+    s["recent"] = (s["recent"] + [score])[-WINDOW:]
+    s["rolling_avg"] = round(sum(s["recent"]) / len(s["recent"]), 1)
+    s["total"] += score
+    s["mean"] = round(s["total"] / n, 1)
+
+    if issues is not None:
+        issues = list(issues)
+        for area in weak_areas:
+            count = area_hits(area, issues)
+            row = s["areas"].get(area)
+            if row is None:
+                s["areas"][area] = {"last": count, "avg": float(count), "trend": "new", "essays": 1}
+                continue
+            before = row["avg"]
+            row["trend"] = ("improving" if count < before - STEADY
+                            else "worse" if count > before + STEADY else "steady")
+            row["last"] = count
+            row["avg"] = round(ALPHA * count + (1 - ALPHA) * before, 3)
+            row["essays"] += 1
+    return s
+
+
+def progress_prompt(summary: Dict[str, Any]) -> str:
+    """The summary as a few short lines for an agent prompt."""
+    if not summary["essays"]:
+        return "First essay on record."
+    streaks = summary["streaks"]
+    lines = [
+        f"Essays: {summary['essays']}, best {summary['best']} ({summary['best_topic']}), "
+        f"average of last {len(summary['recent'])}: {summary['rolling_avg']}, "
+        f"overall {summary['mean']}.",
+        f"Latest: {summary['last']} ({summary['last_topic']}); "
+        f"previous best {summary['previous_best'] if summary['previous_best'] is not None else 'none'}.",
+        f"Streaks: {streaks['improving']} essays without a drop (best {streaks['best_improving']}), "
+        f"{streaks['first_try']} accepted on the first draft.",
+    ]
+    if summary["areas"]:
+        lines.append("Weak areas: " + "; ".join(
+            f"{area} {row['trend']} ({row['last']} issue(s) now, avg {row['avg']:.1f})"
+            for area, row in summary["areas"].items()))
+    return "\n".join(lines)
+
+
+class ProgressIndex:
+    """One summary row per student in SQLite; updates are read-fold-write in one transaction."""
+
+    def __init__(self, path=DEFAULT_PROGRESS_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS progress ("
+            " user_id TEXT PRIMARY KEY, body TEXT NOT NULL, updated REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def summary(self, user_id: str, profile: Optional[dict] = None) -> Dict[str, Any]:
+        """The student's summary; the first call folds in `profile["history"]`."""
+        with self._lock, self._db:
+            return self._load_or_seed(user_id, profile)
+
+    def record(self, user_id: str, score: int, topic: str = "",
+               issues: Iterable[str] = (), weak_areas: Iterable[str] = (),
+               revisions: Optional[int] = None, date: Optional[str] = None,
+               key: Optional[str] = None, profile: Optional[dict] = None) -> Dict[str, Any]:
+        """Fold an accepted essay into the student's summary and return it.
+
+        Recording the same `key` twice in a row (a replayed flow step) is a no-op.
+        """
+        with self._lock, self._db:
+            body = self._load_or_seed(user_id, profile)
+            if key is not None and body.get("last_key") == key:
+                return body
+            fold(body, score, topic, date or time.strftime("%Y-%m-%d"),
+                 issues, weak_areas, revisions)
+            body["last_key"] = key
+            self._save(user_id, body)
+            return body
+
+    def reset(self, user_id: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM progress WHERE user_id = ?", (user_id,))
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _load_or_seed(self, user_id: str, profile: Optional[dict]) -> Dict[str, Any]:
+        row = self._db.execute("SELECT body FROM progress WHERE user_id = ?",
+                               (user_id,)).fetchone()
+        if row:
+            return json.loads(row[0])
+        body = empty_summary()
+        for entry in (profile or {}).get("history", []):
+            if isinstance(entry.get("score"), (int, float)):
+                fold(body, int(entry["score"]), entry.get("topic", ""), entry.get("date", ""))
+        self._save(user_id, body)
+        return body
+
+    def _save(self, user_id: str, body: Dict[str, Any]) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO progress (user_id, body, updated) VALUES (?, ?, ?)",
+            (user_id, json.dumps(body), time.time()),
+        )
+
+
+_default: Optional[ProgressIndex] = None
+_default_lock = threading.Lock()
+
+
+def default_progress() -> ProgressIndex:
+    """Process-wide index at data/progress.sqlite, created on first use."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ProgressIndex()
+        return _default
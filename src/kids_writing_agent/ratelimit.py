@@ -0,0 +1,220 @@
+"""
+Process-wide, priority-aware rate limiting for model calls.
+
+Per-agent `max_rpm` only paces one agent; with many sessions the agents
+together still exceed the provider's account-wide limits and get 429 storms.
+`default_limiter()` is one pair of token buckets (requests and tokens per
+minute) shared by every `CachedAgent` in the process. A call reserves one
+request plus its estimated tokens before it goes out, and the estimate is
+settled against the real usage afterwards, including the extra requests a
+single kickoff can make (tool loops, retries). Callers that cannot be served wait
+in a queue (they never fail), ordered by priority and then by arrival, so
+interactive turns overtake batch grading.
+
+    with priority_scope("batch"):
+        await grader.run(essays)            # queued behind interactive turns
+
+Limits come from WRITEPAL_RPM / WRITEPAL_TPM (0 turns a bucket off).
+`stats()` reports queue depth per priority and wait times for the metrics
+endpoint.
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+PRIORITIES = {"interactive": 0, "batch": 1}
+COMPLETION_ESTIMATE = 400       # tokens reserved for the reply until usage is known
+POLL = 0.05                     # longest sleep between checks for an async waiter
+
+_priority: ContextVar[str] = ContextVar("call_priority", default="interactive")
+
+
+@contextmanager
+def priority_scope(priority: str):
+    """Run model calls made inside this block at `priority`."""
+    if priority not in PRIORITIES:
+        raise ValueError(f"unknown priority {priority!r}; use one of {sorted(PRIORITIES)}")
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+class TokenBucket:
+    """`rate` units per second, up to `capacity` banked; may go negative after a settle."""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.level = self.capacity
+        self._stamp = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def wait_for(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 if it is now)."""
+        if not self.enabled:
+            return 0.0
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._stamp) * self.rate)
+        self._stamp = now
+        amount = min(amount, self.capacity)     # an oversized call must not wait forever
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        if self.enabled:
+            self.level -= min(amount, self.capacity)
+
+    def give_back(self, amount: float) -> None:
+        """Credit (or, if negative, debit) `amount` after the real usage is known."""
+        if self.enabled:
+            self.level = min(self.capacity, self.level + amount)
+
+
+class Permit:
+    """One admitted call; `settle()` corrects the token and request estimates."""
+
+    def __init__(self, limiter: "RateLimiter", tokens: int, waited: float):
+        self.limiter = limiter
+        self.tokens = tokens
+        self.waited = waited
+
+    def settle(self, used_tokens: int, requests: int = 1) -> None:
+        """Book the real usage; `requests` beyond the one reserved are debited."""
+        with self.limiter._cond:
+            self.limiter._tokens.give_back(self.tokens - used_tokens)
+            if requests > 1:
+                self.limiter._requests.give_back(1 - requests)
+            self.limiter._cond.notify_all()
+
+
+class RateLimiter:
+    """Request and token buckets with a priority queue in front of them."""
+
+    def __init__(self, rpm: float = 0, tpm: float = 0, burst: Optional[float] = None):
+        self._cond = threading.Condition()
+        self._queue: list = []                      # heap of (priority, seq)
+        self._seq = itertools.count()
+        self.configure(rpm, tpm, burst)
+        self.admitted: Dict[str, int] = {p: 0 for p in PRIORITIES}
+        self.delayed: Dict[str, int] = {p: 0 for p in PRIORITIES}
+        self._waits: Dict[str, deque] = {p: deque(maxlen=500) for p in PRIORITIES}
+        self.max_wait = 0.0
+
+    def configure(self, rpm: float = 0, tpm: float = 0, burst: Optional[float] = None) -> None:
+        """Replace the limits; `burst` caps requests banked while idle (default: rpm/6)."""
+        with self._cond:
+            self.rpm, self.tpm = rpm, tpm
+            self._requests = TokenBucket(rpm, burst if burst is not None else max(1.0, rpm / 6))
+            self._tokens = TokenBucket(tpm)
+            self._cond.notify_all()
+
+    # ---------- admission ----------
+    def acquire(self, tokens: int, priority: Optional[str] = None) -> Permit:
+        """Block until the call may go out."""
+        ticket = self._enqueue(priority)
+        started = time.monotonic()
+        with self._cond:
+            try:
+                while True:
+                    wait = self._admit(ticket, tokens)
+                    if wait == 0:
+                        return self._permit(ticket, tokens, started)
+                    self._cond.wait(wait)
+            finally:
+                self._drop(ticket)
+
+    async def acquire_async(self, tokens: int, priority: Optional[str] = None) -> Permit:
+        """Like `acquire`, without blocking the event loop."""
+        ticket = self._enqueue(priority)
+        started = time.monotonic()
+        try:
+            while True:
+                with self._cond:
+                    wait = self._admit(ticket, tokens)
+                    if wait == 0:
+                        return self._permit(ticket, tokens, started)
+                await asyncio.sleep(min(wait, POLL))
+        finally:
+            with self._cond:
+                self._drop(ticket)
+
+    # ---------- exposure ----------
+    def stats(self) -> dict:
+        with self._cond:
+            depth = {p: 0 for p in PRIORITIES}
+            names = {v: k for k, v in PRIORITIES.items()}
+            for rank, _ in self._queue:
+                depth[names[rank]] += 1
+            out = {"rpm": self.rpm, "tpm": self.tpm, "max_wait_s": round(self.max_wait, 3),
+                   "requests_left": round(self._requests.level, 1) if self._requests.enabled else -1,
+                   "tokens_left": round(self._tokens.level) if self._tokens.enabled else -1}
+            for p in PRIORITIES:
+                waits = sorted(self._waits[p])
+                out[f"{p}_queued"] = depth[p]
+                out[f"{p}_admitted"] = self.admitted[p]
+                out[f"{p}_delayed"] = self.delayed[p]
+                out[f"{p}_wait_p50_s"] = round(waits[len(waits) // 2], 3) if waits else 0.0
+                out[f"{p}_wait_p95_s"] = (round(waits[min(len(waits) - 1, int(0.95 * len(waits)))], 3)
+                                          if waits else 0.0)
+        return out
+
+    # ---------- internals (caller holds self._cond unless noted) ----------
+    def _enqueue(self, priority: Optional[str]) -> tuple:
+        ticket = (PRIORITIES[priority or current_priority()], next(self._seq))
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+        return ticket
+
+    def _admit(self, ticket: tuple, tokens: int) -> float:
+        if self._queue[0] != ticket:
+            return POLL                         # someone ahead of us; woken when they leave
+        wait = max(self._requests.wait_for(1), self._tokens.wait_for(tokens))
+        if wait == 0:
+            self._requests.take(1)
+            self._tokens.take(tokens)
+        return wait
+
+    def _permit(self, ticket: tuple, tokens: int, started: float) -> Permit:
+        waited = time.monotonic() - started
+        name = next(k for k, v in PRIORITIES.items() if v == ticket[0])
+        self.admitted[name] += 1
+        if waited > 0.001:
+            self.delayed[name] += 1
+        self._waits[name].append(waited)
+        self.max_wait = max(self.max_wait, waited)
+        return Permit(self, tokens, waited)
+
+    def _drop(self, ticket: tuple) -> None:
+        if ticket in self._queue:
+            self._queue.remove(ticket)
+            heapq.heapify(self._queue)
+        self._cond.notify_all()
+
+
+_default: Optional[RateLimiter] = None
+_default_lock = threading.Lock()
+
+
+def default_limiter() -> RateLimiter:
+    """Process-wide limiter from WRITEPAL_RPM / WRITEPAL_TPM (gpt-4o-mini tier-1 defaults)."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = RateLimiter(rpm=float(os.getenv("WRITEPAL_RPM", "500")),
+                                   tpm=float(os.getenv("WRITEPAL_TPM", "200000")))
+        return _default
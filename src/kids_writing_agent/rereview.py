@@ -0,0 +1,163 @@
+"""
+Paragraph-level incremental re-review for the revise loop.
+
+A resubmitted draft is usually the previous one with a sentence or a paragraph
+changed. `plan_review` diffs it against the last reviewed draft paragraph by
+paragraph: issues on unchanged paragraphs are carried over, and only the
+changed paragraphs (with one sentence of their unchanged neighbours as
+context) go back to the reviewer. A draft with nothing changed reuses the last
+review outright; one that changed too much gets a full review.
+
+Reviewers are asked to tag each issue with its paragraph ("P2: ...", "P0:" for
+the whole essay) so issues can be pinned to paragraphs; untagged issues are
+matched by quoted text or treated as essay-level. The memo kept between
+reviews is plain JSON, so it lives in the flow state and survives checkpoints.
+
+    plan = plan_review(data["draft"], data.get("review_memo"))
+    if plan.unchanged:
+        data["assessment"], data["review_memo"] = plan.merge()
+    else:
+        prompt = header + (plan.render() if plan.full else plan.as_prompt())
+        data["assessment"], data["review_memo"] = plan.merge(parse_review(reply))
+"""
+import hashlib
+import re
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+from kids_writing_agent.rubric import PASS_SCORE, split_paragraphs, split_sentences
+
+# Above this share of changed paragraphs a full review is cheaper to reason about
+FULL_REVIEW_SHARE = 0.6
+
+ISSUE_TAGS = ("Start every issue with the paragraph it is about, like \"P2: ...\"; "
+              "use \"P0: ...\" for issues about the whole essay.")
+
+_TAG = re.compile(r"^\s*\[?P(\d+)\]?\s*[:.)-]\s*", re.I)
+_LABEL = re.compile(r"^Paragraph (\d+): ")
+_QUOTED = re.compile(r"[\"“]([^\"”]{12,})[\"”]")
+
+
+def paragraph_key(text: str) -> str:
+    """Whitespace-insensitive fingerprint of one paragraph."""
+    return hashlib.sha1(" ".join(text.split()).encode("utf-8")).hexdigest()[:16]
+
+
+def attribute(issues: List[str], paragraphs: List[str]) -> Tuple[Dict[int, List[str]], List[str]]:
+    """Split reviewer issues into ({paragraph index: [issue]}, essay-level issues)."""
+    per: Dict[int, List[str]] = {}
+    essay: List[str] = []
+    for issue in issues:
+        m = _TAG.match(issue) or _LABEL.match(issue)
+        n = int(m.group(1)) if m else 0
+        text = issue[m.end():].strip() if m else issue.strip()
+        if not m:
+            quoted = _QUOTED.search(issue)
+            if quoted:
+                needle = " ".join(quoted.group(1).split())
+                n = next((i + 1 for i, p in enumerate(paragraphs)
+                          if needle in " ".join(p.split())), 0)
+        if 1 <= n <= len(paragraphs):
+            per.setdefault(n - 1, []).append(text)
+        else:
+            essay.append(text)
+    return per, essay
+
+
+@dataclass
+class ReviewPlan:
+    paragraphs: List[str]
+    keys: List[str]
+    changed: List[int]                                  # indices into `paragraphs`
+    carried: Dict[int, List[str]] = field(default_factory=dict)
+    essay_issues: List[str] = field(default_factory=list)
+    previous_score: Optional[int] = None
+    full: bool = True
+
+    @property
+    def unchanged(self) -> bool:
+        return not self.full and not self.changed
+
+    def render(self) -> str:
+        """The whole draft with [Pn] markers, for a full review."""
+        return f"{ISSUE_TAGS}\n\n" + "\n\n".join(
+            f"[P{i + 1}] {p}" for i, p in enumerate(self.paragraphs))
+
+    def as_prompt(self) -> str:
+        """Changed paragraphs only, plus the little the reviewer needs about the rest."""
+        still_open = sum(len(v) for v in self.carried.values())
+        lines = [f"Revision: only changed paragraphs are shown. The others are unchanged since "
+                 f"the last review (score {self.previous_score}, {still_open} open issue(s) "
+                 "there). Score the WHOLE essay; list issues only for the paragraphs shown. "
+                 + ISSUE_TAGS]
+        if self.essay_issues:
+            lines.append("Whole-essay issues last time (repeat as P0 if still true): "
+                         + " | ".join(self.essay_issues))
+        lines.append("")
+        for i in self.changed:
+            if i - 1 >= 0 and i - 1 not in self.changed:
+                lines.append(f"(…end of P{i}) {_edge(self.paragraphs[i - 1], last=True)}")
+            lines.append(f"[P{i + 1}] {self.paragraphs[i]}")
+            if i + 1 < len(self.paragraphs) and i + 1 not in self.changed:
+                lines.append(f"(start of P{i + 2}…) {_edge(self.paragraphs[i + 1])}")
+        return "\n".join(lines)
+
+    def merge(self, review: Optional[dict] = None) -> Tuple[dict, dict]:
+        """(assessment for the flow, memo for the next round) from the reviewer's reply.
+
+        With no reply (nothing changed) the last review is reused.
+        """
+        if review is None:
+            per, essay, score = dict(self.carried), list(self.essay_issues), self.previous_score
+        else:
+            fresh, essay = attribute(review.get("issues", []), self.paragraphs)
+            per = dict(self.carried) if not self.full else {}
+            for i in (self.changed if not self.full else range(len(self.paragraphs))):
+                per[i] = fresh.get(i, [])
+            if not self.full:           # a tag pointing at an unchanged paragraph adds to it
+                for i, extra in fresh.items():
+                    if i not in self.changed:
+                        per[i] = per.get(i, []) + extra
+            score = review["score"]
+        issues = [f"Paragraph {i + 1}: {iss}" for i in sorted(per) for iss in per[i]] + essay
+        if review is not None and review.get("passed") is not None:
+            passed = bool(review["passed"])
+        else:
+            passed = score >= PASS_SCORE
+        assessment = {"score": score, "passed": passed, "issues": issues}
+        memo = {
+            "keys": self.keys,
+            "issues": [per.get(i, []) for i in range(len(self.paragraphs))],
+            "essay_issues": essay,
+            "score": score,
+        }
+        return assessment, memo
+
+
+def _edge(paragraph: str, last: bool = False) -> str:
+    sentences = split_sentences(paragraph) or [paragraph]
+    return sentences[-1] if last else sentences[0]
+
+
+def plan_review(draft: str, memo: Optional[dict] = None,
+                full_share: float = FULL_REVIEW_SHARE) -> ReviewPlan:
+    """Decide what the reviewer needs to see for `draft` given the last review's memo."""
+    paragraphs = split_paragraphs(draft)
+    keys = [paragraph_key(p) for p in paragraphs]
+    everything = list(range(len(paragraphs)))
+    if not memo or not paragraphs:
+        return ReviewPlan(paragraphs, keys, changed=everything)
+
+    carried: Dict[int, List[str]] = {}
+    matcher = SequenceMatcher(a=memo["keys"], b=keys, autojunk=False)
+    for a, b, size in matcher.get_matching_blocks():
+        for k in range(size):
+            carried[b + k] = list(memo["issues"][a + k])
+    changed = [i for i in everything if i not in carried]
+    removed = len(memo["keys"]) - len(carried)
+    if len(changed) > full_share * len(paragraphs) or (removed and not changed):
+        return ReviewPlan(paragraphs, keys, changed=everything)
+    return ReviewPlan(paragraphs, keys, changed=changed, carried=carried,
+                      essay_issues=list(memo.get("essay_issues", [])),
+                      previous_score=memo.get("score"), full=False)
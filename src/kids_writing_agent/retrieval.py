@@ -0,0 +1,281 @@
+"""
+Local retrieval over knowledge/ and the exemplar essays.
+
+Files are split into short chunks and embedded on the CPU with signed feature
+hashing (word unigrams and bigrams, no model download). Vectors live in a
+memory-mapped float32 matrix under data/retrieval/, chunk metadata next to it
+in JSON lines, so the index opens instantly and grows in place: `sync()` only
+re-embeds files whose content changed, and retired chunks are zeroed out.
+Search is one matrix-vector product plus a partial sort.
+
+Prompts get a handful of short snippets, never whole documents:
+
+    retriever = default_retriever()                     # synced on first use
+    hits = retriever.search("favorite animal dog", k=3, kind="exemplar", grade=3)
+    prompt += grounding(hits)
+
+Exemplar essays are Markdown files under knowledge/exemplars/ whose first line
+is `grade: <n>`; everything else is general knowledge for every grade.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from kids_writing_agent.profile_store import DATA_DIR, ROOT_DIR
+
+KNOWLEDGE_DIR = ROOT_DIR / "knowledge"
+DEFAULT_INDEX_DIR = DATA_DIR / "retrieval"
+DIM = 512               # hashed features per vector
+CHUNK_WORDS = 80        # upper bound per chunk; paragraphs are kept whole when they fit
+MIN_SCORE = 0.08        # cosine below this is noise for hashed vectors
+SNIPPET_WORDS = 45      # a snippet shown to an agent is clipped to this
+
+_WORD = re.compile(r"[a-z0-9']+")
+_STOP = frozenset("a an and are as at be but by for from had has have he her his i in is "
+                  "it its me my of on or our she so that the their them then they this "
+                  "to was we were with you your".split())
+_GRADE = re.compile(r"^grade:\s*(\d+)\s*$", re.I | re.M)
+
+
+def tokens(text: str) -> List[str]:
+    out = []
+    for w in _WORD.findall(text.lower()):
+        if w not in _STOP:
+            out.append(w[:-1] if len(w) > 3 and w.endswith("s") else w)
+    return out
+
+
+def embed(text: str, dim: int = DIM) -> np.ndarray:
+    """Unit-length hashed bag of unigrams and bigrams."""
+    words = tokens(text)
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    vec = np.zeros(dim, dtype=np.float32)
+    if not features:
+        return vec
+    hashes = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in features),
+                         dtype=np.uint32, count=len(features))
+    signs = np.where(hashes & 0x80000000, 1.0, -1.0).astype(np.float32)
+    np.add.at(vec, hashes % dim, signs)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+def chunk(text: str, max_words: int = CHUNK_WORDS) -> List[str]:
+    """Paragraphs, packed together up to `max_words`; long paragraphs are cut."""
+    chunks: List[str] = []
+    current: List[str] = []
+    for para in re.split(r"\n\s*\n", text):
+        words = para.split()
+        while len(words) > max_words:
+            if current:
+                chunks.append(" ".join(current))
+                current = []
+            chunks.append(" ".join(words[:max_words]))
+            words = words[max_words:]
+        if current and len(current) + len(words) > max_words:
+            chunks.append(" ".join(current))
+            current = []
+        current += words
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def clip(text: str, words: int = SNIPPET_WORDS) -> str:
+    parts = text.split()
+    return " ".join(parts[:words]) + (" …" if len(parts) > words else "")
+
+
+def grounding(hits: List[dict], title: str = "Reference snippets") -> str:
+    """Hits as a short prompt block ("" when there are none)."""
+    if not hits:
+        return ""
+    lines = [f"{title} (examples only; do not copy):"]
+    for hit in hits:
+        label = hit["source"] + (f", grade {hit['grade']}" if hit["grade"] else "")
+        lines.append(f"- [{label}] {clip(hit['text'])}")
+    return "\n".join(lines) + "\n\n"
+
+
+class VectorIndex:
+    """Append-only memory-mapped vector store with tombstones and top-k search."""
+
+    def __init__(self, path=DEFAULT_INDEX_DIR, dim: int = DIM):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        meta_file = self.path / "meta.json"
+        meta = json.loads(meta_file.read_text()) if meta_file.exists() else {}
+        self.dim = meta.get("dim", dim)
+        self.count = meta.get("count", 0)
+        self.capacity = meta.get("capacity", 0)
+        self.sources: Dict[str, dict] = meta.get("sources", {})
+        self.chunks: List[dict] = []
+        chunks_file = self.path / "chunks.jsonl"
+        if chunks_file.exists():
+            with open(chunks_file, encoding="utf-8") as fp:
+                self.chunks = [json.loads(line) for line in fp][:self.count]
+            self.count = len(self.chunks)
+        self._vectors = self._open(self.capacity) if self.capacity else None
+        self._masks: Dict[tuple, np.ndarray] = {}
+
+    # ---------- writing ----------
+    def add(self, texts: List[str], source: str = "", kind: str = "knowledge",
+            grade: int = 0) -> List[int]:
+        """Embed and append `texts`; returns their chunk ids."""
+        if not texts:
+            return []
+        vectors = np.stack([embed(t, self.dim) for t in texts])
+        with self._lock:
+            start = self.count
+            self._reserve(start + len(texts))
+            self._vectors[start:start + len(texts)] = vectors
+            self._vectors.flush()
+            rows = [{"id": start + i, "source": source, "kind": kind, "grade": grade,
+                     "text": t, "alive": True} for i, t in enumerate(texts)]
+            with open(self.path / "chunks.jsonl", "a", encoding="utf-8") as fp:
+                fp.writelines(json.dumps(row) + "\n" for row in rows)
+            self.chunks += rows
+            self.count += len(texts)
+            self._masks.clear()
+            self._save_meta()
+        return [row["id"] for row in rows]
+
+    def retire(self, source: str) -> int:
+        """Drop every chunk of `source` from search results."""
+        with self._lock:
+            ids = [c["id"] for c in self.chunks if c["source"] == source and c["alive"]]
+            for i in ids:
+                self.chunks[i]["alive"] = False
+                self._vectors[i] = 0.0
+            if ids:
+                self._vectors.flush()
+                self._rewrite_chunks()
+                self._masks.clear()
+            self.sources.pop(source, None)
+            self._save_meta()
+        return len(ids)
+
+    def sync(self, root=KNOWLEDGE_DIR) -> Dict[str, int]:
+        """Index new or changed *.txt / *.md files under `root`, retire deleted ones."""
+        root = Path(root)
+        seen = set()
+        stats = {"added": 0, "unchanged": 0, "retired": 0}
+        for file in sorted(p for p in root.rglob("*") if p.suffix in (".txt", ".md")):
+            rel = file.relative_to(root).as_posix()
+            seen.add(rel)
+            text = file.read_text(encoding="utf-8")
+            digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+            if self.sources.get(rel, {}).get("sha1") == digest:
+                stats["unchanged"] += 1
+                continue
+            stats["retired"] += self.retire(rel)
+            grade = _GRADE.search(text.split("\n", 1)[0])
+            body = _GRADE.sub("", text, count=1) if grade else text
+            kind = "exemplar" if rel.startswith("exemplars/") else "knowledge"
+            stats["added"] += len(self.add(chunk(body), rel, kind,
+                                           int(grade.group(1)) if grade else 0))
+            with self._lock:
+                self.sources[rel] = {"sha1": digest}
+                self._save_meta()
+        for rel in set(self.sources) - seen:
+            stats["retired"] += self.retire(rel)
+        return stats
+
+    # ---------- reading ----------
+    def search(self, query: str, k: int = 3, kind: Optional[str] = None,
+               grade: Optional[int] = None, min_score: float = MIN_SCORE,
+               distinct: bool = False) -> List[dict]:
+        """Top-k live chunks for `query`; `grade` keeps exemplars within one grade.
+
+        `distinct` returns at most one chunk per source file.
+        """
+        if not self.count:
+            return []
+        q = embed(query, self.dim)
+        with self._lock:
+            scores = self._vectors[:self.count] @ q
+            mask = self._mask(kind, grade)
+        if mask is not None:
+            scores = np.where(mask, scores, -1.0)
+        pool = min(self.count, max(8 * k, 32) if distinct else k)
+        while True:
+            top = np.argpartition(-scores, pool - 1)[:pool]
+            top = top[np.argsort(-scores[top])]
+            hits, seen = [], set()
+            for i in top:
+                if scores[i] < min_score or len(hits) == k:
+                    break
+                if distinct and self.chunks[i]["source"] in seen:
+                    continue
+                seen.add(self.chunks[i]["source"])
+                hits.append(dict(self.chunks[i], score=round(float(scores[i]), 3)))
+            if len(hits) == k or pool == self.count or scores[top[-1]] < min_score:
+                return hits
+            pool = self.count           # one source crowded out the rest; look at all
+
+    def close(self) -> None:
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+
+    # ---------- internals ----------
+    def _mask(self, kind: Optional[str], grade: Optional[int]) -> Optional[np.ndarray]:
+        if kind is None and grade is None:
+            return None
+        key = (kind, grade, self.count)
+        if key not in self._masks:
+            self._masks[key] = np.fromiter(
+                (c["alive"] and (kind is None or c["kind"] == kind)
+                 and (grade is None or not c["grade"] or abs(c["grade"] - grade) <= 1)
+                 for c in self.chunks), dtype=bool, count=self.count)
+        return self._masks[key]
+
+    def _open(self, capacity: int) -> np.memmap:
+        return np.memmap(self.path / "vectors.f32", dtype=np.float32, mode="r+",
+                         shape=(capacity, self.dim))
+
+    def _reserve(self, needed: int) -> None:
+        if needed <= self.capacity:
+            return
+        capacity = max(needed, 2 * self.capacity, 1024)
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        with open(self.path / "vectors.f32", "ab") as fp:     # grow the file, keep rows
+            fp.truncate(capacity * self.dim * 4)
+        self.capacity = capacity
+        self._vectors = self._open(capacity)
+
+    def _rewrite_chunks(self) -> None:
+        tmp = self.path / "chunks.jsonl.tmp"
+        with open(tmp, "w", encoding="utf-8") as fp:
+            fp.writelines(json.dumps(c) + "\n" for c in self.chunks)
+        os.replace(tmp, self.path / "chunks.jsonl")
+
+    def _save_meta(self) -> None:
+        tmp = self.path / "meta.json.tmp"
+        tmp.write_text(json.dumps({"dim": self.dim, "count": self.count,
+                                   "capacity": self.capacity, "sources": self.sources}))
+        os.replace(tmp, self.path / "meta.json")
+
+
+_default: Optional[VectorIndex] = None
+_default_lock = threading.Lock()
+
+
+def default_retriever() -> VectorIndex:
+    """Process-wide index at data/retrieval, synced with knowledge/ on first use."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = VectorIndex(os.getenv("WRITEPAL_RETRIEVAL_DIR", DEFAULT_INDEX_DIR))
+            _default.sync(os.getenv("WRITEPAL_KNOWLEDGE_DIR", KNOWLEDGE_DIR))
+        return _default
@@ -0,0 +1,136 @@
+"""
+Fast local rubric checks that run before the reviewer agent.
+
+`pre_score` measures a draft against its grade guide (word and paragraph
+counts, sentence stats) and, for the weak areas in the student's profile,
+flags likely comma splices and run-on sentences. When a draft plainly fails
+the guide it returns a verdict in the reviewer's `{'score','passed','issues'}`
+shape so the model call can be skipped; otherwise its findings are handed to
+the reviewer as extra context.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
+
+PASS_SCORE = 80
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_PRONOUNS = r"i|you|he|she|it|we|they"
+_DETERMINERS = r"this|that|there|these|those|my|his|her|our|their|its"
+_FINITE = (r"am|is|are|was|were|has|have|had|do|does|did|can|could|will|would|"
+           r"should|may|might|must")
+# ", they are" / ", it was" / ", my dog is" … a new subject and verb right after
+# a comma; ", my dog Max and my cat Luna" (an appositive or list) has no verb
+_SPLICE = re.compile(rf",\s+(?:(?:{_PRONOUNS})\s+\w+|"
+                     rf"(?:{_DETERMINERS})(?:\s+\w+){{0,2}}?\s+(?:{_FINITE})\b)", re.I)
+_SUBORDINATE_START = re.compile(
+    r"^\s*(?:after|although|as|because|before|if|since|when|whenever|while|"
+    r"until|once|though|unless|in|on|at|first|then|also)\b", re.I)
+
+
+@dataclass
+class RubricFindings:
+    words: int
+    paragraphs: int
+    sentences: int
+    avg_sentence_words: float
+    longest_sentence_words: int
+    comma_splices: List[str] = field(default_factory=list)
+    run_ons: List[str] = field(default_factory=list)
+    issues: List[str] = field(default_factory=list)
+    verdict: Optional[dict] = None      # set only when the local check is sure
+
+    def as_prompt(self) -> str:
+        """Findings block appended to the reviewer prompt."""
+        lines = [
+            "Local checks (already measured, do not recount):",
+            f"- words: {self.words}, paragraphs: {self.paragraphs}, "
+            f"sentences: {self.sentences}, avg sentence length: "
+            f"{self.avg_sentence_words:.1f} words",
+        ]
+        lines += [f"- possible comma splice: \"{s}\"" for s in self.comma_splices]
+        lines += [f"- possible run-on: \"{s}\"" for s in self.run_ons]
+        return "\n".join(lines)
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """Blank-line separated blocks; single-newline lines if there are none."""
+    blocks = [b.strip() for b in re.split(r"\n\s*\n", text) if b.strip()]
+    if len(blocks) <= 1:
+        blocks = [ln.strip() for ln in text.splitlines() if ln.strip()]
+    return blocks
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_END.split(" ".join(text.split())) if s.strip()]
+
+
+def find_comma_splices(sentences: Iterable[str]) -> List[str]:
+    found = []
+    for s in sentences:
+        m = _SPLICE.search(s)
+        if not m:
+            continue
+        before = s[:m.start()]
+        # "After school, I play" is an intro phrase, not a second clause
+        if len(before.split()) >= 3 and not _SUBORDINATE_START.match(before):
+            found.append(s)
+    return found
+
+
+def find_run_ons(sentences: Iterable[str], grade: int) -> List[str]:
+    limit = 25 if grade <= 3 else 35
+    found = []
+    for s in sentences:
+        n = len(s.split())
+        ands = len(re.findall(r"\band\b", s, re.I))
+        if (n > limit and "," not in s) or ands >= 3 or n > 2 * limit:
+            found.append(s)
+    return found
+
+
+def pre_score(draft: str, guide: dict, weak_areas: Iterable[str] = (),
+              grade: int = 3) -> RubricFindings:
+    paragraphs = split_paragraphs(draft)
+    sentences = split_sentences(draft)
+    lengths = [len(s.split()) for s in sentences]
+    words = len(draft.split())
+    findings = RubricFindings(
+        words=words,
+        paragraphs=len(paragraphs),
+        sentences=len(sentences),
+        avg_sentence_words=(sum(lengths) / len(lengths)) if lengths else 0.0,
+        longest_sentence_words=max(lengths, default=0),
+    )
+
+    weak = " ".join(weak_areas).lower()
+    if "comma" in weak or "splice" in weak:
+        findings.comma_splices = find_comma_splices(sentences)
+    if "run-on" in weak or "run on" in weak or "sentence" in weak:
+        findings.run_ons = find_run_ons(sentences, grade)
+
+    min_words, paras = guide["min_words"], guide["paras"]
+    if words == 0:
+        findings.issues.append("The essay is empty. Write your ideas in sentences.")
+    if 0 < words < min_words:
+        findings.issues.append(
+            f"Your essay has {words} words. Aim for at least {min_words}.")
+    if 0 < len(paragraphs) < paras:
+        findings.issues.append(
+            f"Your essay has {len(paragraphs)} paragraph(s). Use at least {paras}, "
+            "with a blank line between them.")
+    for s in findings.comma_splices:
+        findings.issues.append(f"Possible comma splice: \"{s}\" Try a period or 'and'.")
+    for s in findings.run_ons:
+        findings.issues.append(f"This sentence runs on: \"{s}\" Try splitting it.")
+
+    # Confident only about clear failures; a pass always needs the reviewer.
+    if words == 0 or words < min_words / 2 or len(paragraphs) < paras:
+        length_ratio = min(1.0, words / min_words) if min_words else 1.0
+        para_ratio = min(1.0, len(paragraphs) / paras) if paras else 1.0
+        findings.verdict = {
+            "score": min(PASS_SCORE - 1, round(70 * length_ratio * para_ratio)),
+            "passed": False,
+            "issues": list(findings.issues),
+        }
+    return findings
@@ -1,11 +1,53 @@
-from pydantic import BaseModel, Field
-from typing import Dict, List, Optional
+import json
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+from typing import Any, Dict, List, Optional
+
+# Grade-to-writing expectations (tweak as needed)
+GRADE_GUIDE = {
+    1: {"paras": 2, "min_words": 40,  "max_words": 700},
+    2: {"paras": 3, "min_words": 60,  "max_words": 1000},
+    3: {"paras": 3, "min_words": 80,  "max_words": 1500},   # Reading Rockets, Reddit teacher
+    4: {"paras": 4, "min_words": 120, "max_words": 2000},
+    5: {"paras": 4, "min_words": 150, "max_words": 3000},
+    6: {"paras": 5, "min_words": 200, "max_words": 4000},
+}
+
+class StudentProfile(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    age: int
+    grade: int
+    skill_level: str = ""
+    weak_areas: List[str] = Field(default_factory=list)
+    history: List[Dict[str, Any]] = Field(default_factory=list)
+
+class Review(BaseModel):
+    score: int = Field(ge=0, le=100)
+    passed: Optional[bool] = None
+    issues: List[str] = Field(default_factory=list)
+
+    @field_validator("issues", mode="before")
+    @classmethod
+    def _issues_as_text(cls, v):
+        if isinstance(v, str):
+            return [v] if v.strip() else []
+        return [i if isinstance(i, str) else json.dumps(i) for i in v or []]
+
+    @model_validator(mode="after")
+    def _default_passed(self):
+        if self.passed is None:          # "Pass if score >= 80" (tasks.yaml)
+            self.passed = self.score >= 80
+        return self
 
 class EssayState(BaseModel):
     user_id: str = "demo_user"
     topic: str = ""
     requirements: str = ""
-    profile: Dict[str, str] = {}
+    profile: Dict[str, Any] = {}
+    progress: Dict[str, Any] = {}      # compact summary from the progress index
+    budget: Dict[str, Any] = {}        # SessionBudget.snapshot(): remaining tokens/calls/cost
+    grade: int = 3
+    guide: Dict[str, int] = {}
     ideas: List[str] = Field(default_factory=list)
     outline: List[str] = Field(default_factory=list)
     draft: str = ""
@@ -0,0 +1,93 @@
+"""
+Token streaming from agents to whoever is talking to the student.
+
+Agents built with `streaming_llm()` emit `LLMStreamChunkEvent`s on the crewAI
+event bus. A single bus handler forwards each chunk to the sink registered
+for the current context with `stream_to(...)`, so concurrent sessions (threads
+or asyncio tasks) each receive only their own tokens. Agents answer in the
+ReAct shape ("Thought: … Final Answer: …"); the agent's reasoning is held
+back and only the text after `Final Answer:` reaches the student.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from crewai import LLM
+from crewai.utilities.events import crewai_event_bus
+from crewai.utilities.events.llm_events import LLMCallStartedEvent, LLMStreamChunkEvent
+
+Sink = Callable[[str], None]
+
+ANSWER_MARKER = "Final Answer:"
+
+
+class _AnswerOnly:
+    """Forwards one model call's stream to `sink`, starting after the answer marker."""
+
+    def __init__(self, sink: Sink):
+        self.sink = sink
+        self.reset()
+
+    def reset(self) -> None:
+        self._held = ""
+        self._answering = False
+        self._started = False
+
+    def feed(self, chunk: str) -> None:
+        if not self._answering:
+            self._held += chunk
+            at = self._held.find(ANSWER_MARKER)
+            if at < 0:
+                return
+            self._answering = True
+            chunk, self._held = self._held[at + len(ANSWER_MARKER):], ""
+        if not self._started:
+            chunk = chunk.lstrip()
+            self._started = bool(chunk)
+        if chunk:
+            self.sink(chunk)
+
+
+_sink: ContextVar[Optional[_AnswerOnly]] = ContextVar("stream_sink", default=None)
+_installed = False
+_install_lock = threading.Lock()
+
+
+def streaming_llm(model: Optional[str] = None, **kwargs) -> LLM:
+    """LLM that streams tokens; same default model crewAI would pick."""
+    model = model or os.getenv("MODEL") or os.getenv("OPENAI_MODEL_NAME") or "gpt-4o-mini"
+    return LLM(model=model, stream=True, **kwargs)
+
+
+@contextmanager
+def stream_to(sink: Sink):
+    """Send stream chunks produced inside this block to `sink`."""
+    _install()
+    token = _sink.set(_AnswerOnly(sink))
+    try:
+        yield
+    finally:
+        _sink.reset(token)
+
+
+def _install() -> None:
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+
+        @crewai_event_bus.on(LLMCallStartedEvent)
+        def _new_call(source, event):
+            sink = _sink.get()
+            if sink is not None:
+                sink.reset()            # each call (retry, tool step) has its own preamble
+
+        @crewai_event_bus.on(LLMStreamChunkEvent)
+        def _forward(source, event):
+            sink = _sink.get()
+            if sink is not None and event.chunk:
+                sink.feed(event.chunk)
+
+        _installed = True
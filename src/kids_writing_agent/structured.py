@@ -0,0 +1,177 @@
+"""
+Structured-output parsing for agent replies.
+
+Model replies that should be JSON (reviews, profiles) often arrive wrapped in
+prose or markdown fences, with single quotes, Python literals or trailing
+commas. `parse_structured` extracts every balanced `{...}` candidate, tries it
+strictly, then after local repair, and validates it against a pydantic schema.
+Only when all of that fails does it ask the model for a targeted correction.
+"""
+import ast
+import json
+import re
+import threading
+from collections import Counter
+from typing import Awaitable, Callable, Iterator, Optional, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+M = TypeVar("M", bound=BaseModel)
+Fixer = Callable[[str, str], str]
+AsyncFixer = Callable[[str, str], Awaitable[str]]
+
+_stats: Counter = Counter()
+_stats_lock = threading.Lock()
+
+
+class StructuredOutputError(ValueError):
+    """Raised when a reply cannot be turned into the requested schema."""
+
+
+def _count(schema: Type[BaseModel], event: str) -> None:
+    with _stats_lock:
+        _stats[f"{schema.__name__}.{event}"] += 1
+
+
+def parse_stats() -> dict:
+    """Counters such as `Review.parsed`, `Review.repaired`, `Review.failed`."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def iter_json_objects(text: str) -> Iterator[str]:
+    """Yield each balanced top-level `{...}` span, ignoring braces in strings."""
+    depth, start, quote, escaped = 0, None, None, False
+    for i, ch in enumerate(text):
+        if quote:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == quote:
+                quote = None
+            continue
+        if ch in "\"'" and depth:
+            quote = ch
+        elif ch == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif ch == "}" and depth:
+            depth -= 1
+            if depth == 0:
+                yield text[start:i + 1]
+
+
+def repair_json(candidate: str) -> Optional[object]:
+    """Best-effort local fixes; returns the decoded object or None."""
+    text = re.sub(r",\s*([}\]])", r"\1", candidate)             # trailing commas
+    text = re.sub(r"([{,]\s*)([A-Za-z_]\w*)(\s*:)", r'\1"\2"\3', text)  # bare keys
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    # single quotes / True / None: let Python's literal parser have a go
+    py = re.sub(r"\btrue\b", "True", text)
+    py = re.sub(r"\bfalse\b", "False", py)
+    py = re.sub(r"\bnull\b", "None", py)
+    try:
+        value = ast.literal_eval(py)
+    except (ValueError, SyntaxError):
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def _validate(schema: Type[M], value: object) -> Optional[M]:
+    try:
+        return schema.model_validate(value)
+    except ValidationError:
+        return None
+
+
+def _parse_locally(text: str, schema: Type[M]) -> tuple[Optional[M], bool, str]:
+    """Return (model, repaired?, last error)."""
+    error = "no JSON object found"
+    candidates = list(iter_json_objects(text))
+    for candidate in candidates:
+        try:
+            model = _validate(schema, json.loads(candidate))
+            if model is not None:
+                return model, False, ""
+            error = f"does not match the {schema.__name__} schema"
+        except json.JSONDecodeError as exc:
+            error = str(exc)
+    for candidate in candidates:
+        value = repair_json(candidate)
+        if value is not None:
+            model = _validate(schema, value)
+            if model is not None:
+                return model, True, ""
+    return None, False, error
+
+
+def _local_or_none(text: str, schema: Type[M]) -> tuple[Optional[M], str]:
+    model, repaired, error = _parse_locally(text, schema)
+    if model is not None:
+        _count(schema, "repaired" if repaired else "parsed")
+    else:
+        _count(schema, "local_failures")
+    return model, error
+
+
+def _corrected(text: str, schema: Type[M]) -> M:
+    _count(schema, "model_corrections")
+    model, _, error = _parse_locally(text, schema)
+    if model is None:
+        _count(schema, "failed")
+        raise StructuredOutputError(f"could not parse {schema.__name__}: {error}")
+    return model
+
+
+def parse_structured(text: str, schema: Type[M], fix: Optional[Fixer] = None) -> M:
+    """
+    Parse `text` into `schema`, repairing locally and, if `fix` is given,
+    asking the model once for a corrected reply.
+    """
+    model, error = _local_or_none(text, schema)
+    if model is not None:
+        return model
+    if fix is None:
+        _count(schema, "failed")
+        raise StructuredOutputError(f"could not parse {schema.__name__}: {error}")
+    return _corrected(fix(text, error), schema)
+
+
+async def aparse_structured(text: str, schema: Type[M],
+                            fix: Optional[AsyncFixer] = None) -> M:
+    """`parse_structured` for async flows; `fix` is awaited."""
+    model, error = _local_or_none(text, schema)
+    if model is not None:
+        return model
+    if fix is None:
+        _count(schema, "failed")
+        raise StructuredOutputError(f"could not parse {schema.__name__}: {error}")
+    return _corrected(await fix(text, error), schema)
+
+
+def _correction_prompt(schema: Type[BaseModel], bad_reply: str, error: str) -> str:
+    fields = json.dumps(schema.model_json_schema().get("properties", {}))
+    return (
+        f"This reply could not be parsed ({error}):\n{bad_reply}\n\n"
+        f"Rewrite it as ONE JSON object with these fields: {fields}. "
+        "Use double quotes. No markdown, no commentary."
+    )
+
+
+def correct_with(agent, schema: Type[BaseModel]) -> Fixer:
+    """Fixer that asks `agent` to rewrite a broken reply as schema-valid JSON."""
+    def fix(bad_reply: str, error: str) -> str:
+        return agent.kickoff(_correction_prompt(schema, bad_reply, error)).raw
+    return fix
+
+
+def acorrect_with(agent, schema: Type[BaseModel]) -> AsyncFixer:
+    """Async `correct_with` using `Agent.kickoff_async`."""
+    async def fix(bad_reply: str, error: str) -> str:
+        return (await agent.kickoff_async(_correction_prompt(schema, bad_reply, error))).raw
+    return fix
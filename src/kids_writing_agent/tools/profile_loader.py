@@ -1,6 +1,6 @@
 from crewai.tools import BaseTool
-from pathlib import Path
-import json
+
+from kids_writing_agent.profile_store import default_store
 
 class ProfileLoader(BaseTool):
     name: str = "profile_loader"
@@ -10,9 +10,4 @@ class ProfileLoader(BaseTool):
 
     def _run(self, user_id: str):
         """Return a dict with the profile or an empty dict if not found."""
-        db_path = Path(__file__).resolve().parents[2] / "data" / "profiles.json"
-        if not db_path.exists():
-            return {}
-        with open(db_path, encoding="utf-8") as fp:
-            db = json.load(fp)
-        return db.get(user_id, {})
\ No newline at end of file
+        return default_store().get(user_id)
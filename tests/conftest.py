@@ -0,0 +1,10 @@
+import os
+import tempfile
+
+# In-process tests open the default stores (metrics log, kickoff cache, progress);
+# keep them out of the real data/ directory, and keep crewAI and litellm offline.
+os.environ["WRITEPAL_DATA_DIR"] = tempfile.mkdtemp(prefix="writepal_tests_")
+os.environ.setdefault("OPENAI_API_KEY", "offline-tests")
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("crewai")
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.mark.parametrize("flow", ["sync", "async"])
+def test_bench_flow_runs_end_to_end_on_the_mock(flow, tmp_path):
+    data = tmp_path / "data"
+    report = tmp_path / "report.json"
+    env = dict(os.environ, WRITEPAL_DATA_DIR=str(data))
+    result = subprocess.run(
+        [sys.executable, "benchmarks/bench_flow.py", "--flow", flow, "--sessions", "1",
+         "--json", str(report)],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "praise" in result.stdout
+    assert report.exists()
+    # the scripted essay went to the scratch stores, not the real roster
+    assert (data / "progress.sqlite").exists() and (data / "profiles.json").exists()
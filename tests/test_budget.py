@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+pytest.importorskip("pydantic")
+
+from kids_writing_agent.budget import (                                     # noqa: E402
+    BudgetExceeded, BudgetLimits, SessionBudget, budget_scope, current_budget, limits_for,
+)
+
+LIMITS = BudgetLimits(tokens=1000, calls=10, cost=1.0, brainstorm_turns=2,
+                      low=0.35, critical=0.15, cheap_model="gpt-4.1-nano")
+
+
+def test_levels_follow_the_smallest_share_left():
+    budget = SessionBudget(LIMITS)
+    assert budget.level == "ok"
+    budget.charge("Outline Planner", 500, 200)       # 30% of tokens left
+    assert budget.level == "low"
+    budget.charge("Outline Planner", 150, 50)        # 10% left
+    assert budget.level == "critical"
+    budget.charge("Outline Planner", 100, 0)
+    assert budget.level == "exhausted" and budget.exhausted
+
+
+def test_allow_stops_optional_calls_before_essential_ones():
+    budget = SessionBudget(LIMITS)
+    budget.charge("Reviewer", 900, 0)
+    assert not budget.allow()
+    assert budget.allow(essential=True)
+    budget.charge("Reviewer", 100, 0)
+    assert not budget.allow(essential=True)
+    with pytest.raises(BudgetExceeded):
+        budget.check("Reviewer")
+
+
+def test_loop_caps():
+    budget = SessionBudget(LIMITS)
+    assert budget.tick("brainstorm") == 1
+    assert budget.allow("brainstorm")
+    budget.tick("brainstorm")
+    assert not budget.allow("brainstorm")
+    assert budget.allow("review")
+
+
+def test_cheap_model_and_prompt_scale_once_low():
+    budget = SessionBudget(LIMITS)
+    assert budget.model_for("openai/gpt-4o-mini") is None
+    assert budget.scaled(1200) == 1200
+    budget.charge("Coach", 700, 0)
+    assert budget.model_for("openai/gpt-4o-mini") == "gpt-4.1-nano"
+    assert budget.model_for("gpt-4.1-nano") is None
+    assert budget.scaled(1200) == 600
+
+
+def test_snapshot_round_trips_through_json():
+    changes = []
+    budget = SessionBudget(LIMITS, on_change=changes.append)
+    budget.charge("Guide", 100, 20, "gpt-4o-mini")
+    budget.tick("review")
+    budget.note("coach:local")
+    snapshot = json.loads(json.dumps(budget.snapshot()))
+    assert changes and changes[-1]["degraded"] == ["coach:local"]
+
+    restored = SessionBudget()
+    restored.restore(snapshot)
+    assert restored.snapshot() == snapshot
+    assert restored.remaining() == {"tokens": 880, "calls": 9,
+                                    "cost": round(1.0 - budget.cost, 6)}
+
+
+def test_budget_scope_is_contextual():
+    budget = SessionBudget(LIMITS)
+    assert current_budget() is None
+    with budget_scope(budget):
+        assert current_budget() is budget
+    assert current_budget() is None
+
+
+def test_limits_layering(tmp_path, monkeypatch):
+    path = tmp_path / "budgets.json"
+    path.write_text(json.dumps({"default": {"calls": 30},
+                                "grades": {"3": {"tokens": 12345, "bogus": 1}}}))
+    monkeypatch.delenv("WRITEPAL_BUDGET_SCALE", raising=False)
+    monkeypatch.setenv("WRITEPAL_BUDGET_CHEAP_MODEL", "gpt-4.1-nano")
+    limits = limits_for(3, path)
+    assert (limits.tokens, limits.calls, limits.brainstorm_turns) == (12345, 30, 6)
+    assert limits.cheap_model == "gpt-4.1-nano"
+    monkeypatch.setenv("WRITEPAL_BUDGET_SCALE", "0.5")
+    assert limits_for(3, path).tokens == 6172
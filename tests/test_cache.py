@@ -0,0 +1,119 @@
+import time
+
+import pytest
+
+pytest.importorskip("crewai")
+
+from kids_writing_agent import cache as cache_module                 # noqa: E402
+from kids_writing_agent.cache import CachedAgent, KickoffCache      # noqa: E402
+from kids_writing_agent.mock_llm import MockLLM, MockLog            # noqa: E402
+from kids_writing_agent.ratelimit import RateLimiter                # noqa: E402
+
+ROLE = "Outline Planner"
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = KickoffCache(tmp_path / "kickoff.sqlite")
+    monkeypatch.setattr(cache_module, "_default_cache", store)
+    return store
+
+
+def make_agent(script, calls=None, **kwargs):
+    return CachedAgent(role=ROLE, goal="Outline essays.", backstory="A planner.",
+                       llm=MockLLM(ROLE, script={ROLE: script}, call_log=MockLog() if calls is None else calls),
+                       verbose=False, **kwargs)
+
+
+def test_keys_ignore_whitespace_but_not_role_or_model():
+    key = KickoffCache.make_key(ROLE, "gpt-4o-mini", "Outline  my\nessay ")
+    assert key == KickoffCache.make_key(ROLE, "gpt-4o-mini", "Outline my essay")
+    assert key != KickoffCache.make_key("Reviewer", "gpt-4o-mini", "Outline my essay")
+    assert key != KickoffCache.make_key(ROLE, "gpt-4.1-nano", "Outline my essay")
+
+
+def test_get_put_and_ttl(tmp_path):
+    store = KickoffCache(tmp_path / "kickoff.sqlite", ttl=0.05)
+    store.put("k", ROLE, "outline")
+    assert store.get("k", ROLE) == "outline"
+    time.sleep(0.06)
+    assert store.get("k", ROLE) is None
+    assert store.stats()["by_role"][ROLE] == {"hits": 1, "misses": 1}
+
+
+def test_least_recently_used_entries_go_first(tmp_path):
+    store = KickoffCache(tmp_path / "kickoff.sqlite", max_entries=2)
+    store.put("a", ROLE, "A")
+    time.sleep(0.01)
+    store.put("b", ROLE, "B")
+    time.sleep(0.01)
+    store.get("a", ROLE)                      # "b" is now the oldest
+    store.put("c", ROLE, "C")
+    assert store.get("b") is None and store.get("a") == "A" and store.get("c") == "C"
+
+
+def test_size_cap_evicts(tmp_path):
+    store = KickoffCache(tmp_path / "kickoff.sqlite", max_bytes=10)
+    store.put("a", ROLE, "x" * 8)
+    store.put("b", ROLE, "y" * 8)
+    assert store.stats()["entries"] == 1 and store.get("b") == "y" * 8
+
+
+def test_survives_a_reopen(tmp_path):
+    KickoffCache(tmp_path / "kickoff.sqlite").put("k", ROLE, "outline")
+    assert KickoffCache(tmp_path / "kickoff.sqlite").get("k") == "outline"
+
+
+def test_opted_in_agent_serves_repeats_from_the_cache(store):
+    calls = MockLog()
+    agent = make_agent("1. Intro\n2. Body\n3. Conclusion", calls, kickoff_cache=True)
+    first = agent.kickoff("Outline: dogs are loyal")
+    again = agent.kickoff("Outline:   dogs are loyal")
+    assert again.raw == first.raw and len(calls) == 1
+    assert store.stats()["hits"] == 1
+
+
+def test_agents_that_did_not_opt_in_always_call_the_model(store):
+    calls = MockLog()
+    agent = make_agent("1. Intro", calls)
+    agent.kickoff("Outline: dogs are loyal")
+    agent.kickoff("Outline: dogs are loyal")
+    assert len(calls) == 2 and store.stats()["entries"] == 0
+
+
+def test_a_failed_call_gives_its_tokens_back_to_the_limiter(store, monkeypatch):
+    limiter = RateLimiter(rpm=600, tpm=6000)
+    monkeypatch.setattr(cache_module, "default_limiter", lambda: limiter)
+
+    def rate_limited(prompt, turn):
+        raise RuntimeError("429 Too Many Requests")
+
+    agent = make_agent(rate_limited)
+    with pytest.raises(Exception):
+        agent.kickoff("Outline: dogs are loyal")
+    stats = limiter.stats()
+    assert stats["tokens_left"] == pytest.approx(6000, abs=5)
+    assert stats["requests_left"] == pytest.approx(99, abs=0.5)      # the one request is spent
+
+
+def test_cheaper_twins_belong_to_their_agent():
+    planner, reviewer = make_agent("1. Intro"), make_agent("ok")
+    reviewer.role = "Writing Reviewer"
+    twin = cache_module._cheaper_twin(planner, "gpt-4.1-nano")
+    assert cache_module._cheaper_twin(planner, "gpt-4.1-nano") is twin
+    assert twin.role == ROLE and twin.llm.model == "gpt-4.1-nano"
+    assert planner.llm.model != "gpt-4.1-nano"
+    other = cache_module._cheaper_twin(reviewer, "gpt-4.1-nano")
+    assert other is not twin and other.role == "Writing Reviewer"
+
+
+def test_a_low_budget_switches_to_the_twin(store):
+    from kids_writing_agent.budget import BudgetLimits, SessionBudget, budget_scope
+
+    budget = SessionBudget(BudgetLimits(tokens=1000, calls=10, cost=1.0,
+                                        cheap_model="mock/cheap"))
+    budget.charge("Coach", 700, 0)                  # "low": cheaper model from here on
+    agent = make_agent("1. Intro")
+    with budget_scope(budget):
+        agent.kickoff("Outline: dogs are loyal")
+    assert list(agent._twins) == ["mock/cheap"]
@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("pydantic")
+
+from kids_writing_agent.checkpoint import CheckpointStore, checkpointed   # noqa: E402
+
+
+class Steps:
+    """Stands in for a flow: a dict state, a checkpoint and a call log."""
+
+    def __init__(self, checkpoint, crash_at=None):
+        self.state = {}
+        self.checkpoint = checkpoint
+        self.crash_at = crash_at
+        self.ran = []
+
+    def _run(self, step, data):
+        if step == self.crash_at:
+            raise RuntimeError("crash")
+        self.ran.append(step)
+        self.state["last"] = step
+        return {**data, step: len(self.ran)}
+
+    @checkpointed
+    def intake(self, data):
+        return self._run("intake", data)
+
+    @checkpointed
+    def outline(self, data):
+        return self._run("outline", data)
+
+    @checkpointed
+    def review(self, data):
+        return self._run("review", data)
+
+    @checkpointed
+    def praise(self, data):
+        return self._run("praise", data)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CheckpointStore(tmp_path / "checkpoints.sqlite")
+
+
+def test_resume_replays_logged_steps_without_running_them(store):
+    first = Steps(store.session("s1", "kid"), crash_at="review")
+    data = first.outline(first.intake({}))
+    with pytest.raises(RuntimeError):
+        first.review(data)
+
+    cp = store.session("s1", "kid")
+    assert cp.resumed and cp.last_state() == {"last": "outline"}
+    again = Steps(cp)
+    data = again.review(again.outline(again.intake({})))
+    assert again.ran == ["review"] and cp.replayed == ["intake", "outline"]
+    assert data == {"intake": 1, "outline": 2, "review": 1}
+    assert again.state["last"] == "review"
+
+
+def test_a_different_path_drops_the_rest_of_the_log(store):
+    first = Steps(store.session("s1", "kid"))
+    first.review(first.outline(first.intake({})))
+
+    cp = store.session("s1", "kid")
+    again = Steps(cp)
+    again.praise(again.intake({}))              # skips outline this time
+    assert again.ran == ["praise"] and cp.replayed == ["intake"]
+    assert [step for step, _ in store.history("s1")] == ["intake", "praise"]
+
+
+def test_only_changed_keys_are_logged(store):
+    flow = Steps(store.session("s1", "kid"))
+    flow.outline(flow.intake({"essay": "x" * 1000}))
+    deltas = [json.loads(row[0]) for row in store._db.execute(
+        "SELECT delta FROM flow_deltas WHERE session_id = 's1' ORDER BY seq")]
+    assert "result.essay" in deltas[0]["set"]
+    assert "result.essay" not in deltas[1]["set"] and "result.outline" in deltas[1]["set"]
+
+
+def test_finish_closes_the_session_and_starts_fresh(store):
+    flow = Steps(store.session("s1", "kid"))
+    flow.intake({})
+    assert [s["session_id"] for s in store.open_sessions("kid")] == ["s1"]
+    flow.checkpoint.finish()
+    assert store.open_sessions() == [] and not store.session("s1", "kid").resumed
+
+
+def test_async_steps_replay_too(store):
+    class AsyncSteps(Steps):
+        @checkpointed
+        async def draft(self, data):
+            return self._run("draft", data)
+
+    first = AsyncSteps(store.session("s1", "kid"))
+    asyncio.run(first.draft(first.intake({})))
+    again = AsyncSteps(store.session("s1", "kid"))
+    assert asyncio.run(again.draft(again.intake({}))) == {"intake": 1, "draft": 2}
+    assert again.ran == []
+
+
+def test_no_checkpoint_runs_live(store):
+    flow = Steps(None)
+    flow.intake({})
+    assert flow.ran == ["intake"]
@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("crewai")
+
+from kids_writing_agent.grade_batch import BatchGrader, done_ids, iter_essays   # noqa: E402
+from kids_writing_agent.mock_llm import MockLLM                                  # noqa: E402
+
+PARAGRAPH = ("My dog Max is loyal and kind. He waits for me at the door after school "
+             "every day. We run in the park and play fetch until the sun goes down. ")
+ESSAY = "\n\n".join([PARAGRAPH * 2] * 3)          # long enough for the reviewer
+
+
+def write_jsonl(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def test_folder_essays_are_keyed_by_relative_path(tmp_path):
+    for name in ("a.txt", "a.md", "notes.pdf"):
+        (tmp_path / name).write_text("Dogs are great.", encoding="utf-8")
+    records = list(iter_essays(tmp_path, "Pets", 3))
+    assert [r["id"] for r in records] == ["a.md", "a.txt"]
+    assert records[0]["topic"] == "Pets" and records[0]["grade"] == 3
+
+
+def test_malformed_jsonl_lines_become_error_records(tmp_path):
+    source = write_jsonl(tmp_path / "essays.jsonl", [
+        json.dumps({"id": "e1", "draft": "Dogs.", "grade": 4}),
+        "",
+        "{oops",
+        "[1, 2]",
+        json.dumps({"text": "Cats."}),
+    ])
+    records = list(iter_essays(source, "Pets", 3))
+    assert records[0] == {"id": "e1", "essay": "Dogs.", "topic": "Pets", "grade": 4}
+    assert [r["id"] for r in records[1:3]] == ["3", "4"]
+    assert all("error" in r for r in records[1:3])
+    assert records[3]["id"] == "5" and records[3]["essay"] == "Cats."
+
+
+def test_done_ids_retries_errors_and_torn_lines(tmp_path):
+    output = tmp_path / "grades.jsonl"
+    output.write_text('{"id": "a", "score": 90}\n{"id": "b", "error": "429"}\n{"id": "c", "sc',
+                      encoding="utf-8")
+    assert done_ids(output) == {"a"}
+    assert done_ids(tmp_path / "missing.jsonl") == set()
+
+
+def test_run_grades_resumes_and_survives_a_bad_line(tmp_path):
+    source = write_jsonl(tmp_path / "essays.jsonl", [
+        json.dumps({"id": "short", "essay": "Dogs are nice."}),
+        "{oops",
+        json.dumps({"id": "long", "essay": ESSAY}),
+    ])
+    output = tmp_path / "grades.jsonl"
+
+    def grader():
+        g = BatchGrader(output, concurrency=2)
+        g.reviewer.llm = MockLLM("Writing Reviewer", script={
+            "Writing Reviewer": '{"score": 90, "passed": true, "issues": []}'})
+        return g
+
+    counts = asyncio.run(grader().run(iter_essays(source, "My Dog", 3)))
+    assert counts == {"reviewer": 1, "rubric": 1, "errors": 1, "skipped": 0}
+    rows = {row["id"]: row for row in map(json.loads, output.read_text().splitlines())}
+    assert rows["long"]["score"] == 90 and rows["short"]["source"] == "rubric"
+    assert "error" in rows["2"]
+
+    again = asyncio.run(grader().run(iter_essays(source, "My Dog", 3)))
+    assert again == {"reviewer": 0, "rubric": 0, "errors": 1, "skipped": 2}
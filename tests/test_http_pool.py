@@ -0,0 +1,80 @@
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+
+from stub_openai import serve                                  # noqa: E402
+
+from kids_writing_agent import http_pool                       # noqa: E402
+from kids_writing_agent.http_pool import pooled_client         # noqa: E402
+
+BODY = {"model": "stub", "messages": [{"role": "user", "content": "hi"}]}
+
+
+@pytest.fixture
+def stub():
+    server, counters = serve(latency_ms=50)
+    yield f"http://127.0.0.1:{server.server_port}/v1/chat/completions", counters
+    server.shutdown()
+
+
+def test_sequential_calls_reuse_one_connection(stub):
+    url, counters = stub
+    with pooled_client() as client:
+        for _ in range(5):
+            assert client.post(url, json=BODY).json()["choices"]
+        stats = client._transport.stats()
+    assert counters["connections"] == 1
+    assert stats["requests"] == 5 and stats["connections_opened"] == 1
+    assert stats["reused"] == 4 and stats["in_flight"] == 0
+    assert stats["tls_handshakes"] == 0
+
+
+def test_per_host_cap_queues_extra_requests(stub):
+    url, counters = stub
+    with pooled_client(per_host=2) as client:
+        threads = [threading.Thread(target=client.post, args=(url,), kwargs={"json": BODY})
+                   for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats = client._transport.stats()
+    assert counters["requests"] == 6
+    assert counters["connections"] <= 2 and stats["connections_opened"] <= 2
+    assert stats["host_waits"] >= 1 and stats["host_wait_s"] > 0
+    assert stats["in_flight"] == 0
+
+
+def test_a_failed_request_frees_its_slot():
+    with pooled_client(per_host=1) as client:
+        for _ in range(3):                   # would block on the second try if leaked
+            with pytest.raises(httpx.ConnectError):
+                client.get("http://127.0.0.1:9/")
+        assert client._transport.stats()["in_flight"] == 0
+
+
+def test_limits_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv("WRITEPAL_HTTP_MAX_CONNECTIONS", "4")
+    monkeypatch.setenv("WRITEPAL_HTTP_PER_HOST", "10")
+    with pooled_client() as client:
+        assert client._transport.per_host == 4            # never above the global cap
+
+
+def test_install_pool_is_shared_with_litellm(monkeypatch):
+    litellm = pytest.importorskip("litellm")
+    monkeypatch.setattr(http_pool, "_client", None)
+    monkeypatch.setattr(litellm, "client_session", None)
+    assert http_pool.pool_stats() == {}
+    client = http_pool.install_pool()
+    try:
+        assert http_pool.install_pool() is client
+        assert litellm.client_session is client
+        assert http_pool.pool_stats()["requests"] == 0
+    finally:
+        client.close()
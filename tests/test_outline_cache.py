@@ -0,0 +1,76 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("pydantic")
+
+from kids_writing_agent.outline_cache import OutlineCache, _template, reusable   # noqa: E402
+
+TOPIC = "My Favorite Animal"
+IDEAS = ["dogs are loyal friends", "we play fetch in the park", "he protects our house"]
+OUTLINE = ("1. Introduction: tell the reader about My Favorite Animal\n"
+           "2. Body: dogs are loyal friends (hint: one true story)\n"
+           "3. Body: we play fetch in the park (hint: use action words)\n"
+           "4. Body: he protects our house (hint: say how)\n"
+           "5. Conclusion: say your main idea again")
+
+
+def test_similar_ideas_reuse_the_outline_with_the_new_wording():
+    cache = OutlineCache(threshold=0.6)
+    assert cache.lookup(TOPIC, 3, IDEAS) is None
+    assert cache.store(TOPIC, 3, IDEAS, OUTLINE)
+    ideas = ["dogs are loyal friends", "we play fetch at the park", "he protects our home"]
+    outline = cache.lookup(TOPIC, 3, ideas)
+    assert outline is not None
+    for idea in ideas:
+        assert idea in outline
+    assert "our house" not in outline
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_other_grades_and_idea_counts_miss():
+    cache = OutlineCache(threshold=0.6)
+    cache.store(TOPIC, 3, IDEAS, OUTLINE)
+    assert cache.lookup(TOPIC, 4, IDEAS) is None
+    assert cache.lookup(TOPIC, 3, IDEAS[:2]) is None
+
+
+def test_personal_details_are_never_shared():
+    cache = OutlineCache(threshold=0.5)
+    ideas = ["my dog Max is loyal", "we play fetch at Riverside Park", "he protects us"]
+    personal = ("1. Intro: tell the reader about Max\n"
+                "2. Body: why Max is loyal\n"
+                "3. Body: fetch at Riverside Park\n"
+                "4. Conclusion: he protects us")
+    assert not cache.store(TOPIC, 3, ideas, personal)
+    assert cache.stats()["rejected"] == 1 and cache.stats()["entries"] == 0
+    assert cache.lookup(TOPIC, 3, ["my cat Luna is loyal", "we play tag at school",
+                                   "she protects us"]) is None
+
+
+def test_an_empty_idea_list_is_never_stored_or_matched():
+    cache = OutlineCache(threshold=0.6)
+    assert not cache.store("My Pet", 3, [], "1. Intro\n2. Conclusion")
+    assert cache.lookup("My Pet", 3, []) is None
+    assert cache.stats()["entries"] == 0 and cache.stats()["misses"] == 1
+
+
+def test_slots_match_whole_words_only():
+    template = _template("Have fun, not a funny refund.", "Pets", ["fun"])
+    assert template == "Have {idea0}, not a funny refund."
+
+
+def test_reusable_allows_topic_words_and_sentence_starts():
+    assert reusable("1. Introduction: {topic}\n2. Body: {idea0}. Dogs rule.", TOPIC, ["x"])
+    assert not reusable("2. Body: a walk with Luna", TOPIC, ["x"])
+    assert not reusable("2. Body: Max loves it", TOPIC, ["my dog Max"])
+
+
+def test_lru_eviction_when_full():
+    cache = OutlineCache(threshold=0.6, max_entries=2)
+    cache.store("Why Recess Matters", 3, ["kids need to move"], "1. Body: run and jump")
+    cache.store("The Best Day Ever", 3, ["going to the beach"], "1. Body: the beach")
+    cache.lookup("Why Recess Matters", 3, ["kids need to move"])      # touch the first
+    cache.store(TOPIC, 3, ["dogs are loyal"], "1. Body: loyal dogs")
+    assert cache.stats()["evictions"] == 1
+    assert cache.lookup("Why Recess Matters", 3, ["kids need to move"]) is not None
+    assert cache.lookup("The Best Day Ever", 3, ["going to the beach"]) is None
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+
+from kids_writing_agent.prefetch import (
+    AsyncOutlinePrefetch, OutlinePrefetch, ideas_similarity, prefetch_stats,
+)
+
+STUDENT = ["dogs", "my dog Max", "playing fetch", "he protects us",
+           "He is always happy to see me."]
+BULLETS = ["Dogs are loyal friends", "Dogs are fun to play with", "Dogs keep us safe"]
+
+
+def outline_for(ideas):
+    return "\n".join(f"{i + 1}. {idea}" for i, idea in enumerate(ideas))
+
+
+def delta(before, key):
+    return prefetch_stats()[key] - before[key]
+
+
+def running(result):
+    """A shortlist that signals once the background job is running (so take() waits)."""
+    started = threading.Event()
+
+    def shortlist(ideas):
+        started.set()
+        return result
+
+    shortlist.started = started
+    return shortlist
+
+
+def offer(prefetch, shortlist):
+    assert prefetch.offer(STUDENT, outline_for, shortlist=shortlist)
+    assert shortlist.started.wait(5)
+
+
+def test_similarity_ignores_order_stopwords_and_plurals():
+    assert ideas_similarity(["Dogs are loyal"], ["a loyal dog"]) == 1.0
+    assert ideas_similarity(["dogs"], ["cats"]) == 0.0
+
+
+def test_outline_is_drafted_for_the_shortlisted_bullets():
+    before = prefetch_stats()
+    prefetch = OutlinePrefetch(min_ideas=3)
+    offer(prefetch, running(BULLETS))
+    outline = prefetch.take(BULLETS, timeout=5)
+    assert outline == outline_for(BULLETS)          # one paragraph per final idea
+    assert "my dog Max" not in outline
+    assert delta(before, "hit") == 1
+
+
+def test_diverging_final_list_is_redrafted():
+    before = prefetch_stats()
+    prefetch = OutlinePrefetch(min_ideas=3)
+    offer(prefetch, running(BULLETS))
+    assert prefetch.take(["Cats sleep all day", "Cats purr", "Cats hunt mice"], timeout=5) is None
+    assert delta(before, "miss") == 1 and delta(before, "hit") == 0
+
+
+def test_no_shortlist_is_a_miss():
+    before = prefetch_stats()
+    prefetch = OutlinePrefetch(min_ideas=3)
+    offer(prefetch, running(None))
+    assert prefetch.take(BULLETS, timeout=5) is None
+    assert delta(before, "miss") == 1
+
+
+def test_unkeyed_miss_does_not_wait_for_the_job():
+    release = threading.Event()
+
+    def slow(ideas):
+        release.wait(5)
+        return outline_for(ideas)
+
+    prefetch = OutlinePrefetch(min_ideas=3)
+    prefetch.offer(BULLETS, slow)
+    try:
+        assert prefetch.take(["Cats sleep all day", "Cats purr", "Cats hunt mice"],
+                             timeout=0.1) is None
+    finally:
+        release.set()
+
+
+def test_a_job_still_queued_is_dropped():
+    before = prefetch_stats()
+    gate = threading.Event()
+    busy = [OutlinePrefetch(min_ideas=1) for _ in range(8)]
+    for p in busy:                                  # fill every worker
+        p.offer(["busy"], lambda ideas: gate.wait(5) and "")
+    prefetch = OutlinePrefetch(min_ideas=3)
+    prefetch.offer(BULLETS, outline_for)
+    try:
+        assert prefetch.take(BULLETS) is None
+        assert delta(before, "queued") == 1
+    finally:
+        gate.set()
+
+
+def test_too_few_ideas_or_a_stable_list_start_nothing():
+    before = prefetch_stats()
+    prefetch = OutlinePrefetch(min_ideas=3)
+    assert not prefetch.offer(STUDENT[:2], outline_for)
+    assert prefetch.offer(STUDENT, outline_for)
+    assert not prefetch.offer(STUDENT + ["he is fluffy"], outline_for)   # still fits
+    assert prefetch.offer(["cats", "cats purr", "cats hunt mice", "naps"], outline_for)
+    assert delta(before, "replaced") == 1
+    prefetch.cancel()
+
+
+def test_async_prefetch_compares_the_shortlisted_bullets():
+    async def main():
+        async def draft(ideas):
+            return outline_for(ideas)
+
+        async def shortlist(ideas):
+            return BULLETS
+
+        prefetch = AsyncOutlinePrefetch(min_ideas=3)
+        prefetch.offer(STUDENT, draft, shortlist=shortlist)
+        hit = await prefetch.take(list(reversed(BULLETS)))
+        prefetch.offer(STUDENT, draft, shortlist=shortlist)
+        miss = await prefetch.take(STUDENT)
+        return hit, miss
+
+    hit, miss = asyncio.run(main())
+    assert hit == outline_for(BULLETS) and miss is None
@@ -0,0 +1,54 @@
+import pytest
+
+pytest.importorskip("pydantic")
+
+from kids_writing_agent.progress import (                                   # noqa: E402
+    ProgressIndex, area_hits, empty_summary, fold,
+)
+
+
+def test_fold_tracks_scores_and_streaks():
+    s = empty_summary()
+    for score, revisions in [(70, 2), (75, 0), (82, 0), (78, 1)]:
+        fold(s, score, "My Pet", "2026-01-01", revisions=revisions)
+    assert s["essays"] == 4 and s["best"] == 82 and s["previous_best"] == 82
+    assert s["last"] == 78 and s["recent"] == [70, 75, 82, 78]
+    assert s["rolling_avg"] == 76.2 and s["mean"] == 76.2
+    assert s["streaks"] == {"improving": 0, "best_improving": 2, "first_try": 0}
+
+
+def test_fold_keeps_a_rolling_window():
+    s = empty_summary()
+    for score in range(60, 100, 5):
+        fold(s, score)
+    assert s["recent"] == [75, 80, 85, 90, 95]
+    assert s["rolling_avg"] == 85.0
+
+
+def test_area_trends_from_review_issues():
+    s = empty_summary()
+    areas = ["comma splices", "organization"]
+    fold(s, 70, issues=["Fix the comma splice in P2.", "Another comma splice in P3."],
+         weak_areas=areas)
+    assert s["areas"]["comma splices"] == {"last": 2, "avg": 2.0, "trend": "new", "essays": 1}
+    fold(s, 80, issues=["Organize your ideas better."], weak_areas=areas)
+    assert s["areas"]["comma splices"]["trend"] == "improving"
+    assert s["areas"]["organization"]["trend"] == "worse"
+    fold(s, 85, issues=None, weak_areas=areas)              # imported history: no trend
+    assert s["areas"]["comma splices"]["essays"] == 2
+
+
+def test_area_hits_matches_stems():
+    assert area_hits("comma splices", ["Comma splice here", "Run-on sentence"]) == 1
+    assert area_hits("a", ["anything"]) == 0
+
+
+def test_record_is_idempotent_per_key(tmp_path):
+    index = ProgressIndex(tmp_path / "progress.sqlite")
+    try:
+        index.record("kid", 80, "Pets", key="draft-1")
+        again = index.record("kid", 80, "Pets", key="draft-1")       # replayed step
+        assert again["essays"] == 1
+        assert index.record("kid", 85, "Pets", key="draft-2")["essays"] == 2
+    finally:
+        index.close()
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from kids_writing_agent.ratelimit import RateLimiter, TokenBucket, current_priority, priority_scope
+
+
+def test_priority_scope_sets_and_restores():
+    assert current_priority() == "interactive"
+    with priority_scope("batch"):
+        assert current_priority() == "batch"
+    assert current_priority() == "interactive"
+    with pytest.raises(ValueError):
+        with priority_scope("urgent"):
+            pass
+
+
+def test_bucket_never_waits_forever_for_an_oversized_call():
+    bucket = TokenBucket(per_minute=600, capacity=10)
+    assert bucket.wait_for(10_000) == 0.0
+    bucket.take(10_000)
+    assert 0 < bucket.wait_for(1) <= 0.2
+
+
+def test_disabled_limits_admit_immediately():
+    limiter = RateLimiter()
+    for _ in range(50):
+        assert limiter.acquire(100_000).waited < 0.05
+
+
+def test_settle_returns_unused_tokens():
+    limiter = RateLimiter(rpm=0, tpm=6000)
+    permit = limiter.acquire(1000)
+    assert limiter.stats()["tokens_left"] == 5000
+    permit.settle(200)
+    assert limiter.stats()["tokens_left"] == 5800
+
+
+def test_settle_charges_extra_requests():
+    limiter = RateLimiter(rpm=60, burst=10)
+    permit = limiter.acquire(10)
+    permit.settle(10, requests=4)         # one kickoff, four model calls
+    assert limiter.stats()["requests_left"] == pytest.approx(6, abs=0.1)
+
+
+def test_interactive_callers_overtake_queued_batch_work():
+    limiter = RateLimiter(rpm=600, burst=1)     # one request every 0.1 s
+    limiter.acquire(1)                          # drain the burst
+    order, lock = [], threading.Lock()
+
+    def call(name, priority):
+        limiter.acquire(1, priority=priority)
+        with lock:
+            order.append(name)
+
+    batch = [threading.Thread(target=call, args=(f"batch{i}", "batch")) for i in range(3)]
+    for t in batch:
+        t.start()
+    time.sleep(0.03)                            # the batch calls are queued first
+    student = threading.Thread(target=call, args=("student", "interactive"))
+    student.start()
+    for t in batch + [student]:
+        t.join()
+    assert order[0] == "student"
+    stats = limiter.stats()
+    assert stats["batch_admitted"] == 3 and stats["interactive_admitted"] == 2
+    assert stats["batch_queued"] == stats["interactive_queued"] == 0
+
+
+def test_async_acquire_waits_without_blocking_the_loop():
+    limiter = RateLimiter(rpm=600, burst=1)
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        tick = asyncio.create_task(ticker())
+        await limiter.acquire_async(1)
+        permit = await limiter.acquire_async(1)
+        tick.cancel()
+        return permit, ticks
+
+    permit, ticks = asyncio.run(main())
+    assert permit.waited > 0.05 and ticks >= 3
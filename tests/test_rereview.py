@@ -0,0 +1,70 @@
+from kids_writing_agent.rereview import attribute, plan_review
+
+DRAFT = (
+    "My favorite animal is my dog Max. He is very loyal.\n\n"
+    "Max is fun to play with. We play fetch in the park.\n\n"
+    "He keeps our house safe. He barks at strangers."
+)
+REVIEW = {"score": 74, "passed": False,
+          "issues": ["P2: Give one more example of playing.", "P0: Add a conclusion."]}
+
+
+def reviewed(draft=DRAFT, review=REVIEW):
+    return plan_review(draft).merge(review)
+
+
+def test_first_review_is_full():
+    plan = plan_review(DRAFT)
+    assert plan.full and plan.changed == [0, 1, 2]
+    assert "[P1]" in plan.render() and "[P3]" in plan.render()
+
+
+def test_merge_attributes_tagged_issues():
+    assessment, memo = reviewed()
+    assert assessment == {"score": 74, "passed": False, "issues": [
+        "Paragraph 2: Give one more example of playing.", "Add a conclusion."]}
+    assert memo["issues"] == [[], ["Give one more example of playing."], []]
+    assert memo["essay_issues"] == ["Add a conclusion."]
+
+
+def test_unchanged_draft_reuses_the_last_review():
+    assessment, memo = reviewed()
+    plan = plan_review(DRAFT.replace("  ", " ") + "\n", memo)
+    assert plan.unchanged
+    assert plan.merge() == (assessment, memo)
+
+
+def test_only_changed_paragraphs_go_back():
+    _, memo = reviewed()
+    revised = DRAFT.replace("We play fetch in the park.",
+                            "We play fetch in the park and he jumps in the lake.")
+    plan = plan_review(revised, memo)
+    assert not plan.full and plan.changed == [1]
+    prompt = plan.as_prompt()
+    assert "[P2]" in prompt and "[P1]" not in prompt and "[P3]" not in prompt
+    assert "(…end of P1) He is very loyal." in prompt
+
+    assessment, _ = plan.merge({"score": 85, "passed": True, "issues": []})
+    assert assessment["score"] == 85 and assessment["issues"] == []
+
+
+def test_carried_issues_survive_a_partial_review():
+    _, memo = plan_review(DRAFT).merge(
+        {"score": 70, "issues": ["P3: Say why safety matters."]})
+    revised = DRAFT.replace("He is very loyal.", "He is the most loyal dog I know.")
+    assessment, memo = plan_review(revised, memo).merge({"score": 78, "issues": []})
+    assert assessment["issues"] == ["Paragraph 3: Say why safety matters."]
+    assert assessment["passed"] is False            # 78 < PASS_SCORE
+
+
+def test_large_rewrite_falls_back_to_full_review():
+    _, memo = reviewed()
+    rewrite = "Cats are great.\n\nThey purr a lot.\n\nThey sleep all day."
+    assert plan_review(rewrite, memo).full
+
+
+def test_untagged_issue_matched_by_quote():
+    paragraphs = DRAFT.split("\n\n")
+    per, essay = attribute(['Fix "We play fetch in the park."', "Nice work overall."], paragraphs)
+    assert per == {1: ['Fix "We play fetch in the park."']}
+    assert essay == ["Nice work overall."]
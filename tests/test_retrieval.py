@@ -0,0 +1,70 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from kids_writing_agent.retrieval import VectorIndex, chunk   # noqa: E402
+
+
+def _write(root, rel, text):
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+@pytest.fixture
+def knowledge(tmp_path):
+    root = tmp_path / "knowledge"
+    _write(root, "commas.md", "Use a comma before and, but or so when joining two sentences.")
+    _write(root, "exemplars/dogs.txt",
+           "grade: 3\nMy dog is my best friend. He runs with me every day.\n\n"
+           "Dogs are loyal. My dog waits for me after school.")
+    _write(root, "exemplars/space.txt",
+           "grade: 7\nThe planets orbit the sun because gravity pulls them inward.")
+    return root
+
+
+def test_sync_indexes_once_and_tracks_changes(tmp_path, knowledge):
+    index = VectorIndex(tmp_path / "index")
+    first = index.sync(knowledge)
+    assert first["added"] >= 3 and first["unchanged"] == first["retired"] == 0
+    assert index.sync(knowledge) == {"added": 0, "unchanged": 3, "retired": 0}
+
+    _write(knowledge, "commas.md", "A comma goes before the joining word in a compound sentence.")
+    (knowledge / "exemplars" / "space.txt").unlink()
+    stats = index.sync(knowledge)
+    assert stats["unchanged"] == 1 and stats["retired"] == 2 and stats["added"] == 1
+    assert all(hit["source"] != "exemplars/space.txt"
+               for hit in index.search("planets orbit the sun gravity", k=5))
+    index.close()
+
+
+def test_sync_survives_a_reopen(tmp_path, knowledge):
+    VectorIndex(tmp_path / "index").sync(knowledge)
+    reopened = VectorIndex(tmp_path / "index")
+    assert reopened.sync(knowledge)["unchanged"] == 3
+    assert reopened.search("comma before and", k=1)[0]["source"] == "commas.md"
+
+
+def test_grade_header_and_exemplar_kind(tmp_path, knowledge):
+    index = VectorIndex(tmp_path / "index")
+    index.sync(knowledge)
+    hits = index.search("my dog is loyal", k=3, kind="exemplar", grade=3)
+    assert hits and {h["source"] for h in hits} == {"exemplars/dogs.txt"}
+    assert all(h["kind"] == "exemplar" and h["grade"] == 3 for h in hits)
+    assert all("grade:" not in h["text"] for h in hits)
+
+
+def test_distinct_returns_one_chunk_per_source(tmp_path):
+    index = VectorIndex(tmp_path / "index")
+    index.add(["my dog runs fast", "my dog is loyal", "my dog sleeps a lot"], "dogs.txt")
+    index.add(["my cat is loyal too"], "cats.txt")
+    assert len(index.search("my dog is loyal", k=2)) == 2
+    hits = index.search("my dog is loyal", k=2, distinct=True)
+    assert [h["source"] for h in hits] == ["dogs.txt", "cats.txt"]
+
+
+def test_chunk_keeps_paragraphs_whole_when_they_fit():
+    text = "First paragraph here.\n\nSecond one.\n\n" + " ".join(["word"] * 200)
+    parts = chunk(text, max_words=80)
+    assert parts[0].startswith("First paragraph here.")
+    assert all(len(p.split()) <= 80 for p in parts)
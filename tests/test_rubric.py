@@ -0,0 +1,65 @@
+import pytest
+
+from kids_writing_agent.rubric import (
+    PASS_SCORE, find_comma_splices, find_run_ons, pre_score, split_paragraphs,
+    split_sentences,
+)
+
+GUIDE = {"paras": 3, "min_words": 80, "max_words": 1500}
+SENTENCE = "My dog Max waits for me at the door after school every single day. "
+ESSAY = "\n\n".join([SENTENCE * 3] * 3)
+
+
+@pytest.mark.parametrize("sentence", [
+    "My dog is really loyal, he waits for me every day.",
+    "I love going to the beach, it is so much fun.",
+    "We went to the park today, my dog was very happy.",
+    "The zoo was very big, there were lions and tigers.",
+])
+def test_splices_are_flagged(sentence):
+    assert find_comma_splices([sentence]) == [sentence]
+
+
+@pytest.mark.parametrize("sentence", [
+    "After school, I play with my dog.",                     # intro phrase
+    "I have two pets, my dog Max and my cat Luna.",          # appositive list, no verb
+    "We saw lions, tigers and bears at the zoo.",
+    "My dog is loyal, and he waits for me.",                 # joined with "and"
+    "When it rains, we stay inside and read.",
+])
+def test_correct_commas_are_not_flagged(sentence):
+    assert find_comma_splices([sentence]) == []
+
+
+def test_run_ons_depend_on_grade_and_ands():
+    long = " ".join(["word"] * 30) + "."
+    assert find_run_ons([long], grade=3) == [long]
+    assert find_run_ons([long], grade=5) == []
+    ands = "I ran and jumped and laughed and sang."
+    assert find_run_ons([ands], grade=5) == [ands]
+
+
+def test_paragraphs_fall_back_to_lines_and_sentences_split_on_end_marks():
+    assert split_paragraphs("One.\nTwo.\nThree.") == ["One.", "Two.", "Three."]
+    assert split_paragraphs("A b.\n\nC d.") == ["A b.", "C d."]
+    assert split_sentences("Hi there! How are you? Fine.") == ["Hi there!", "How are you?", "Fine."]
+
+
+def test_a_plain_failure_gets_a_local_verdict():
+    findings = pre_score("My dog is nice.", GUIDE)
+    assert findings.verdict["passed"] is False
+    assert findings.verdict["score"] < PASS_SCORE
+    assert any("paragraph" in issue for issue in findings.verdict["issues"])
+
+
+def test_a_passing_draft_always_goes_to_the_reviewer():
+    findings = pre_score(ESSAY, GUIDE, weak_areas=["comma splices"])
+    assert findings.verdict is None
+    assert findings.paragraphs == 3 and findings.words == len(ESSAY.split())
+    assert "paragraphs: 3" in findings.as_prompt()
+
+
+def test_weak_areas_switch_on_the_checks():
+    draft = ESSAY + "\n\nMy dog is really loyal, he waits for me every day."
+    assert pre_score(draft, GUIDE).comma_splices == []
+    assert pre_score(draft, GUIDE, weak_areas=["comma splices"]).comma_splices
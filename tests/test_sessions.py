@@ -0,0 +1,145 @@
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("crewai")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "playground" / "gui_v1"))
+
+from helpers import FLOW_DONE, Chunk                                   # noqa: E402
+from sessions import AsyncSessionManager, CapacityError, SessionManager  # noqa: E402
+
+
+class NameFlow:
+    """Greets, asks two questions, then finishes."""
+
+    def __init__(self, ux):
+        self.ux = ux
+        self.finished = False
+
+    def kickoff(self):
+        self.ux.out.put("Hello!")
+        name = self.ux.ask("What is your name?")
+        self.ux.stream("Nice to ")
+        self.ux.out.put(f"Nice to meet you, {name}.")
+        self.ux.ask("Ready?")
+        self.finished = True
+        self.ux.done()
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_every_session_gets_its_own_flow():
+    manager = SessionManager(NameFlow, max_sessions=2)
+    a, b = manager.get_or_create("a"), manager.get_or_create("b")
+    assert a.flow is not b.flow and a.ux is not b.ux
+    assert manager.get_or_create("a") is a
+    # the first message answers the flow's opening question
+    assert a.reply("Ana") == ["Hello!", "What is your name?", "Nice to meet you, Ana.", "Ready?"]
+    assert b.reply("Ben")[-2:] == ["Nice to meet you, Ben.", "Ready?"]
+    assert a.reply("yes") == [FLOW_DONE] and b.reply("yes") == [FLOW_DONE]
+    assert a.flow.finished and b.flow.finished
+
+
+def test_capacity_is_enforced_and_counted():
+    manager = SessionManager(NameFlow, max_sessions=1)
+    manager.get_or_create("a")
+    with pytest.raises(CapacityError):
+        manager.get_or_create("b")
+    manager.end("a")
+    manager.get_or_create("b")
+    stats = manager.metrics()
+    assert (stats["active"], stats["created"], stats["completed"], stats["rejected"]) == (1, 2, 1, 1)
+
+
+def test_ending_or_reaping_a_session_stops_its_flow_thread():
+    manager = SessionManager(NameFlow, idle_timeout=0.05)
+    session = manager.get_or_create("a")
+    session.reply("Ana")                        # the flow now waits in ask()
+    time.sleep(0.1)
+    assert manager.reap() == 1
+    assert wait_for(lambda: not session.runner.is_alive())
+    assert session.over and manager.metrics()["reaped"] == 1
+
+
+class SilentFlow:
+    """Ends without ever asking the student anything."""
+
+    def __init__(self, ux):
+        self.ux = ux
+
+    def kickoff(self):
+        self.ux.out.put("Nothing to do today.")
+        self.ux.done()
+
+
+class CrashingFlow(SilentFlow):
+    def kickoff(self):
+        raise RuntimeError("model down")
+
+
+def test_a_turn_ends_as_soon_as_the_flow_waits_again():
+    manager = SessionManager(NameFlow)
+    session = manager.get_or_create("a")
+    started = time.perf_counter()
+    session.reply("Ana")
+    assert time.perf_counter() - started < 1.0      # no fixed drain poll
+    assert session.turns == 1
+
+
+def test_stream_reply_yields_chunks_before_the_full_message():
+    session = SessionManager(NameFlow).get_or_create("a")
+    out = list(session.stream_reply("Ana"))
+    assert Chunk("Nice to ") in out
+    assert out.index("Nice to ") < out.index("Nice to meet you, Ana.")
+    assert isinstance(out[out.index("Nice to ")], Chunk)
+
+
+def test_a_flow_that_ends_before_asking_returns_at_once():
+    session = SessionManager(SilentFlow).get_or_create("a")
+    assert session.reply("hi") == ["Nothing to do today.", FLOW_DONE]
+    assert session.ux.in_.empty()                   # the message was not queued for nobody
+
+
+def test_a_crashed_flow_still_ends_the_turn():
+    session = SessionManager(CrashingFlow).get_or_create("a")
+    assert session.reply("hi") == [FLOW_DONE]
+
+
+class AsyncNameFlow(NameFlow):
+    async def kickoff_async(self):
+        self.ux.out.put_nowait("Hello!")
+        name = await self.ux.ask("What is your name?")
+        self.ux.out.put_nowait(f"Nice to meet you, {name}.")
+        await self.ux.ask("Ready?")
+        self.finished = True
+        self.ux.done()
+
+
+def test_async_sessions_run_on_the_loop_without_threads():
+    async def main():
+        manager = AsyncSessionManager(AsyncNameFlow, max_sessions=10)
+        threads = threading.active_count()
+        sessions = [manager.get_or_create(f"s{i}") for i in range(10)]
+        replies = await asyncio.gather(*(s.reply(f"kid{i}") for i, s in enumerate(sessions)))
+        assert threading.active_count() == threads
+        assert all(r[-2] == f"Nice to meet you, kid{i}." for i, r in enumerate(replies))
+        with pytest.raises(CapacityError):
+            manager.get_or_create("one-too-many")
+        assert await sessions[0].reply("yes") == [FLOW_DONE]
+        manager.end("s1")                        # closing a waiting flow ends its task
+        await asyncio.wait_for(sessions[1].runner, 1)
+        manager._reaper.cancel()
+        return manager.metrics()
+
+    stats = asyncio.run(main())
+    assert stats["created"] == 10 and stats["completed"] == 1 and stats["rejected"] == 1
@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip("pydantic")
+
+from kids_writing_agent.state import Review                                # noqa: E402
+from kids_writing_agent.structured import (                                # noqa: E402
+    StructuredOutputError, iter_json_objects, parse_structured, repair_json,
+)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"score": 80, "passed": true,}', {"score": 80, "passed": True}),
+    ('{score: 80, issues: ["a",]}', {"score": 80, "issues": ["a"]}),
+    ("{'score': 80, 'passed': True, 'issues': []}", {"score": 80, "passed": True, "issues": []}),
+    ('{"score": 80, "passed": false, "note": null}', {"score": 80, "passed": False, "note": None}),
+])
+def test_repair_json_fixes_common_model_slips(text, expected):
+    assert repair_json(text) == expected
+
+
+def test_repair_json_gives_up_on_garbage():
+    assert repair_json("{score is eighty}") is None
+    assert repair_json("{'a': [1, 2}") is None
+
+
+def test_iter_json_objects_ignores_braces_in_strings():
+    text = 'Sure! {"issues": ["use {curly} braces"]} and {"b": 2}'
+    assert list(iter_json_objects(text)) == ['{"issues": ["use {curly} braces"]}', '{"b": 2}']
+
+
+def test_parse_structured_repairs_before_asking_the_model():
+    asked = []
+    review = parse_structured("Here you go: {'score': 91, 'passed': True, 'issues': []}",
+                              Review, fix=lambda bad, err: asked.append(bad) or "")
+    assert review.score == 91 and review.passed and not asked
+
+
+def test_parse_structured_asks_the_model_once():
+    review = parse_structured("no json here", Review,
+                              fix=lambda bad, err: '{"score": 60, "passed": false, "issues": []}')
+    assert review.score == 60
+    with pytest.raises(StructuredOutputError):
+        parse_structured("no json here", Review, fix=lambda bad, err: "still none")